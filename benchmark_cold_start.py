@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cloud_function_main のコールドスタート計測スクリプト
+変更前（モジュール読み込み時に pandas / google.cloud.storage 等をすべて読み込む）、
+軽量パス（標準ライブラリのCSV解析）、pandasパスで、
+モジュール読み込み時間と初回レスポンスまでの時間を比較する
+
+遅延読み込みのパスでは、実際の環境で初回リクエスト時に読み込まれる google.cloud.storage の
+読み込み時間を初回レスポンスに含める（フェイクのGCSを使うため、計測コードで読み込む）
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(BASE_DIR, 'schedule test - シート2 (1).csv')
+
+# 変更前の cloud_function_main がモジュールの先頭で読み込んでいたライブラリ
+BASELINE_EAGER_IMPORTS = ('requests', 'pandas', 'google.cloud.storage', 'pytz')
+
+# 計測するパス: (名前, SCHEDULE_PARSER, 変更前の読み込みを再現するか)
+PATHS = (
+    ('変更前（一括読み込み）', 'pandas', True),
+    ('pandas', 'pandas', False),
+    ('lean', 'lean', False),
+)
+
+# 子プロセスで実行する計測コード（毎回新しいインタプリタ＝コールドスタート）
+_CHILD_CODE = r'''
+import json, os, sys, time
+sys.path.insert(0, os.environ['BENCH_BASE_DIR'])
+
+# functions_frameworkは実行環境が先に読み込むため計測対象外
+import functions_framework
+
+import importlib
+eager = os.environ.get('BENCH_EAGER') == '1'
+started = time.perf_counter()
+if eager:
+    # 変更前のモジュールと同じく、重いライブラリをモジュール読み込み時にすべて読み込む
+    for name in os.environ['BENCH_EAGER_IMPORTS'].split(','):
+        importlib.import_module(name)
+import cloud_function_main as cf
+import_seconds = time.perf_counter() - started
+
+from fake_gcs import FakeStorageClient
+client = FakeStorageClient()
+with open(os.environ['BENCH_CSV'], 'rb') as f:
+    client.put_object('bench-bucket', 'schedule.csv', f.read())
+cf.set_storage_client(client)
+
+started = time.perf_counter()
+if not eager:
+    # 実際の環境では初回リクエストで storage.Client() を作成する際に読み込まれる
+    from google.cloud import storage
+result = cf.send_daily_schedule(None)
+first_response_seconds = time.perf_counter() - started
+
+print(json.dumps({
+    'import_seconds': import_seconds,
+    'first_response_seconds': first_response_seconds,
+    'pandas_loaded': 'pandas' in sys.modules,
+    'result': result if isinstance(result, dict) else result[0]
+}))
+'''
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    """Slack Webhookの代わりに200を返すハンドラー"""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_cold_start(parser_name, csv_file, webhook_url, eager=False):
+    """
+    新しいプロセスで1回分のコールドスタートを計測
+
+    Args:
+        parser_name (str): 'lean' または 'pandas'
+        csv_file (str): スケジュールCSVのパス
+        webhook_url (str): フェイクWebhookのURL
+        eager (bool): Trueの場合は変更前と同じく重いライブラリをモジュール読み込み時に読み込む
+
+    Returns:
+        dict: 計測結果
+    """
+    env = dict(os.environ)
+    env.update({
+        'BENCH_BASE_DIR': BASE_DIR,
+        'BENCH_CSV': csv_file,
+        'SCHEDULE_PARSER': parser_name,
+        'BUCKET_NAME': 'bench-bucket',
+        'CSV_FILE': 'schedule.csv',
+        'SLACK_WEBHOOK_URL': webhook_url,
+        'BENCH_EAGER': '1' if eager else '0',
+        'BENCH_EAGER_IMPORTS': ','.join(BASELINE_EAGER_IMPORTS)
+    })
+    output = subprocess.run([sys.executable, '-c', _CHILD_CODE], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def check_output_parity(csv_file):
+    """
+    両方の解析方法で全日付のメッセージが一致するか確認
+
+    Args:
+        csv_file (str): スケジュールCSVのパス
+
+    Returns:
+        list: 一致しなかった日付のリスト
+    """
+    sys.path.insert(0, BASE_DIR)
+    import cloud_function_main as cf
+
+    with open(csv_file, encoding='utf-8') as f:
+        csv_content = f.read()
+    lean = cf._parse_schedule_lean(csv_content)
+    legacy = cf._parse_schedule_pandas(csv_content)
+
+    mismatched = []
+    for date in sorted(set(lean) | set(legacy)):
+        if cf._format_message(date, lean.get(date, [])) != cf._format_message(date, legacy.get(date, [])):
+            mismatched.append(date)
+    return mismatched
+
+
+def main():
+    """メイン実行関数"""
+    parser = argparse.ArgumentParser(description='Cloud Functionのコールドスタート計測')
+    parser.add_argument('--csv', default=DEFAULT_CSV, help='スケジュールCSVのパス')
+    parser.add_argument('--runs', type=int, default=5, help='各パスの計測回数')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _WebhookHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    webhook_url = f'http://127.0.0.1:{server.server_address[1]}/webhook'
+
+    print("=" * 60)
+    print("🧊 Cloud Function コールドスタート計測")
+    print("=" * 60)
+    print(f"📁 CSV: {args.csv}")
+    print(f"🔁 計測回数: {args.runs}回/パス（毎回新しいプロセス）")
+
+    summary = {}
+    for name, parser_name, eager in PATHS:
+        results = [run_cold_start(parser_name, args.csv, webhook_url, eager) for _ in range(args.runs)]
+        import_ms = statistics.median(r['import_seconds'] for r in results) * 1000
+        first_ms = statistics.median(r['first_response_seconds'] for r in results) * 1000
+        summary[name] = (import_ms, first_ms)
+        print(f"\n📊 {name}パス")
+        print(f"   - モジュール読み込み: {import_ms:.1f}ms（中央値）")
+        print(f"   - 初回レスポンス: {first_ms:.1f}ms（中央値）")
+        print(f"   - 合計: {import_ms + first_ms:.1f}ms")
+        print(f"   - pandas読み込み: {'あり' if results[0]['pandas_loaded'] else 'なし'}")
+        print(f"   - 結果: {results[0]['result'].get('status')}")
+
+    server.shutdown()
+
+    lean_total = sum(summary['lean'])
+    print()
+    for name, _, _ in PATHS[:-1]:
+        total = sum(summary[name])
+        print(f"⚡ 軽量パスは{name}パスより {total - lean_total:.1f}ms 短縮"
+              f"（{total / max(lean_total, 0.001):.1f}倍速）")
+    print("💡 遅延読み込みのパスの初回レスポンスには google.cloud.storage の読み込み時間を含めています")
+
+    mismatched = check_output_parity(args.csv)
+    if mismatched:
+        print(f"❌ 出力が一致しない日付があります: {', '.join(mismatched)}")
+    else:
+        print("✅ 全日付で両パスのメッセージが一致しました（軽量パスをデフォルトにできます）")
+
+
+if __name__ == "__main__":
+    main()
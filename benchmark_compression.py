@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+圧縮スケジュールCSVのベンチマーク
+非圧縮・gzip・zstdで、転送バイト数とエンドツーエンドの所要時間を比較する
+（Cloud Function: フェイクのCloud Storageに転送速度を設定 / ローカル: read_csv_schedule）
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from schedule_codec import GZIP, ZSTD, compress_bytes  # noqa: E402
+
+BUCKET_NAME = 'bench-bucket'
+NAMES = ('好井敬依子', '市川裕美', '山形愛', 'リチャードソン恵', '佐々木繭子', '金城江莉', '本間メイ')
+TASKS = ('採用アシスタント', '在庫管理', '人事関連', 'ゲスト返信', '労務')
+
+
+def build_csv(days, rows_per_day):
+    """
+    今日を中心にdays日分の予定を持つCSVを作成
+
+    Args:
+        days (int): 日数
+        rows_per_day (int): 1日あたりの行数
+
+    Returns:
+        bytes: CSVの内容
+    """
+    start = datetime.now() - timedelta(days=days // 2)
+    lines = ['日付,開始時間,終了時間,名前,タスク内容']
+    for day in range(days):
+        date = (start + timedelta(days=day)).strftime('%Y-%m-%d')
+        for i in range(rows_per_day):
+            hour = 9 + i % 10
+            lines.append(f"{date},{hour}:00,{hour + 2}:00,{NAMES[i % len(NAMES)]},{TASKS[i % len(TASKS)]}")
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def available_codecs():
+    """利用できる圧縮形式（zstandardがなければzstdは除く）"""
+    codecs = [None, GZIP]
+    try:
+        import zstandard  # noqa: F401
+        codecs.append(ZSTD)
+    except ImportError:
+        print("⚠️ zstandard が未インストールのため zstd は計測しません（pip install zstandard）")
+    return codecs
+
+
+def object_name(codec):
+    """圧縮形式に応じたオブジェクト名・ファイル名"""
+    return {None: 'schedule.csv', GZIP: 'schedule.csv.gz', ZSTD: 'schedule.csv.zst'}[codec]
+
+
+def bench_cloud_function(data, codecs, runs, latency, bandwidth, stream):
+    """
+    Cloud Functionの送信処理を非圧縮・圧縮オブジェクトで計測
+
+    Args:
+        data (bytes): 非圧縮のCSV
+        codecs (list): 計測する圧縮形式
+        runs (int): 計測回数
+        latency (float): API呼び出し1回あたりの遅延（秒）
+        bandwidth (float): 転送速度（バイト/秒）
+        stream (bool): 範囲読み込み（ストリーミング）の経路を使うか
+
+    Returns:
+        dict: 圧縮形式ごとの (転送バイト数, 所要時間の中央値[秒])
+    """
+    from cloud_function_emulator import FakeSlackWebhook
+    from fake_gcs import FakeStorageClient
+    import cloud_function_main as cf
+
+    webhook = FakeSlackWebhook()
+    os.environ.update({
+        'BUCKET_NAME': BUCKET_NAME,
+        'SLACK_WEBHOOK_URL': webhook.start(),
+        'IDEMPOTENCY': '0',
+        'STREAM_THRESHOLD_BYTES': '0' if stream else str(1 << 40)
+    })
+
+    results = {}
+    for codec in codecs:
+        payload = data if codec is None else compress_bytes(data, codec)
+        os.environ['CSV_FILE'] = object_name(codec)
+        elapsed = []
+        for _ in range(runs):
+            # 毎回キャッシュのない状態（コールドに相当）から計測
+            client = FakeStorageClient(latency=latency, bandwidth=bandwidth)
+            client.put_object(BUCKET_NAME, object_name(codec), payload)
+            cf.set_storage_client(client)
+            started = time.perf_counter()
+            result = cf.send_daily_schedule(None)
+            elapsed.append(time.perf_counter() - started)
+            if isinstance(result, tuple):
+                raise RuntimeError(f"送信に失敗しました: {result[0]}")
+        results[codec] = (client.bytes_downloaded, statistics.median(elapsed))
+    webhook.stop()
+    return results
+
+
+def bench_local(data, codecs, runs):
+    """
+    ローカルの read_csv_schedule を非圧縮・圧縮ファイルで計測
+
+    Args:
+        data (bytes): 非圧縮のCSV
+        codecs (list): 計測する圧縮形式
+        runs (int): 計測回数
+
+    Returns:
+        dict: 圧縮形式ごとの (ファイルサイズ, 所要時間の中央値[秒])
+    """
+    from csv_direct_slack import CSVToSlackDirect
+    import contextlib
+    import io
+
+    sender = CSVToSlackDirect('http://127.0.0.1/unused')
+    today = datetime.now().strftime('%Y-%m-%d')
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for codec in codecs:
+            path = os.path.join(directory, object_name(codec))
+            with open(path, 'wb') as f:
+                f.write(data if codec is None else compress_bytes(data, codec))
+            elapsed = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    sender.read_csv_schedule(path, today)
+                elapsed.append(time.perf_counter() - started)
+            results[codec] = (os.path.getsize(path), statistics.median(elapsed))
+    return results
+
+
+def _print_results(title, results, size_label):
+    """比較結果を表示"""
+    baseline_size, baseline_seconds = results[None]
+    print(f"\n📊 {title}")
+    for codec, (size, seconds) in results.items():
+        label = codec or '非圧縮'
+        print(f"   - {label:<6} {size_label}: {size:>12,}B（{size / baseline_size * 100:5.1f}%）"
+              f" / 所要時間: {seconds * 1000:8.1f}ms（{baseline_seconds / seconds:4.1f}倍速）")
+
+
+def main():
+    """メイン実行関数"""
+    parser = argparse.ArgumentParser(description='圧縮スケジュールCSVのベンチマーク')
+    parser.add_argument('--days', type=int, default=365, help='CSVの日数')
+    parser.add_argument('--rows-per-day', type=int, default=300, help='1日あたりの行数')
+    parser.add_argument('--runs', type=int, default=3, help='計測回数')
+    parser.add_argument('--gcs-latency', type=float, default=20.0, help='Cloud Storage API 1回あたりの遅延（ミリ秒）')
+    parser.add_argument('--bandwidth', type=float, default=50.0, help='Cloud Storageからの転送速度（MB/秒）')
+    parser.add_argument('--stream', action='store_true', help='範囲読み込み（ストリーミング）の経路で計測')
+    args = parser.parse_args()
+
+    data = build_csv(args.days, args.rows_per_day)
+    codecs = available_codecs()
+
+    print("=" * 60)
+    print("🗜️  圧縮スケジュールCSV ベンチマーク")
+    print("=" * 60)
+    print(f"📁 CSV: {args.days}日 × {args.rows_per_day}行 = {len(data):,}B")
+    print(f"🐢 Cloud Storage: {args.gcs_latency:.0f}ms/回・{args.bandwidth:.0f}MB/秒"
+          f"（{'ストリーミング' if args.stream else '一括ダウンロード'}）")
+
+    cloud = bench_cloud_function(data, codecs, args.runs, args.gcs_latency / 1000,
+                                 args.bandwidth * 1024 * 1024, args.stream)
+    _print_results('Cloud Function（send_daily_schedule 1回分）', cloud, '転送量')
+
+    local = bench_local(data, codecs, args.runs)
+    _print_results('ローカル（read_csv_schedule）', local, 'ファイル')
+    print("\n💡 圧縮済みオブジェクトは拡張子（.gz/.zst）またはContent-Encodingで自動判定して展開します")
+
+
+if __name__ == "__main__":
+    main()
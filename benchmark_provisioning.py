@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+従業員テンプレート並列作成のベンチマーク
+フェイクのSheets API（呼び出しごとに遅延を設定可能）に対して、
+ワーカー数ごとの作成スループット（件/秒）とAPI呼び出し回数を計測する
+最後にセットアップ全体（マスターシート作成〜configシート登録）を、エラーの注入・書き込み上限ありの
+条件でもフェイクに対して実行し、所要時間・API呼び出し回数・再試行回数を比較する
+
+使い方:
+    python benchmark_provisioning.py --employees 200 --workers 1,4,8,16 --latency 150
+    python benchmark_provisioning.py --error-rate 0.1 --quota-limit 60 --quota-window 1
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from employee_shift_template import (EmployeeShiftTemplateCreator, TemplateModeSelector,  # noqa: E402
+                                     MODE_AUTO, MODE_BUILD, MODE_CLONE)
+from fake_google_api import FakeDriveService, FakeSheetsService  # noqa: E402
+from google_api_client import ApiMetrics, RetryPolicy  # noqa: E402
+from provisioning import ParallelProvisioner, summarize  # noqa: E402
+from setup_shift_automation import ShiftAutomationSetup  # noqa: E402
+from sheets_quota import SheetsQuotaTracker  # noqa: E402
+
+STORES = ('東京', '大阪', '名古屋')
+
+
+def build_employees(count):
+    """
+    ベンチマーク用の従業員リストを作成
+
+    Args:
+        count (int): 人数
+
+    Returns:
+        list: 従業員情報（id, name, store）のリスト
+    """
+    return [{'id': f'EID-{i:05d}', 'name': f'従業員{i:05d}', 'store': STORES[i % len(STORES)]}
+            for i in range(1, count + 1)]
+
+
+def bench_workers(employees, workers, latency, writes_per_minute, mode=MODE_BUILD, drive_latency=None):
+    """
+    指定したワーカー数で全員分のテンプレートを作成して計測
+
+    Args:
+        employees (list): 従業員リスト
+        workers (int): ワーカー数
+        latency (float): API呼び出し1回あたりの遅延（秒）
+        writes_per_minute (int): 書き込み上限（0以下で制限なし）
+        mode (str): テンプレートの作成方法（'build' / 'clone' / 'auto'）
+        drive_latency (float, optional): Drive API（コピー）1回あたりの遅延（秒）
+
+    Returns:
+        dict: summarize() の結果に calls（メソッドごとの呼び出し回数）・quota_wait・selector（作成方法の計測結果）を加えたもの
+    """
+    quota = SheetsQuotaTracker(0, 0, 0, writes_per_minute) if writes_per_minute > 0 else None
+    service = FakeSheetsService(latency=latency, quota=quota)
+    drive = FakeDriveService(service, latency=drive_latency)
+    selector = TemplateModeSelector(mode)
+
+    def factory(verbose=True):
+        return EmployeeShiftTemplateCreator(None, service=service, verbose=verbose,
+                                            drive_service=drive, selector=selector)
+
+    provisioner = ParallelProvisioner(factory, workers=workers, quota=quota, progress_interval=float('inf'))
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = provisioner.provision(employees)
+    summary = summarize(results, time.perf_counter() - started)
+    summary['calls'] = dict(service.calls)
+    summary['quota_wait'] = quota.waited_seconds if quota else 0.0
+    summary['selector'] = selector.summary()
+    return summary
+
+
+def write_roster(path, employees):
+    """
+    ベンチマーク用の従業員名簿（CSV）を書き出す
+
+    Args:
+        path (str): 書き出すファイルのパス
+        employees (list): 従業員情報（id, name, store）のリスト
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['employee_id', 'employee_name', 'store'])
+        writer.writerows([employee['id'], employee['name'], employee['store']] for employee in employees)
+
+
+def bench_end_to_end(employees, workers, latency, error_rate=0.0, quota_limit=None, quota_window=60.0,
+                     client_limit=None, retry_delay=0.05, seed=1):
+    """
+    セットアップ全体（マスターシート・従業員テンプレート・設定ファイル・configシート）をフェイクに対して実行
+
+    Args:
+        employees (list): 従業員リスト
+        workers (int): ワーカー数
+        latency (float): API呼び出し1回あたりの遅延（秒）
+        error_rate (float): 呼び出しが503で失敗する確率
+        quota_limit (int, optional): フェイクの quota_window 秒あたりの書き込み上限（超えると429）
+        quota_window (float): 上限を数える期間（秒）
+        client_limit (int, optional): 呼び出し側（SheetsQuotaTracker）の quota_window 秒あたりの書き込み上限。
+            指定するとすべての呼び出しを上限の集計を通して調整する（フェイクの上限より多いと429で自動調整される）
+        retry_delay (float): 1回目の再試行の待ち時間の上限（秒）
+        seed (int): エラーの発生に使う乱数のシード
+
+    Returns:
+        dict: ok, seconds, per_second, calls（メソッドごとの呼び出し回数）, api_calls, errors（エラー応答の回数）,
+            retries, failed_calls（再試行しても失敗した呼び出し）, registered（configシートの従業員数）,
+            quota_wait, throttled（上限の集計が受けた429の回数）, factor（終了時の書き込み上限の調整の割合）
+    """
+    metrics = ApiMetrics()
+    quota = SheetsQuotaTracker(0, 0, 0, client_limit or 0, window=quota_window)
+    service = FakeSheetsService(latency=latency, error_rate=error_rate, write_quota_per_minute=quota_limit,
+                                quota_window=quota_window, retry_policy=RetryPolicy(base_delay=retry_delay),
+                                metrics=metrics, quota=quota if client_limit else None, seed=seed)
+    drive = FakeDriveService(service)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        roster_file = os.path.join(work_dir, 'roster.csv')
+        write_roster(roster_file, employees)
+        setup = ShiftAutomationSetup(None, workers=workers,
+                                     journal_file=os.path.join(work_dir, 'checkpoint.jsonl'),
+                                     config_file=os.path.join(work_dir, 'config.json'),
+                                     roster_file=roster_file, sheets_service=service, drive_service=drive,
+                                     quota=quota)
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = setup.setup_complete_system(resume=False)
+        elapsed = time.perf_counter() - started
+
+    snapshot = metrics.snapshot()
+    master_id = setup.created_sheets[0]['id'] if setup.created_sheets else None
+    registered = len(service.get_values(master_id, 'config!A2:A')) if master_id else 0
+    return {
+        'ok': ok,
+        'seconds': elapsed,
+        'per_second': len(employees) / elapsed if elapsed > 0 else 0.0,
+        'calls': dict(service.calls),
+        'api_calls': service.call_count,
+        'errors': service.error_count,
+        'retries': sum(stats['retries'] for stats in snapshot.values()),
+        'failed_calls': sum(stats['errors'] for stats in snapshot.values()),
+        'registered': registered,
+        'quota_wait': quota.waited_seconds,
+        'throttled': quota.throttled['write'],
+        'factor': quota.factors['write']
+    }
+
+
+def _format_calls(calls):
+    """メソッドごとの呼び出し回数を表示用に整形"""
+    return ', '.join(f"{name.split('.', 1)[1]}={count}" for name, count in sorted(calls.items()))
+
+
+def main():
+    """メイン実行関数"""
+    parser = argparse.ArgumentParser(description='従業員テンプレート並列作成のベンチマーク')
+    parser.add_argument('--employees', type=int, default=200, help='作成する人数')
+    parser.add_argument('--workers', default='1,4,8,16', help='計測するワーカー数（カンマ区切り）')
+    parser.add_argument('--latency', type=float, default=150.0, help='Sheets API 1回あたりの遅延（ミリ秒）')
+    parser.add_argument('--drive-latency', type=float, default=None,
+                        help='Drive API（原本のコピー）1回あたりの遅延（ミリ秒、既定はSheetsと同じ）')
+    parser.add_argument('--writes-per-minute', type=int, default=0,
+                        help='書き込み上限（回/分、0で制限なし。実際の上限の目安はユーザーあたり60回/分）')
+    parser.add_argument('--error-rate', type=float, default=0.05,
+                        help='セットアップ全体の計測で呼び出しが503で失敗する確率')
+    parser.add_argument('--quota-limit', type=int, default=60,
+                        help='セットアップ全体の計測でのフェイクの書き込み上限（回 / quota-window秒）')
+    parser.add_argument('--quota-window', type=float, default=1.0,
+                        help='書き込み上限を数える期間（秒。1分を縮めて再現する）')
+    args = parser.parse_args()
+
+    employees = build_employees(args.employees)
+    worker_counts = [int(w) for w in args.workers.split(',') if w.strip()]
+
+    print("=" * 60)
+    print("🏭 従業員テンプレート並列作成ベンチマーク")
+    print("=" * 60)
+    print(f"👥 従業員: {len(employees)}名 / 🐢 Sheets API: {args.latency:.0f}ms/回"
+          + (f" / 書き込み上限: {args.writes_per_minute}回/分" if args.writes_per_minute > 0 else ""))
+
+    baseline = None
+    print()
+    for workers in worker_counts:
+        summary = bench_workers(employees, workers, args.latency / 1000, args.writes_per_minute)
+        baseline = baseline or summary['per_second']
+        calls = _format_calls(summary['calls'])
+        print(f"📊 {workers:>3}並列: {summary['seconds']:7.2f}秒 / {summary['per_second']:7.2f}件/秒"
+              f"（{summary['per_second'] / baseline:4.1f}倍） / 失敗{summary['failed']}件 / "
+              f"API呼び出し{summary['api_calls']}回（1件あたり{summary['api_calls'] / len(employees):.1f}回: {calls}）"
+              + (f" / 上限待ち{summary['quota_wait']:.1f}秒" if args.writes_per_minute > 0 else ""))
+
+    # 作成方法の比較（最大のワーカー数で計測）
+    drive_latency = args.drive_latency / 1000 if args.drive_latency is not None else None
+    workers = max(worker_counts)
+    print(f"\n🧬 作成方法の比較（{workers}並列"
+          + (f"・Drive {args.drive_latency:.0f}ms/回" if args.drive_latency is not None else "") + "）")
+    for mode in (MODE_BUILD, MODE_CLONE, MODE_AUTO):
+        summary = bench_workers(employees, workers, args.latency / 1000, args.writes_per_minute,
+                                mode=mode, drive_latency=drive_latency)
+        medians = ' / '.join(f"{name} {seconds * 1000:.0f}ms"
+                             for name, seconds in sorted(summary['selector']['medians'].items()))
+        preferred = summary['selector']['preferred']
+        print(f"📊 {mode:<5}: {summary['seconds']:7.2f}秒 / {summary['per_second']:7.2f}件/秒 / "
+              f"1件あたりの中央値: {medians}" + (f" → {preferred}" if mode == MODE_AUTO and preferred else "")
+              + f" / API呼び出し: {_format_calls(summary['calls'])}")
+
+    # セットアップ全体（エラーの注入・書き込み上限あり）
+    latency = args.latency / 1000
+    print(f"\n🔁 セットアップ全体（{workers}並列・マスターシート作成〜configシート登録）")
+    scenarios = [
+        ('通常', {}),
+        (f'エラー{args.error_rate:.0%}', {'error_rate': args.error_rate}),
+        (f'上限{args.quota_limit}回/{args.quota_window:g}秒・調整なし',
+         {'quota_limit': args.quota_limit, 'quota_window': args.quota_window}),
+        (f'上限{args.quota_limit}回/{args.quota_window:g}秒・同じ上限で調整',
+         {'quota_limit': args.quota_limit, 'quota_window': args.quota_window, 'client_limit': args.quota_limit}),
+        (f'上限{args.quota_limit}回/{args.quota_window:g}秒・2倍の上限で自動調整',
+         {'quota_limit': args.quota_limit, 'quota_window': args.quota_window,
+          'client_limit': args.quota_limit * 2}),
+    ]
+    for name, options in scenarios:
+        summary = bench_end_to_end(employees, workers, latency, **options)
+        status = '✅' if summary['ok'] and summary['registered'] == len(employees) else '❌'
+        print(f"{status} {name}: {summary['seconds']:7.2f}秒 / {summary['per_second']:7.2f}件/秒 / "
+              f"API呼び出し{summary['api_calls']}回（エラー応答{summary['errors']}回・再試行{summary['retries']}回・"
+              f"失敗{summary['failed_calls']}回） / configシート{summary['registered']}名"
+              + (f" / 上限待ち{summary['quota_wait']:.1f}秒・429応答{summary['throttled']}回"
+                 f"（終了時の上限{summary['factor']:.0%}）" if options.get('client_limit') else ""))
+        print(f"   {_format_calls(summary['calls'])}")
+
+    print("\n💡 書き込み上限を指定すると、並列数を増やしても上限（回/分）÷ 1件あたりの呼び出し回数で頭打ちになります")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+シフトリマインダーエンジンのベンチマーク
+10万件のリマインダーでメモリ使用量・差分同期時間・タイマー精度を計測
+"""
+
+import argparse
+import statistics
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import pytz
+from shift_reminders import ShiftReminderEngine
+
+
+class _TimingEngine(ShiftReminderEngine):
+    """送信時に予定時刻からの遅れを記録するエンジン"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deadlines = {}
+        self.lateness = []
+        self.all_done = threading.Event()
+        self._record_lock = threading.Lock()
+
+    def _dispatch(self, key):
+        late = self.clock() - self.deadlines[key]
+        with self._record_lock:
+            self.lateness.append(late)
+            if len(self.lateness) >= len(self.deadlines):
+                self.all_done.set()
+        super()._dispatch(key)
+
+
+def build_rows(count, days=30):
+    """
+    今後days日間に分散した予定を作成
+
+    Args:
+        count (int): 予定の件数
+        days (int): 分散させる日数
+
+    Returns:
+        list: 予定のリスト
+    """
+    tz = pytz.timezone('Asia/Tokyo')
+    base = datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    minutes_per_day = 24 * 60
+    rows = []
+    for i in range(count):
+        start_at = base + timedelta(days=i % days, minutes=(i * 7) % minutes_per_day)
+        rows.append({
+            'name': f'従業員{i:06d}',
+            'date': start_at.strftime('%Y-%m-%d'),
+            'start_time': start_at.strftime('%H:%M'),
+            'task': 'ゲスト返信'
+        })
+    return rows
+
+
+def percentile(values, ratio):
+    """パーセンタイル値を求める"""
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * ratio), len(ordered) - 1)]
+
+
+def benchmark_sync(count):
+    """全件登録と差分同期のメモリ・時間を計測"""
+    engine = ShiftReminderEngine(lambda message: True)
+    rows = build_rows(count)
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    added, _ = engine.sync(rows)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    used = current - baseline
+    print(f"📥 初回同期: {added:,}件 / {elapsed * 1000:.1f}ms")
+    print(f"💾 常駐メモリ: {used / 1024 / 1024:.1f}MiB（1件あたり {used / max(added, 1):.0f}B）"
+          f" / ピーク {(peak - baseline) / 1024 / 1024:.1f}MiB")
+
+    # 1%の予定を変更して差分同期
+    for i in range(0, len(rows), 100):
+        rows[i] = dict(rows[i], task='変更後')
+    started = time.perf_counter()
+    added, removed = engine.sync(rows)
+    elapsed = time.perf_counter() - started
+    print(f"🔄 差分同期（1%変更）: +{added:,} / -{removed:,} / {elapsed * 1000:.1f}ms")
+
+
+def benchmark_accuracy(count, spread_seconds):
+    """通知時刻をspread_seconds秒に分散させて発火の遅れを計測（送信間隔の制限なし）"""
+    engine = _TimingEngine(lambda message: True, min_interval=0)
+    start_at = time.time() + 1.0
+    for i in range(count):
+        key = ('bench', '00:00', f'従業員{i:06d}', 'ベンチマーク')
+        deadline = start_at + spread_seconds * i / count
+        engine.deadlines[key] = deadline
+        engine.add(key, deadline)
+
+    engine.start()
+    engine.all_done.wait(timeout=spread_seconds + 60)
+    engine.stop()
+
+    lateness = engine.lateness
+    if not lateness:
+        print("❌ リマインダーが発火しませんでした")
+        return
+    print(f"🎯 発火精度（{len(lateness):,}件 / {spread_seconds}秒に分散 / 送信スレッド1・間隔制限なし）")
+    print(f"   - 遅れ p50: {percentile(lateness, 0.50) * 1000:.2f}ms")
+    print(f"   - 遅れ p99: {percentile(lateness, 0.99) * 1000:.2f}ms")
+    print(f"   - 遅れ max: {max(lateness) * 1000:.2f}ms")
+    print(f"   - 遅れ 平均: {statistics.mean(lateness) * 1000:.2f}ms")
+
+
+def main():
+    """メイン実行関数"""
+    parser = argparse.ArgumentParser(description='シフトリマインダーエンジンのベンチマーク')
+    parser.add_argument('--count', type=int, default=100000, help='リマインダー件数')
+    parser.add_argument('--spread', type=float, default=10.0, help='発火時刻を分散させる秒数')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"⏱️  シフトリマインダー ベンチマーク（{args.count:,}件）")
+    print("=" * 60)
+
+    benchmark_sync(args.count)
+    benchmark_accuracy(args.count, args.spread)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cloud Functionのローカル実行ハーネス
+cloud_function_main を functions_framework 経由で呼び出し、
+フェイクのCloud Storage・Slack Webhook（いずれも遅延を設定可能）を使って
+コールド／ウォーム呼び出しの段階別所要時間（download, parse, render, post）を計測する
+
+使い方:
+    python cloud_function_emulator.py --runs 3 --warm 5 --gcs-latency 30 --slack-latency 150
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FILE = os.path.join(BASE_DIR, 'cloud_function_main.py')
+DEFAULT_CSV = os.path.join(BASE_DIR, 'schedule test - シート2 (1).csv')
+BUCKET_NAME = 'emulator-bucket'
+CSV_OBJECT = 'schedule.csv'
+
+# 結果表に並べる段階の順序
+STAGE_ORDER = ('load', 'metadata', 'idempotency', 'download', 'parse', 'download_parse',
+               'render', 'post', 'total', 'wall')
+
+
+class FakeSlackWebhook:
+    """遅延とステータスコードを設定できるSlack Webhookの代替サーバー"""
+
+    def __init__(self, latency=0.0, status_code=200):
+        """
+        初期化
+
+        Args:
+            latency (float): 応答までの待ち時間（秒）
+            status_code (int): 返すHTTPステータスコード
+        """
+        self.latency = latency
+        self.status_code = status_code
+        self.posts = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        """
+        サーバーを開始
+
+        Returns:
+            str: Webhook URL
+        """
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length)
+                if webhook.latency > 0:
+                    time.sleep(webhook.latency)
+                with webhook._lock:
+                    webhook.posts.append(json.loads(body or b'{}'))
+                self.send_response(webhook.status_code)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'ok')
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='fake-slack', daemon=True).start()
+        return f'http://127.0.0.1:{self._server.server_address[1]}/webhook'
+
+    def stop(self):
+        """サーバーを停止"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class CloudFunctionEmulator:
+    """functions_framework のアプリをテストクライアントで呼び出すエミュレーター"""
+
+    def __init__(self, storage_client, source=SOURCE_FILE):
+        """
+        初期化
+
+        Args:
+            storage_client: Cloud Storageクライアント（fake_gcs.FakeStorageClient など）
+            source (str): 関数のソースファイル
+        """
+        self.storage_client = storage_client
+        self.source = source
+        self._clients = {}
+
+    def load(self, target):
+        """
+        関数をfunctions_framework経由で読み込む（モジュールの初期化を含む）
+
+        Args:
+            target (str): エントリーポイント名
+
+        Returns:
+            float: 読み込みにかかった秒数
+        """
+        import functions_framework
+
+        started = time.perf_counter()
+        app = functions_framework.create_app(target, self.source, 'http')
+        elapsed = time.perf_counter() - started
+
+        # functions_framework はソースをファイル名のモジュールとして読み込むので、そこへフェイクを差し込む
+        module_name = os.path.splitext(os.path.basename(self.source))[0]
+        sys.modules[module_name].set_storage_client(self.storage_client)
+        self._clients[target] = app.test_client()
+        return elapsed
+
+    def invoke(self, target, body=None):
+        """
+        関数を1回呼び出す
+
+        Args:
+            target (str): エントリーポイント名
+            body (dict, optional): JSON本文
+
+        Returns:
+            tuple: (HTTPステータス, レスポンスJSON, 呼び出し側で計測した秒数)
+        """
+        if target not in self._clients:
+            self.load(target)
+        started = time.perf_counter()
+        response = self._clients[target].post('/?timings=1', json=body or {})
+        elapsed = time.perf_counter() - started
+        return response.status_code, response.get_json(silent=True) or {}, elapsed
+
+
+def run_session(args):
+    """
+    1プロセス分の計測（1回目がコールド、以降がウォーム）
+
+    Args:
+        args (argparse.Namespace): コマンドライン引数
+
+    Returns:
+        dict: 計測結果
+    """
+    # functions_framework は実行環境が先に読み込むため計測対象外
+    import functions_framework  # noqa: F401
+    from fake_gcs import FakeStorageClient
+
+    webhook = FakeSlackWebhook(latency=args.slack_latency / 1000)
+    os.environ.update({
+        'BUCKET_NAME': BUCKET_NAME,
+        'CSV_FILE': CSV_OBJECT,
+        'SLACK_WEBHOOK_URL': webhook.start(),
+        'SCHEDULE_PARSER': args.parser,
+        'IDEMPOTENCY': '1' if args.idempotency else '0'
+    })
+
+    storage_client = FakeStorageClient(latency=args.gcs_latency / 1000)
+    with open(args.csv, 'rb') as f:
+        storage_client.put_object(BUCKET_NAME, CSV_OBJECT, f.read())
+    storage_client.upload_count = 0
+
+    emulator = CloudFunctionEmulator(storage_client)
+    invocations = []
+    load_seconds = emulator.load('send_daily_schedule')
+    for i in range(1 + args.warm):
+        status, body, elapsed = emulator.invoke('send_daily_schedule')
+        timings = dict(body.get('timings', {}), wall=round(elapsed * 1000, 2))
+        if i == 0:
+            timings['load'] = round(load_seconds * 1000, 2)
+        invocations.append({'status': status, 'result': body.get('status'), 'timings': timings})
+
+    test_load = emulator.load('test_function')
+    test_cold = emulator.invoke('test_function')
+    test_warm = emulator.invoke('test_function')
+    webhook.stop()
+
+    return {
+        'invocations': invocations,
+        'test_function': {
+            'cold_ms': round((test_load + test_cold[2]) * 1000, 2),
+            'warm_ms': round(test_warm[2] * 1000, 2),
+            'status': test_warm[0]
+        },
+        'posts': len(webhook.posts),
+        'storage': {
+            'metadata': storage_client.metadata_count,
+            'downloads': storage_client.download_count,
+            'uploads': storage_client.upload_count
+        }
+    }
+
+
+def _median_stages(samples):
+    """段階ごとの中央値を求める"""
+    stages = {}
+    for timings in samples:
+        for name, value in timings.items():
+            stages.setdefault(name, []).append(value)
+    return {name: statistics.median(values) for name, values in stages.items()}
+
+
+def _print_stages(label, stages):
+    """段階別の所要時間を表示"""
+    print(f"\n📊 {label}")
+    for name in STAGE_ORDER:
+        if name in stages:
+            print(f"   - {name:<15} {stages[name]:8.2f}ms")
+
+
+def main():
+    """メイン実行関数"""
+    parser = argparse.ArgumentParser(description='Cloud Functionのローカル実行・段階別計測')
+    parser.add_argument('--csv', default=DEFAULT_CSV, help='スケジュールCSVのパス')
+    parser.add_argument('--runs', type=int, default=3, help='コールドスタートの回数（毎回新しいプロセス）')
+    parser.add_argument('--warm', type=int, default=5, help='1プロセスあたりのウォーム呼び出し回数')
+    parser.add_argument('--gcs-latency', type=float, default=20.0, help='Cloud Storage API 1回あたりの遅延（ミリ秒）')
+    parser.add_argument('--slack-latency', type=float, default=100.0, help='Slack Webhookの応答遅延（ミリ秒）')
+    parser.add_argument('--parser', choices=('lean', 'pandas'), default='lean', help='CSVの解析方法')
+    parser.add_argument('--idempotency', action='store_true', help='冪等性チェックを有効にする（ウォーム呼び出しは再送信せず保存済みの結果を返す）')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_session(args), ensure_ascii=False))
+        return
+
+    print("=" * 60)
+    print("🧪 Cloud Function ローカルエミュレーター")
+    print("=" * 60)
+    print(f"📁 CSV: {args.csv}")
+    print(f"🐢 遅延: Cloud Storage {args.gcs_latency:.0f}ms/回 / Slack {args.slack_latency:.0f}ms")
+    print(f"🔁 コールド{args.runs}回 × ウォーム{args.warm}回（解析: {args.parser}）")
+
+    sessions = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'] + sys.argv[1:],
+                                capture_output=True, text=True, check=True).stdout
+        sessions.append(json.loads(output.strip().splitlines()[-1]))
+
+    cold = [s['invocations'][0]['timings'] for s in sessions]
+    warm = [inv['timings'] for s in sessions for inv in s['invocations'][1:]]
+    _print_stages('コールド呼び出し（中央値）', _median_stages(cold))
+    if warm:
+        _print_stages('ウォーム呼び出し（中央値）', _median_stages(warm))
+
+    test_cold = statistics.median(s['test_function']['cold_ms'] for s in sessions)
+    test_warm = statistics.median(s['test_function']['warm_ms'] for s in sessions)
+    print(f"\n📊 test_function: コールド {test_cold:.2f}ms / ウォーム {test_warm:.2f}ms")
+
+    last = sessions[-1]
+    results = sorted({inv['result'] for s in sessions for inv in s['invocations']} - {None})
+    print(f"\n📦 Cloud Storage（1プロセス）: メタデータ{last['storage']['metadata']}回 / "
+          f"ダウンロード{last['storage']['downloads']}回 / アップロード{last['storage']['uploads']}回")
+    print(f"💬 Slack送信（1プロセス）: {last['posts']}回")
+    print(f"✅ 結果: {', '.join(results)}")
+    print("💡 load はfunctions_frameworkによるモジュール読み込み、wall は呼び出し側で計測した時間です")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,89 +3,978 @@
 """
 Google Cloud Functions 用メイン関数
 CSVファイルからSlackに自動送信
+
+コールドスタートを短くするため、重いライブラリ（pandas, google.cloud.storage,
+requests）は必要になった時点で読み込む。CSVは標準ライブラリで解析する
+（環境変数 SCHEDULE_PARSER=pandas で従来のpandas解析に切り替え可能。どちらも値はすべて文字列、
+空欄は空文字列として扱うため、同じCSVからは同じメッセージになる）。
 """
 
 import functions_framework
-import requests
-import json
-from datetime import datetime
-import pandas as pd
-from google.cloud import storage
-import pytz
+import csv
+from datetime import datetime, timedelta, timezone
 from io import StringIO
 import os
+import time
+from idempotency_store import IdempotencyStore, content_hash
+from stage_timer import StageTimer, stage, count, profiled
+from schedule_codec import detect_codec, decompress_bytes, open_text
+
+# 日本時間（夏時間がないため固定オフセットで十分）
+JST = timezone(timedelta(hours=9), 'JST')
+
+# ウォームインスタンスで使い回すクライアント（初回呼び出し時に作成）
+_storage_client = None
+_http_session = None
+
+# パース済みスケジュールのキャッシュ
+# (バケット名, オブジェクト名) -> ((generation, metageneration), {日付: [予定]})
+_schedule_cache = {}
+
+# ストリーミング読み込み時の日付別キャッシュ
+# (バケット名, オブジェクト名, 日付) -> ((generation, metageneration), [予定])
+_day_cache = {}
+
+# このサイズを超えるオブジェクトは全体を保持せず、範囲読み込みで今日の行だけ抽出する
+DEFAULT_STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024
+# 範囲読み込み1回あたりのサイズ
+DEFAULT_STREAM_CHUNK_BYTES = 1024 * 1024
+# 圧縮済みオブジェクトの展開後サイズの見積もり倍率（しきい値の判定に使う）
+COMPRESSED_SIZE_FACTOR = 10
+
+# 一括送信の同時実行数と1リクエストあたりのジョブ数の上限
+DEFAULT_BATCH_MAX_PARALLEL = 8
+MAX_BATCH_JOBS = 200
+
+# 複数日ダイジェストの上限日数とレイアウト
+MAX_DIGEST_DAYS = 31
+DIGEST_LAYOUTS = ('per_day', 'per_person')
+# Slackの1メッセージあたりの文字数の目安（これを超える場合は分割して送信）
+SLACK_MESSAGE_LIMIT = 3500
+WEEKDAYS = ('月', '火', '水', '木', '金', '土', '日')
+
+
+def _get_storage_client():
+    """Cloud Storageクライアントを取得（インスタンス内で1回だけ作成）"""
+    global _storage_client
+    if _storage_client is None:
+        from google.cloud import storage
+        _storage_client = storage.Client()
+    return _storage_client
+
+
+def set_storage_client(client):
+    """
+    使用するCloud Storageクライアントを差し替える（ローカル実行・検証でフェイクを使う場合など）
+    
+    Args:
+        client: google.cloud.storage.Client 互換のクライアント（fake_gcs.FakeStorageClient など）
+    """
+    global _storage_client
+    _storage_client = client
+    _schedule_cache.clear()
+    _day_cache.clear()
+
+
+def _get_http_session():
+    """Slack送信用のHTTPセッションを取得（接続を使い回す）"""
+    global _http_session
+    if _http_session is None:
+        import requests
+        _http_session = requests.Session()
+    return _http_session
+
+
+def _parse_schedule_lean(csv_content):
+    """
+    CSVを標準ライブラリで解析して日付ごとの予定にまとめる
+    
+    Args:
+        csv_content (str): CSVの内容
+    
+    Returns:
+        dict: 日付（YYYY-MM-DD）をキーとした予定（行の辞書）のリスト
+    """
+    schedule_by_date = {}
+    # 列が足りない行の値はpandasパスと同じく空文字列にする
+    for row in csv.DictReader(StringIO(csv_content.lstrip('\ufeff')), restval=''):
+        schedule_by_date.setdefault(row['日付'], []).append(row)
+    return schedule_by_date
+
+
+def _parse_schedule_pandas(csv_content):
+    """
+    CSVをpandasで解析して日付ごとの予定にまとめる（従来の解析方法）
+    
+    軽量パスと同じ結果になるよう、値は数値に変換せず文字列のまま、空欄は NaN ではなく空文字列にする
+    
+    Args:
+        csv_content (str): CSVの内容
+    
+    Returns:
+        dict: 日付（YYYY-MM-DD）をキーとした予定（行の辞書）のリスト
+    """
+    import pandas as pd
+    df = pd.read_csv(StringIO(csv_content.lstrip('\ufeff')), dtype=str, keep_default_na=False).fillna('')
+    schedule_by_date = {}
+    for row in df.to_dict('records'):
+        schedule_by_date.setdefault(str(row['日付']), []).append(row)
+    return schedule_by_date
+
+
+def _parse_schedule(csv_content):
+    """
+    CSVを解析して日付ごとの予定にまとめる（SCHEDULE_PARSERで解析方法を選択）
+    
+    Args:
+        csv_content (str): CSVの内容
+    
+    Returns:
+        dict: 日付（YYYY-MM-DD）をキーとした予定（行の辞書）のリスト
+    """
+    if os.environ.get('SCHEDULE_PARSER', 'lean') == 'pandas':
+        schedule_by_date = _parse_schedule_pandas(csv_content)
+    else:
+        schedule_by_date = _parse_schedule_lean(csv_content)
+    count('rows_scanned', sum(len(rows) for rows in schedule_by_date.values()))
+    return schedule_by_date
+
+
+def _blob_codec(blob):
+    """オブジェクトの圧縮形式（拡張子またはContent-Encodingで判定。非圧縮はNone）"""
+    return detect_codec(blob.name, blob.content_encoding)
+
+
+def _download_text(blob):
+    """
+    オブジェクト全体をダウンロードして文字列にする（gzip / zstd は展開）
+    
+    Args:
+        blob: メタデータ取得済みのBlob
+    
+    Returns:
+        str: CSVの内容
+    """
+    codec = _blob_codec(blob)
+    # 確認したgenerationと同じ内容を取得（圧縮済みのものは自動展開させずにそのまま受け取る）
+    data = blob.download_as_bytes(raw_download=codec is not None, if_generation_match=blob.generation)
+    return decompress_bytes(data, codec).decode('utf-8-sig')
+
+
+def _open_blob_text_stream(blob, chunk_size):
+    """
+    オブジェクトを範囲読み込みのテキストストリームとして開く（gzip / zstd は展開しながら読む）
+    
+    Args:
+        blob: メタデータ取得済みのBlob
+        chunk_size (int): 1回の範囲読み込みサイズ
+    
+    Returns:
+        io.TextIOWrapper: 1行ずつ読めるストリーム
+    """
+    codec = _blob_codec(blob)
+    stream = blob.open('rb', chunk_size=chunk_size, raw_download=codec is not None,
+                       if_generation_match=blob.generation)
+    return open_text(stream, codec)
+
+
+def _stream_rows_for_dates(blob, target_dates, sorted_by_date=False,
+                           chunk_size=DEFAULT_STREAM_CHUNK_BYTES):
+    """
+    オブジェクトを先頭から読みながら対象日の行だけを抽出
+    
+    保持するのは対象日の行と読み込み中のチャンクだけなので、
+    メモリ使用量は対象日分のデータ量程度に収まる
+    
+    Args:
+        blob: メタデータ取得済みのBlob
+        target_dates (iterable): 対象日付（YYYY-MM-DD形式）
+        sorted_by_date (bool): 日付順に並んでいる場合True（最後の対象日を過ぎたら読み込みを打ち切る）
+        chunk_size (int): 1回の範囲読み込みサイズ
+    
+    Returns:
+        dict: 対象日付をキーとした予定（行の辞書）のリスト
+    """
+    rows_by_date = {date: [] for date in target_dates}
+    last_date = max(rows_by_date) if rows_by_date else ''
+    scanned = 0
+    with _open_blob_text_stream(blob, chunk_size) as text:
+        for row in csv.DictReader(text):
+            scanned += 1
+            date = row['日付']
+            if date in rows_by_date:
+                rows_by_date[date].append(row)
+            elif sorted_by_date and date > last_date:
+                break
+    count('rows_scanned', scanned)
+    return rows_by_date
+
+
+def _get_blob(bucket_name, csv_file):
+    """メタデータのみ取得（オブジェクトがない場合はFileNotFoundError）"""
+    bucket = _get_storage_client().bucket(bucket_name)
+    blob = bucket.get_blob(csv_file)
+    if blob is None:
+        raise FileNotFoundError(f"gs://{bucket_name}/{csv_file} が見つかりません")
+    return blob
+
+
+def _load_schedule_by_date(bucket_name, csv_file):
+    """
+    Cloud Storageのスケジュールを日付ごとに取得
+    
+    オブジェクトのgeneration/metagenerationが前回と同じなら、
+    メタデータの確認だけでキャッシュを返す（ダウンロードしない）
+    
+    Args:
+        bucket_name (str): バケット名
+        csv_file (str): オブジェクト名
+    
+    Returns:
+        dict: 日付をキーとした予定のリスト
+    """
+    blob = _get_blob(bucket_name, csv_file)
+    return _load_full_schedule(bucket_name, csv_file, blob)
+
+
+def _load_full_schedule(bucket_name, csv_file, blob):
+    """オブジェクト全体を解析して日付ごとにキャッシュ"""
+    version = (blob.generation, blob.metageneration)
+    cached = _schedule_cache.get((bucket_name, csv_file))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    
+    with stage('download'):
+        csv_content = _download_text(blob)
+    with stage('parse'):
+        schedule_by_date = _parse_schedule(csv_content)
+    _schedule_cache[(bucket_name, csv_file)] = (version, schedule_by_date)
+    return schedule_by_date
+
+
+def _load_dates_schedule(bucket_name, csv_file, target_dates, blob=None):
+    """
+    複数の対象日の予定を1回の読み込みで取得
+    
+    STREAM_THRESHOLD_BYTES以下のオブジェクトは全体を解析してキャッシュし、
+    それより大きいオブジェクトは範囲読み込みで対象日の行だけを抽出する
+    （SCHEDULE_SORTED_BY_DATE=1 なら最後の対象日を過ぎた時点で打ち切る）
+    
+    Args:
+        bucket_name (str): バケット名
+        csv_file (str): オブジェクト名
+        target_dates (iterable): 対象日付（YYYY-MM-DD形式）
+        blob (optional): 取得済みのメタデータ（省略時は取得する）
+    
+    Returns:
+        dict: 対象日付をキーとした予定（行の辞書）のリスト
+    """
+    target_dates = set(target_dates)
+    if blob is None:
+        blob = _get_blob(bucket_name, csv_file)
+    threshold = int(os.environ.get('STREAM_THRESHOLD_BYTES', DEFAULT_STREAM_THRESHOLD_BYTES))
+    # 保持するのは展開後のデータなので、圧縮済みのものは展開後のサイズで判定する
+    expanded_size = blob.size * COMPRESSED_SIZE_FACTOR if blob.size and _blob_codec(blob) else blob.size
+    if expanded_size is None or expanded_size <= threshold:
+        schedule_by_date = _load_full_schedule(bucket_name, csv_file, blob)
+        return {date: schedule_by_date.get(date, []) for date in target_dates}
+    
+    version = (blob.generation, blob.metageneration)
+    rows_by_date = {}
+    for date in target_dates:
+        cached = _day_cache.get((bucket_name, csv_file, date))
+        if cached is not None and cached[0] == version:
+            rows_by_date[date] = cached[1]
+    
+    missing = target_dates - set(rows_by_date)
+    if missing:
+        # 範囲読み込みと解析は交互に進むため、まとめて1つの段階として計測する
+        with stage('download_parse'):
+            rows_by_date.update(_stream_rows_for_dates(
+                blob,
+                missing,
+                sorted_by_date=os.environ.get('SCHEDULE_SORTED_BY_DATE') == '1',
+                chunk_size=int(os.environ.get('STREAM_CHUNK_BYTES', DEFAULT_STREAM_CHUNK_BYTES))
+            ))
+    
+    # このオブジェクトについては今回の対象日・現在のgenerationの結果だけを保持する
+    for cache_key in list(_day_cache):
+        if cache_key[:2] == (bucket_name, csv_file):
+            _day_cache.pop(cache_key, None)
+    for date, rows in rows_by_date.items():
+        _day_cache[(bucket_name, csv_file, date)] = (version, rows)
+    return rows_by_date
+
+
+def _load_day_schedule(bucket_name, csv_file, target_date, blob=None):
+    """
+    対象日の予定を取得
+    
+    Args:
+        bucket_name (str): バケット名
+        csv_file (str): オブジェクト名
+        target_date (str): 対象日付（YYYY-MM-DD形式）
+        blob (optional): 取得済みのメタデータ（省略時は取得する）
+    
+    Returns:
+        list: 対象日の予定（行の辞書）のリスト
+    """
+    return _load_dates_schedule(bucket_name, csv_file, [target_date], blob)[target_date]
+
+
+def _partition_key(target_date):
+    """対象日を含むパーティションのキー（PARTITION_GRANULARITY=month なら YYYY-MM、それ以外は YYYY-MM-DD）"""
+    if os.environ.get('PARTITION_GRANULARITY', 'day') == 'month':
+        return target_date[:7]
+    return target_date
+
+
+def _find_partition_blob(bucket_name, prefix, target_date):
+    """
+    対象日のパーティションのメタデータを取得
+    
+    publish_schedule_partitions.py が公開したレイアウト
+    （PREFIX/YYYY-MM-DD.csv、PARTITION_GRANULARITY=month なら PREFIX/YYYY-MM.csv）を参照する。
+    manifest.json は公開処理の差分計算・排他のためのもので、ここでは読まない
+    （パーティションのオブジェクトを直接取得する方が1回の呼び出しで済むため）。
+    
+    Args:
+        bucket_name (str): バケット名
+        prefix (str): パーティションのプレフィックス
+        target_date (str): 対象日付（YYYY-MM-DD形式）
+    
+    Returns:
+        tuple: (オブジェクト名, Blob)。予定のない日はパーティションが作られないためBlobはNone
+    """
+    object_name = f"{prefix.strip('/')}/{_partition_key(target_date)}.csv"
+    return object_name, _get_storage_client().bucket(bucket_name).get_blob(object_name)
+
+
+def _load_partition_day(bucket_name, prefix, target_date, found=None, oldest_date=None):
+    """
+    日付別に分割されたオブジェクトから対象日の予定を取得
+    
+    Args:
+        bucket_name (str): バケット名
+        prefix (str): パーティションのプレフィックス
+        target_date (str): 対象日付（YYYY-MM-DD形式）
+        found (tuple, optional): _find_partition_blob の結果（省略時は取得する）
+        oldest_date (str, optional): 同じリクエストで読む最も古い日付（これより前のパーティションをキャッシュから外す。省略時は対象日）
+    
+    Returns:
+        list: 対象日の予定（行の辞書）のリスト
+    """
+    object_name, blob = found or _find_partition_blob(bucket_name, prefix, target_date)
+    if blob is None:
+        print(f"📝 gs://{bucket_name}/{object_name} がないため予定なしとして扱います")
+        return []
+    
+    # 読む範囲より前のパーティションはもう読まないのでキャッシュから外す
+    # （同じリクエスト・他の日付のリクエストで使う対象日以降のパーティションは残す）
+    partition_dir = prefix.strip('/') + '/'
+    oldest_key = _partition_key(oldest_date or target_date)
+    for cache_key in list(_schedule_cache):
+        if cache_key[0] == bucket_name and cache_key[1].startswith(partition_dir) \
+                and cache_key[1][len(partition_dir):].split('.', 1)[0] < oldest_key:
+            _schedule_cache.pop(cache_key, None)
+    return _load_full_schedule(bucket_name, object_name, blob).get(target_date, [])
+
+
+def _get_idempotency_store(bucket_name):
+    """
+    送信の重複を防ぐ冪等性ストアを取得（環境変数 IDEMPOTENCY=0 で無効）
+    
+    Args:
+        bucket_name (str): 状態オブジェクトを置くバケット名
+    
+    Returns:
+        IdempotencyStore: ストア（無効の場合None）
+    """
+    if os.environ.get('IDEMPOTENCY', '1') == '0':
+        return None
+    return IdempotencyStore(
+        _get_storage_client().bucket(bucket_name),
+        prefix=os.environ.get('IDEMPOTENCY_PREFIX', 'idempotency'),
+        lease_seconds=int(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', 300))
+    )
+
+
+def _format_message(today, rows):
+    """
+    今日の予定をSlackメッセージにフォーマット
+    
+    Args:
+        today (str): 対象日付
+        rows (list): 今日の予定
+    
+    Returns:
+        str: メッセージ
+    """
+    if len(rows) == 0:
+        return f"📝 {today}の予定はありません。"
+    
+    message = f"🌅 おはようございます！\n📅 {today}の予定 📅\n\n"
+    
+    # 予定を時間順にソート
+    for row in sorted(rows, key=lambda row: row['開始時間']):
+        message += f"🕐 *{row['開始時間']}-{row['終了時間']}*: {row['名前']}: {row['タスク内容']}\n"
+    
+    message += "\n💪 今日も一日頑張りましょう！"
+    return message
+
+def _shift_minutes(row):
+    """予定の所要時間（分）を求める（日付をまたぐ場合は翌日の終了として扱う。解析できない場合None）"""
+    try:
+        start_hour, start_minute = (int(part) for part in str(row['開始時間']).split(':')[:2])
+        end_hour, end_minute = (int(part) for part in str(row['終了時間']).split(':')[:2])
+    except (KeyError, ValueError):
+        return None
+    minutes = (end_hour * 60 + end_minute) - (start_hour * 60 + start_minute)
+    return minutes + 24 * 60 if minutes < 0 else minutes
+
+
+def _format_digest(dates, rows_by_date, layouts):
+    """
+    複数日の予定をダイジェスト形式にフォーマット
+    
+    予定を1回走査するだけで日別セクションと担当者別の集計を同時に作成する
+    
+    Args:
+        dates (list): 対象日付（昇順）
+        rows_by_date (dict): 日付をキーとした予定のリスト
+        layouts (tuple): 'per_day'・'per_person' のうち出力するもの
+    
+    Returns:
+        str: メッセージ
+    """
+    sections = []
+    per_person = {}
+    total = 0
+    for date in dates:
+        rows = sorted(rows_by_date.get(date, []), key=lambda row: row['開始時間'])
+        total += len(rows)
+        weekday = WEEKDAYS[datetime.strptime(date, '%Y-%m-%d').weekday()]
+        lines = [f"📅 *{date}（{weekday}）* {len(rows)}件"]
+        for row in rows:
+            lines.append(f"🕐 *{row['開始時間']}-{row['終了時間']}*: {row['名前']}: {row['タスク内容']}")
+            person = per_person.setdefault(row['名前'], [0, 0, set()])
+            person[0] += 1
+            person[1] += _shift_minutes(row) or 0
+            person[2].add(date)
+        if not rows:
+            lines.append("（予定なし）")
+        sections.append("\n".join(lines))
+    
+    period = dates[0] if len(dates) == 1 else f"{dates[0]}〜{dates[-1]}"
+    if total == 0:
+        return f"📝 {period}の予定はありません。"
+    
+    message = f"🗓️ {period}の予定（{len(dates)}日間・{total}件）\n\n"
+    if 'per_day' in layouts:
+        message += "\n\n".join(sections) + "\n\n"
+    if 'per_person' in layouts:
+        message += "👥 *担当者別の集計*\n"
+        ranking = sorted(per_person.items(), key=lambda item: (-item[1][1], -item[1][0], item[0]))
+        for name, (count, minutes, days) in ranking:
+            message += f"• {name}: {count}件 / {minutes / 60:.1f}時間 / {len(days)}日\n"
+        message += "\n"
+    message += "💪 よろしくお願いします！"
+    return message
+
+
+def _split_message(message, limit=SLACK_MESSAGE_LIMIT):
+    """
+    長いメッセージを分割（日別セクションの区切り→行→文字の順に切れ目を探す）
+    
+    Args:
+        message (str): メッセージ
+        limit (int): 1メッセージあたりの最大文字数
+    
+    Returns:
+        list: 分割したメッセージ（limit以下なら1件）
+    """
+    if len(message) <= limit:
+        return [message]
+    
+    def pack(pieces, separator):
+        chunks = []
+        current = ''
+        for piece in pieces:
+            if len(piece) > limit:
+                if current:
+                    chunks.append(current)
+                    current = ''
+                # セクションが長すぎる場合は行単位、1行が長すぎる場合は文字数で切る
+                if separator == '\n\n':
+                    chunks.extend(pack(piece.split('\n'), '\n'))
+                else:
+                    chunks.extend(piece[i:i + limit] for i in range(0, len(piece), limit))
+                continue
+            candidate = f"{current}{separator}{piece}" if current else piece
+            if len(candidate) > limit:
+                chunks.append(current)
+                current = piece
+            else:
+                current = candidate
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    return [chunk for chunk in pack(message.split('\n\n'), '\n\n') if chunk.strip()]
+
+
+def _post_message(webhook_url, channel, message):
+    """
+    Slack Webhookにメッセージを送信
+    
+    Args:
+        webhook_url (str): Slack Webhook URL
+        channel (str): 送信先チャンネル
+        message (str): メッセージ
+    
+    Returns:
+        requests.Response: Webhookのレスポンス
+    """
+    payload = {
+        "text": message,
+        "channel": channel
+    }
+    return _get_http_session().post(webhook_url, json=payload)
+
+def _flag_requested(request, name, env_name):
+    """クエリパラメータ（?name=1）または環境変数（env_name=1）でフラグが指定されているか"""
+    if os.environ.get(env_name) == '1':
+        return True
+    args = getattr(request, 'args', None)
+    return args is not None and args.get(name) == '1'
+
+
+def _parse_digest_params(request, today):
+    """
+    ダイジェスト用のクエリパラメータを解析
+    
+    パラメータ:
+        start: 開始日（YYYY-MM-DD / today / tomorrow、省略時は今日）
+        end: 終了日（YYYY-MM-DD、days と同時には指定しない）
+        days: 日数（1〜MAX_DIGEST_DAYS）
+        layout: per_day（日別セクション）・per_person（担当者別の集計）をカンマ区切りで指定
+    
+    Args:
+        request: HTTPリクエスト（Noneの場合はダイジェストなし）
+        today (str): 今日の日付（YYYY-MM-DD形式）
+    
+    Returns:
+        tuple: (対象日付のリスト, レイアウトのタプル)。ダイジェスト用のパラメータがない場合None
+    
+    Raises:
+        ValueError: パラメータが正しくない場合
+    """
+    args = getattr(request, 'args', None)
+    if args is None or not any(args.get(name) for name in ('start', 'end', 'days', 'layout')):
+        return None
+    
+    today_date = datetime.strptime(today, '%Y-%m-%d').date()
+    start_param = args.get('start') or 'today'
+    if start_param == 'today':
+        start = today_date
+    elif start_param == 'tomorrow':
+        start = today_date + timedelta(days=1)
+    else:
+        try:
+            start = datetime.strptime(start_param, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f'start はYYYY-MM-DD・today・tomorrowのいずれかで指定してください: {start_param}')
+    
+    if args.get('end') and args.get('days'):
+        raise ValueError('end と days は同時に指定できません')
+    if args.get('end'):
+        try:
+            end = datetime.strptime(args.get('end'), '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError(f"end はYYYY-MM-DD形式で指定してください: {args.get('end')}")
+        days = (end - start).days + 1
+    else:
+        try:
+            days = int(args.get('days') or 1)
+        except ValueError:
+            raise ValueError(f"days は整数で指定してください: {args.get('days')}")
+    if not 1 <= days <= MAX_DIGEST_DAYS:
+        raise ValueError(f'対象期間は1〜{MAX_DIGEST_DAYS}日で指定してください')
+    
+    layouts = tuple(name.strip() for name in (args.get('layout') or 'per_day').split(',') if name.strip())
+    unknown = [name for name in layouts if name not in DIGEST_LAYOUTS]
+    if unknown or not layouts:
+        raise ValueError(f"layout は {', '.join(DIGEST_LAYOUTS)} から指定してください: {', '.join(unknown)}")
+    
+    dates = [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(days)]
+    return dates, layouts
+
 
 @functions_framework.http
 def send_daily_schedule(request):
-    """Cloud Function: 毎日の予定をSlackに送信"""
+    """
+    Cloud Function: 毎日の予定をSlackに送信
+    
+    ?timings=1（または REPORT_TIMINGS=1）で段階別の所要時間と行数を、
+    ?profile=1（または PROFILE=1）で1回分のcProfileの結果をレスポンスに含める
+    （プロファイルは PROFILE_DIR、既定では一時ディレクトリにも保存する）
+    """
+    report_timings = _flag_requested(request, 'timings', 'REPORT_TIMINGS')
+    profile_enabled = _flag_requested(request, 'profile', 'PROFILE')
+    profile_path = None
+    if profile_enabled:
+        import tempfile
+        profile_dir = os.environ.get('PROFILE_DIR') or tempfile.gettempdir()
+        profile_path = os.path.join(profile_dir, f"send_daily_schedule-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+    
+    with profiled(profile_enabled, profile_path) as profile:
+        with StageTimer() as timer:
+            result = _send_daily_schedule(request)
+    if not report_timings and not profile_enabled:
+        return result
+    
+    body, status = result if isinstance(result, tuple) else (result, None)
+    body = dict(body)
+    if report_timings:
+        # 段階別の所要時間（metadata / idempotency / download / parse / render / post）と行数
+        body["timings"] = timer.as_dict()
+        body["counts"] = dict(timer.counts)
+    if profile_enabled:
+        body["profile"] = {"path": profile.path, "top": profile.summary}
+    return body if status is None else (body, status)
+
+
+def _send_daily_schedule(request):
+    """send_daily_schedule の本体"""
     
     # 環境変数から設定を取得
     BUCKET_NAME = os.environ.get('BUCKET_NAME', 'your-bucket-name')
     CSV_FILE = os.environ.get('CSV_FILE', 'schedule.csv')
     SLACK_WEBHOOK_URL = os.environ.get('SLACK_WEBHOOK_URL')
     SLACK_CHANNEL = os.environ.get('SLACK_CHANNEL', '#リモートチーム勤怠報告')
+    PARTITION_PREFIX = os.environ.get('PARTITION_PREFIX')
     
     if not SLACK_WEBHOOK_URL:
         return {"error": "SLACK_WEBHOOK_URL not configured"}, 500
     
+    # 今日の日付を取得（日本時間）
+    today = datetime.now(JST).strftime('%Y-%m-%d')
+    
+    # ?start=...&days=...&layout=... が指定された場合は複数日のダイジェストを送る
     try:
-        # Cloud StorageからCSVファイルを取得
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(BUCKET_NAME)
-        blob = bucket.blob(CSV_FILE)
-        csv_content = blob.download_as_text()
-        
-        # CSVを解析
-        df = pd.read_csv(StringIO(csv_content))
-        
-        # 今日の日付を取得（日本時間）
-        jst = pytz.timezone('Asia/Tokyo')
-        today = datetime.now(jst).strftime('%Y-%m-%d')
+        digest = _parse_digest_params(request, today)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}, 400
+    dates, layouts = digest if digest else ([today], ())
+    
+    store = None
+    claim = None
+    posted = 0
+    try:
+        # 読み込み元のメタデータだけを先に取得（内容のハッシュを冪等性キーに使う）
+        with stage('metadata'):
+            if PARTITION_PREFIX:
+                # 日付別に公開されている場合は対象日の分だけを読む（月単位なら同じオブジェクトは1回だけ）
+                found_by_object = {}
+                found_by_date = {}
+                for date in dates:
+                    key = _partition_key(date)
+                    if key not in found_by_object:
+                        found_by_object[key] = _find_partition_blob(BUCKET_NAME, PARTITION_PREFIX, date)
+                    found_by_date[date] = found_by_object[key]
+                sources = list(found_by_object.values())
+            else:
+                sources = [(CSV_FILE, _get_blob(BUCKET_NAME, CSV_FILE))]
+        source_label = ', '.join(f"gs://{BUCKET_NAME}/{name}" for name, _blob in sources)
+        content_digest = ','.join(content_hash(blob) for _name, blob in sources)
+        if digest:
+            content_digest = f"{content_digest}|{dates[0]}..{dates[-1]}|{','.join(layouts)}"
         
-        # 今日の予定を抽出
-        today_data = df[df['日付'] == today]
+        # リトライ時は保存済みの結果を返し、ダウンロードも再送信もしない
+        store = _get_idempotency_store(BUCKET_NAME)
+        if store is not None:
+            with stage('idempotency'):
+                claim = store.claim(dates[0], SLACK_CHANNEL, content_digest, {"source": source_label})
+            if claim.status == 'done':
+                print(f"♻️ 送信済みのため保存済みの結果を返します: {claim.key}")
+                return dict(claim.record.get('result') or {}, idempotent_replay=True)
+            if claim.status == 'in_progress':
+                return {
+                    "status": "in_progress",
+                    "message": f"Schedule for {dates[0]} is being sent by another invocation"
+                }, 409
         
-        if len(today_data) == 0:
-            message = f"📝 {today}の予定はありません。"
+        # Cloud Storageから対象日の予定を取得（変更がなければキャッシュを利用）
+        if PARTITION_PREFIX:
+            rows_by_date = {date: _load_partition_day(BUCKET_NAME, PARTITION_PREFIX, date, found_by_date[date],
+                                                      oldest_date=dates[0])
+                            for date in dates}
         else:
-            # メッセージをフォーマット
-            message = f"🌅 おはようございます！\n📅 {today}の予定 📅\n\n"
-            
-            # 予定を時間順にソート
-            sorted_data = today_data.sort_values('開始時間')
-            
-            for _, row in sorted_data.iterrows():
-                message += f"🕐 *{row['開始時間']}-{row['終了時間']}*: {row['名前']}: {row['タスク内容']}\n"
-            
-            message += "\n💪 今日も一日頑張りましょう！"
+            rows_by_date = _load_dates_schedule(BUCKET_NAME, CSV_FILE, dates, sources[0][1])
+        schedule_count = sum(len(rows_by_date.get(date, [])) for date in dates)
+        count('rows_matched', schedule_count)
         
-        # Slackに送信
-        payload = {
-            "text": message,
-            "channel": SLACK_CHANNEL
-        }
+        # メッセージをフォーマット（長い場合は分割）
+        with stage('render'):
+            if digest:
+                message = _format_digest(dates, rows_by_date, layouts)
+            else:
+                message = _format_message(today, rows_by_date[today])
+            messages = _split_message(message)
         
-        response = requests.post(SLACK_WEBHOOK_URL, json=payload)
+        # Slackに順番に送信（失敗したらそこで止める）
+        # 前回の実行が途中まで送信していた場合は続きから送り、1件送るたびに送信済みの件数を記録する
+        sent = min(claim.record.get('parts_sent', 0), len(messages)) if claim is not None else 0
+        if sent:
+            print(f"♻️ 前回の実行で{sent}/{len(messages)}件送信済みのため続きから送信します: {claim.key}")
+        response = None
+        with stage('post'):
+            for part in messages[sent:]:
+                response = _post_message(SLACK_WEBHOOK_URL, SLACK_CHANNEL, part)
+                if response.status_code != 200:
+                    break
+                sent += 1
+                posted += 1
+                if claim is not None and not store.record_progress(claim, sent):
+                    # 他の実行に引き継がれた場合は二重送信を避けるため止める
+                    return {
+                        "status": "in_progress",
+                        "message": f"Schedule for {dates[0]} was taken over by another invocation",
+                        "messages_sent": sent
+                    }, 409
         
-        if response.status_code == 200:
-            return {
-                "status": "success",
-                "message": f"Sent schedule for {today}",
-                "schedule_count": len(today_data)
-            }
+        if response is None or response.status_code == 200:
+            if digest:
+                result = {
+                    "status": "success",
+                    "message": f"Sent digest for {dates[0]} to {dates[-1]}",
+                    "schedule_count": schedule_count,
+                    "days": len(dates),
+                    "layout": list(layouts),
+                    "messages": len(messages)
+                }
+            else:
+                result = {
+                    "status": "success",
+                    "message": f"Sent schedule for {today}",
+                    "schedule_count": schedule_count
+                }
+                if len(messages) > 1:
+                    result["messages"] = len(messages)
+            if claim is not None:
+                # 送信は済んでいるため、記録に失敗しても成功として返す（送信済みの件数は記録済み）
+                try:
+                    with stage('idempotency'):
+                        store.complete(claim, result)
+                except Exception as store_error:
+                    print(f"⚠️ 送信結果を記録できませんでした: {store_error}")
+            return result
         else:
-            return {
+            # 1件でも送信した場合は失敗にせず、送信済みの件数を残したままリースの期限後に続きから送る
+            if claim is not None and not posted:
+                with stage('idempotency'):
+                    store.fail(claim, f"Slack API error: {response.status_code}")
+            error = {
                 "status": "error",
                 "message": f"Slack API error: {response.status_code}",
                 "response": response.text
-            }, 500
+            }
+            if len(messages) > 1:
+                error["messages_sent"] = sent
+            return error, 500
         
     except Exception as e:
+        # Slackへ送信した後の失敗（送信状態の記録など）は失敗にしない（リトライで再送信させない）
+        if claim is not None and not posted and claim.status == 'claimed' and claim.record.get('status') == 'pending':
+            try:
+                store.fail(claim, str(e))
+            except Exception as store_error:
+                print(f"⚠️ 送信状態を更新できませんでした: {store_error}")
         return {
             "status": "error",
             "message": str(e)
         }, 500
 
+def _parse_batch_jobs(request, default_source, default_channel, today):
+    """
+    一括送信リクエストのジョブ一覧を検証・正規化
+    
+    Args:
+        request: HTTPリクエスト（JSON本文に "jobs" の配列）
+        default_source (tuple): csv_file / partition_prefix 未指定時の読み込み元
+        default_channel (str): channel 未指定時の送信先
+        today (str): date 未指定時の対象日付
+    
+    Returns:
+        list: (読み込み元, チャンネル, 日付) のリスト
+    
+    Raises:
+        ValueError: リクエストの形式が正しくない場合
+    """
+    body = request.get_json(silent=True) if request is not None else None
+    jobs = body.get('jobs') if isinstance(body, dict) else None
+    if not isinstance(jobs, list) or not jobs:
+        raise ValueError('"jobs" に1件以上のジョブを指定してください')
+    if len(jobs) > MAX_BATCH_JOBS:
+        raise ValueError(f'ジョブは1リクエストあたり{MAX_BATCH_JOBS}件までです')
+    
+    parsed = []
+    for index, job in enumerate(jobs):
+        if not isinstance(job, dict):
+            raise ValueError(f'jobs[{index}] はオブジェクトで指定してください')
+        if job.get('partition_prefix'):
+            source = ('partition', str(job['partition_prefix']))
+        elif job.get('csv_file'):
+            source = ('csv', str(job['csv_file']))
+        else:
+            source = default_source
+        date = str(job.get('date') or today)
+        try:
+            datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f'jobs[{index}].date はYYYY-MM-DD形式で指定してください: {date}')
+        parsed.append((source, str(job.get('channel') or default_channel), date))
+    return parsed
+
+
+def _load_batch_sources(bucket_name, jobs, executor):
+    """
+    ジョブが参照するオブジェクトを重複なく並行して読み込む
+    
+    同じCSVを参照するジョブは対象日をまとめて1回だけ読み込み、
+    日付別パーティションは (プレフィックス, 日付) ごとに1回だけ読み込む。
+    
+    Args:
+        bucket_name (str): バケット名
+        jobs (list): (読み込み元, チャンネル, 日付) のリスト
+        executor (ThreadPoolExecutor): 読み込みに使うスレッドプール
+    
+    Returns:
+        dict: (読み込み元, 日付) をキーとした (予定のリスト or 例外, 読み込み時間[秒])
+    """
+    dates_by_source = {}
+    for source, _channel, date in jobs:
+        dates_by_source.setdefault(source, set()).add(date)
+    
+    def load(source, dates):
+        started = time.perf_counter()
+        try:
+            if source[0] == 'partition':
+                rows_by_date = {date: _load_partition_day(bucket_name, source[1], date, oldest_date=min(dates))
+                                for date in dates}
+            else:
+                rows_by_date = _load_dates_schedule(bucket_name, source[1], dates)
+            result = {date: rows_by_date[date] for date in dates}
+        except Exception as e:
+            result = {date: e for date in dates}
+        elapsed = time.perf_counter() - started
+        return {(source, date): (rows, elapsed) for date, rows in result.items()}
+    
+    loaded = {}
+    futures = [executor.submit(load, source, dates) for source, dates in dates_by_source.items()]
+    for future in futures:
+        loaded.update(future.result())
+    return loaded
+
+
+@functions_framework.http
+def send_batch_schedules(request):
+    """
+    Cloud Function: 複数チーム・チャンネルの予定を1回の呼び出しでまとめて送信
+    
+    リクエスト本文の例:
+        {"jobs": [{"csv_file": "team-a.csv", "channel": "#team-a"},
+                  {"csv_file": "team-b.csv", "channel": "#team-b", "date": "2025-07-01"}],
+         "max_parallel": 8}
+    
+    同じCSVは1回だけ読み込み、全メッセージを作成してから同時実行数を制限して並行送信する。
+    ジョブごとの結果と所要時間をまとめて返す。
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    BUCKET_NAME = os.environ.get('BUCKET_NAME', 'your-bucket-name')
+    CSV_FILE = os.environ.get('CSV_FILE', 'schedule.csv')
+    SLACK_WEBHOOK_URL = os.environ.get('SLACK_WEBHOOK_URL')
+    SLACK_CHANNEL = os.environ.get('SLACK_CHANNEL', '#リモートチーム勤怠報告')
+    PARTITION_PREFIX = os.environ.get('PARTITION_PREFIX')
+    
+    if not SLACK_WEBHOOK_URL:
+        return {"error": "SLACK_WEBHOOK_URL not configured"}, 500
+    
+    started = time.perf_counter()
+    today = datetime.now(JST).strftime('%Y-%m-%d')
+    default_source = ('partition', PARTITION_PREFIX) if PARTITION_PREFIX else ('csv', CSV_FILE)
+    try:
+        jobs = _parse_batch_jobs(request, default_source, SLACK_CHANNEL, today)
+        body = request.get_json(silent=True)
+        max_parallel = int(body.get('max_parallel') or os.environ.get('BATCH_MAX_PARALLEL', DEFAULT_BATCH_MAX_PARALLEL))
+    except (ValueError, TypeError) as e:
+        return {"status": "error", "message": str(e)}, 400
+    max_parallel = max(1, min(max_parallel, 32, len(jobs)))
+    
+    # スレッドから同時に作成されないよう、先にクライアントを用意しておく
+    _get_storage_client()
+    _get_http_session()
+    
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        loaded = _load_batch_sources(BUCKET_NAME, jobs, executor)
+        
+        # 全メッセージを先に作成
+        results = []
+        messages = []
+        for index, (source, channel, date) in enumerate(jobs):
+            rows, load_seconds = loaded[(source, date)]
+            source_field = 'partition_prefix' if source[0] == 'partition' else 'csv_file'
+            result = {
+                "index": index,
+                source_field: source[1],
+                "channel": channel,
+                "date": date,
+                "load_ms": round(load_seconds * 1000, 1)
+            }
+            results.append(result)
+            if isinstance(rows, Exception):
+                result.update(status="error", message=str(rows))
+                messages.append(None)
+                continue
+            render_started = time.perf_counter()
+            messages.append(_format_message(date, rows))
+            result["schedule_count"] = len(rows)
+            result["render_ms"] = round((time.perf_counter() - render_started) * 1000, 2)
+        
+        def post(result, message):
+            post_started = time.perf_counter()
+            try:
+                response = _post_message(SLACK_WEBHOOK_URL, result["channel"], message)
+                if response.status_code == 200:
+                    result["status"] = "success"
+                else:
+                    result.update(status="error", message=f"Slack API error: {response.status_code}")
+                result["http_status"] = response.status_code
+            except Exception as e:
+                result.update(status="error", message=str(e))
+            result["post_ms"] = round((time.perf_counter() - post_started) * 1000, 1)
+        
+        # 同時実行数を制限して並行送信
+        futures = [executor.submit(post, result, message)
+                   for result, message in zip(results, messages) if message is not None]
+        for future in futures:
+            future.result()
+    
+    succeeded = sum(1 for result in results if result["status"] == "success")
+    response = {
+        "status": "success" if succeeded == len(results) else ("partial" if succeeded else "error"),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "sources_loaded": len({source for source, _channel, _date in jobs}),
+        "max_parallel": max_parallel,
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        "jobs": results
+    }
+    if succeeded == len(results):
+        return response
+    return response, (207 if succeeded else 500)
+
 @functions_framework.http
 def test_function(request):
     """テスト用関数"""
@@ -11,5 +11,11 @@ CSV_FILE = 'schedule test - シート2 (1).csv'
 # スケジュール設定
 NOTIFICATION_TIME = "10:00"  # 朝の通知時間（24時間表記）
 
+# シフト開始リマインダー
+SHIFT_REMINDER_MINUTES = None  # シフト開始の何分前に通知するか（例: 15）。Noneで無効
+
+# 監視設定
+METRICS_PORT = None  # メトリクス公開ポート（例: 9108）。Noneで無効
+
 # タイムゾーン設定
 TIMEZONE = 'Asia/Tokyo'  # 日本時間
\ No newline at end of file
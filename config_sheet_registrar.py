@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+マスターシートのconfigシートへの従業員スプレッドシートIDの一括登録
+configシートを1回読み込み、内容が変わる行と新しい従業員の行だけを1回の batchUpdate で書き込む
+（行数が足りない場合は同じ batchUpdate の中で行数を必要な数に設定する）
+"""
+
+from datetime import datetime
+
+# configシートの列（master_aggregation_sheet.MasterAggregationSheetCreator.SHEETS と同じ順序）
+CONFIG_COLUMNS = [
+    'employee_id', 'employee_name', 'spreadsheet_id', 'store', 'role',
+    'slack_webhook_url', 'notification_time', 'status', 'last_updated', 'notes'
+]
+
+# 登録で上書きする列（それ以外の列は既存の値を残す）
+MANAGED_COLUMNS = ('employee_id', 'employee_name', 'spreadsheet_id', 'store')
+
+# 新しい従業員の行の既定値
+NEW_ROW_DEFAULTS = {'notification_time': '10:00', 'status': 'Active'}
+
+# 1回の batchUpdate に含める最大行数（リクエストの大きさを抑える）
+DEFAULT_MAX_ROWS_PER_REQUEST = 5000
+
+
+class ConfigSheetRegistrar:
+    """configシートに従業員のスプレッドシートIDを差分だけ書き込むクラス"""
+
+    def __init__(self, service, spreadsheet_id, sheet_title='config',
+                 max_rows_per_request=DEFAULT_MAX_ROWS_PER_REQUEST, clock=datetime.now):
+        """
+        初期化
+
+        Args:
+            service: Google Sheets APIサービス
+            spreadsheet_id (str): マスタースプレッドシートのID
+            sheet_title (str): configシートの名前
+            max_rows_per_request (int): 1回の batchUpdate に含める最大行数
+            clock (callable): last_updated に記録する現在時刻を返す関数
+        """
+        self.service = service
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_title = sheet_title
+        self.max_rows_per_request = max_rows_per_request
+        self.clock = clock
+        self.api_calls = 0
+
+    def _execute(self, request):
+        """APIリクエストを実行して呼び出し回数を記録"""
+        self.api_calls += 1
+        return request.execute()
+
+    def _read_sheet(self):
+        """
+        configシートの値とシートのプロパティを1回の呼び出しで取得
+
+        Returns:
+            tuple: (sheetId, 行数, 行のリスト（各行は文字列のリスト）)
+
+        Raises:
+            ValueError: configシートがない場合
+        """
+        last_column = chr(ord('A') + len(CONFIG_COLUMNS) - 1)
+        response = self._execute(self.service.spreadsheets().get(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=[f"{self.sheet_title}!A:{last_column}"],
+            includeGridData=True,
+            fields='sheets(properties(sheetId,title,gridProperties(rowCount)),data(rowData(values(formattedValue))))'
+        ))
+        sheet = next((s for s in response.get('sheets', []) if s['properties']['title'] == self.sheet_title), None)
+        if sheet is None:
+            raise ValueError(f"スプレッドシート {self.spreadsheet_id} に {self.sheet_title} シートがありません")
+        properties = sheet['properties']
+        rows = []
+        for grid in sheet.get('data', []):
+            for row in grid.get('rowData', []):
+                rows.append([cell.get('formattedValue', '') for cell in row.get('values', [])])
+        return properties['sheetId'], properties['gridProperties']['rowCount'], rows
+
+    @staticmethod
+    def _pad(row):
+        """行を列数に揃える"""
+        return (list(row) + [''] * len(CONFIG_COLUMNS))[:len(CONFIG_COLUMNS)]
+
+    def plan(self, employees, rows):
+        """
+        書き込む行を求める
+
+        Args:
+            employees (list): 従業員情報（employee_id, employee_name, spreadsheet_id, store）のリスト
+            rows (list): configシートの現在の行（1行目はヘッダー）
+
+        Returns:
+            tuple: (変更する行 {行番号(0始まり): 値のリスト}, 追加する行のリスト, 変更なしの件数)
+        """
+        index = {}
+        for number, row in enumerate(rows[1:], 1):
+            if row and row[0]:
+                index.setdefault(row[0], number)
+
+        timestamp = self.clock().strftime('%Y-%m-%d %H:%M:%S')
+        updates = {}
+        appends = []
+        appended_ids = {}
+        unchanged = 0
+        for employee in employees:
+            employee_id = employee['employee_id']
+            if employee_id in index:
+                current = self._pad(rows[index[employee_id]])
+                desired = list(current)
+                for column in MANAGED_COLUMNS:
+                    desired[CONFIG_COLUMNS.index(column)] = str(employee.get(column) or '')
+                if desired == current:
+                    unchanged += 1
+                    continue
+                desired[CONFIG_COLUMNS.index('last_updated')] = timestamp
+                updates[index[employee_id]] = desired
+            else:
+                values = dict(NEW_ROW_DEFAULTS, last_updated=timestamp)
+                values.update({column: str(employee.get(column) or '') for column in MANAGED_COLUMNS})
+                row = [values.get(column, '') for column in CONFIG_COLUMNS]
+                if employee_id in appended_ids:
+                    # 同じ従業員が複数回渡された場合は後のものを使う
+                    appends[appended_ids[employee_id]] = row
+                else:
+                    appended_ids[employee_id] = len(appends)
+                    appends.append(row)
+        return updates, appends, unchanged
+
+    @staticmethod
+    def _update_cells(sheet_id, start_row, rows):
+        """連続する行を書き込む updateCells リクエスト"""
+        return {
+            'updateCells': {
+                'start': {'sheetId': sheet_id, 'rowIndex': start_row, 'columnIndex': 0},
+                'rows': [{'values': [{'userEnteredValue': {'stringValue': value}} for value in row]}
+                         for row in rows],
+                'fields': 'userEnteredValue'
+            }
+        }
+
+    def _build_requests(self, sheet_id, row_count, first_free_row, updates, appends):
+        """
+        書き込みのリクエストを作成（連続する行はまとめ、行数が足りなければ行数を広げる）
+
+        行数は追加する行数（appendDimension）ではなく必要な行数そのもの（updateSheetProperties）で指定し、
+        適用済みの batchUpdate を再送しても行が二重に増えないようにする
+
+        Returns:
+            list: batchUpdate の requests のリスト（max_rows_per_request 行ごとに分割）
+        """
+        blocks = []
+        for number in sorted(updates):
+            if blocks and blocks[-1][0] + len(blocks[-1][1]) == number:
+                blocks[-1][1].append(updates[number])
+            else:
+                blocks.append((number, [updates[number]]))
+        if appends:
+            blocks.append((first_free_row, appends))
+
+        batches = [[]]
+        batch_rows = 0
+        needed_rows = first_free_row + len(appends)
+        if needed_rows > row_count:
+            batches[0].append({
+                'updateSheetProperties': {
+                    'properties': {'sheetId': sheet_id, 'gridProperties': {'rowCount': needed_rows}},
+                    'fields': 'gridProperties.rowCount'
+                }
+            })
+        for start_row, block_rows in blocks:
+            for offset in range(0, len(block_rows), self.max_rows_per_request):
+                part = block_rows[offset:offset + self.max_rows_per_request]
+                if batch_rows and batch_rows + len(part) > self.max_rows_per_request:
+                    batches.append([])
+                    batch_rows = 0
+                batches[-1].append(self._update_cells(sheet_id, start_row + offset, part))
+                batch_rows += len(part)
+        return [batch for batch in batches if batch]
+
+    def register(self, employees, dry_run=False):
+        """
+        従業員のスプレッドシートIDをconfigシートに登録
+
+        Args:
+            employees (list): 従業員情報（employee_id, employee_name, spreadsheet_id, store）のリスト
+            dry_run (bool): Trueの場合は書き込まずに件数だけ求める
+
+        Returns:
+            dict: updated（変更した行数）, appended（追加した行数）, unchanged（変更なし）, api_calls
+        """
+        self.api_calls = 0
+        sheet_id, row_count, rows = self._read_sheet()
+        updates, appends, unchanged = self.plan(employees, rows)
+
+        # 最後の空でない行の次から追加する
+        first_free_row = len(rows)
+        while first_free_row > 1 and not any(rows[first_free_row - 1]):
+            first_free_row -= 1
+        first_free_row = max(first_free_row, 1)
+
+        if not dry_run:
+            for requests in self._build_requests(sheet_id, row_count, first_free_row, updates, appends):
+                self._execute(self.service.spreadsheets().batchUpdate(
+                    spreadsheetId=self.spreadsheet_id,
+                    body={'requests': requests}
+                ))
+
+        return {
+            'updated': len(updates),
+            'appended': len(appends),
+            'unchanged': unchanged,
+            'api_calls': self.api_calls
+        }
@@ -11,21 +11,49 @@ import json
 from datetime import datetime
 import pytz
 import os
+import time
+import scheduler_metrics as metrics
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from schedule_codec import open_schedule_file
+from stage_timer import StageTimer, stage, count, profiled
 
 class CSVToSlackDirect:
     """CSVファイルから直接Slackに送信するクラス"""
     
-    def __init__(self, slack_webhook_url):
+    # Webhookへの送信のタイムアウト（秒、接続・応答待ち）
+    POST_TIMEOUT = (5, 15)
+    # 429のRetry-Afterに従って待つ最大秒数
+    MAX_RETRY_AFTER = 30
+    
+    def __init__(self, slack_webhook_url, max_retries=2):
         """
         初期化
         
         Args:
             slack_webhook_url (str): SlackのWebhook URL
+            max_retries (int, optional): 送信失敗時のリトライ回数
+                （Webhookへの送信は冪等ではないため、未送信が確実な接続失敗とRetry-After付きの429だけをリトライする）
         """
         self.webhook_url = slack_webhook_url
+        self.max_retries = max_retries
         self.jst = pytz.timezone('Asia/Tokyo')
+        # 接続を使い回して送信時のTCP/TLSハンドシェイクを省く
+        self.session = requests.Session()
+        # 監視中のインメモリスケジュール（attach_schedule_stateで設定）
+        self.schedule_state = None
         print("✅ CSV→Slack直接送信システムが準備完了しました")
     
+    def attach_schedule_state(self, schedule_state):
+        """
+        インメモリのスケジュール状態を設定
+        
+        設定後は同じCSVファイルの読み込みをファイルではなく状態から行う
+        
+        Args:
+            schedule_state (ScheduleState): スケジュール状態
+        """
+        self.schedule_state = schedule_state
+    
     def read_csv_schedule(self, csv_file, target_date=None):
         """
         CSVファイルから指定日の予定を読み取り
@@ -42,16 +70,41 @@ class CSVToSlackDirect:
             if target_date is None:
                 target_date = datetime.now(self.jst).strftime('%Y-%m-%d')
             
+            # インメモリ状態があればファイルを読まずに取得
+            state = self.schedule_state
+            if state is not None and os.path.abspath(state.csv_file) == os.path.abspath(csv_file):
+                with stage('lookup'):
+                    schedule_list = state.get_schedule(target_date)
+                # 日付のインデックスを引くだけなので走査するのは一致した行のみ
+                count('rows_scanned', len(schedule_list))
+                count('rows_matched', len(schedule_list))
+                metrics.ROWS_MATCHED.observe(len(schedule_list))
+                if not state.exists:
+                    return []
+                if len(schedule_list) == 0:
+                    print(f"⚠️  {target_date}のデータがCSVファイルにありません")
+                    return []
+                print(f"✅ {target_date}の予定を{len(schedule_list)}件取得しました")
+                return schedule_list
+            
             # CSVファイルの存在確認
             if not os.path.exists(csv_file):
                 print(f"❌ CSVファイルが見つかりません: {csv_file}")
                 return []
             
-            # CSVファイルを読み込み
-            df = pd.read_csv(csv_file)
+            # CSVファイルを読み込み（展開しながら直接解析し、ファイル全体を文字列として持たない）
+            parse_started = time.perf_counter()
+            with stage('io+parse'):
+                with open_schedule_file(csv_file) as f:
+                    df = pd.read_csv(f)
+            metrics.CSV_PARSE_SECONDS.observe(time.perf_counter() - parse_started)
             
             # 指定日のデータを抽出
-            day_data = df[df['日付'] == target_date]
+            with stage('filter'):
+                day_data = df[df['日付'] == target_date]
+            count('rows_scanned', len(df))
+            count('rows_matched', len(day_data))
+            metrics.ROWS_MATCHED.observe(len(day_data))
             
             if len(day_data) == 0:
                 print(f"⚠️  {target_date}のデータがCSVファイルにありません")
@@ -84,6 +137,14 @@ class CSVToSlackDirect:
         Returns:
             str: フォーマットされたメッセージ
         """
+        render_started = time.perf_counter()
+        with stage('render'):
+            message = self._render_schedule_message(schedule_list, target_date)
+        metrics.RENDER_SECONDS.observe(time.perf_counter() - render_started)
+        return message
+    
+    def _render_schedule_message(self, schedule_list, target_date):
+        """format_schedule_messageの本体"""
         if target_date is None:
             target_date = datetime.now(self.jst).strftime('%Y-%m-%d')
         
@@ -110,7 +171,8 @@ class CSVToSlackDirect:
         message += "\n💪 今日も一日頑張りましょう！"
         return message
     
-    def send_daily_schedule(self, csv_file, target_date=None, channel=None):
+    def send_daily_schedule(self, csv_file, target_date=None, channel=None,
+                            with_timings=False, profile_path=None):
         """
         指定日の予定をSlackに送信
         
@@ -118,10 +180,28 @@ class CSVToSlackDirect:
             csv_file (str): CSVファイルのパス
             target_date (str, optional): 対象日付
             channel (str, optional): 送信先チャンネル
+            with_timings (bool): Trueの場合は段階別の所要時間と行数も返す
+            profile_path (str, optional): 指定した場合は1回分の実行をcProfileで記録して保存
         
         Returns:
-            bool: 送信成功の可否
+            bool: 送信成功の可否（with_timings=Trueの場合は (bool, dict) のタプル。
+                dictは timings（io / parse / filter / lookup / render / post / total のミリ秒）と
+                counts（rows_scanned / rows_matched）を含む）
         """
+        if not with_timings and not profile_path:
+            return self._send_daily_schedule(csv_file, target_date, channel)
+        
+        with profiled(bool(profile_path), profile_path) as profile:
+            with StageTimer() as timer:
+                success = self._send_daily_schedule(csv_file, target_date, channel)
+        if profile.path:
+            print(f"🔬 プロファイルを保存しました: {profile.path}（python -m pstats {profile.path} で確認できます）")
+        if with_timings:
+            return success, timer.report()
+        return success
+    
+    def _send_daily_schedule(self, csv_file, target_date, channel):
+        """send_daily_scheduleの本体"""
         try:
             # CSVファイルから予定を取得
             schedule_list = self.read_csv_schedule(csv_file, target_date)
@@ -130,7 +210,8 @@ class CSVToSlackDirect:
             message = self.format_schedule_message(schedule_list, target_date)
             
             # Slackに送信
-            return self.send_message(message, channel)
+            with stage('post'):
+                return self.send_message(message, channel)
             
         except Exception as e:
             print(f"❌ 予定送信エラー: {e}")
@@ -147,6 +228,7 @@ class CSVToSlackDirect:
         Returns:
             bool: 送信成功の可否
         """
+        post_started = time.perf_counter()
         try:
             # Slack Webhook用のペイロード
             payload = {
@@ -156,25 +238,70 @@ class CSVToSlackDirect:
             # チャンネルが指定されている場合は追加
             if channel:
                 payload["channel"] = channel
+            data = json.dumps(payload)
             
-            # Slackに送信
-            response = requests.post(
-                self.webhook_url,
-                data=json.dumps(payload),
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                print("✅ Slackにメッセージを送信しました")
-                return True
-            else:
+            for attempt in range(self.max_retries + 1):
+                # Slackに送信
+                try:
+                    response = self.session.post(
+                        self.webhook_url,
+                        data=data,
+                        headers={'Content-Type': 'application/json'},
+                        timeout=self.POST_TIMEOUT
+                    )
+                except requests.exceptions.ConnectionError as e:
+                    # 接続を確立できなかった場合だけ未送信が確実なのでリトライする
+                    # （送信後の切断・応答待ちのタイムアウトは届いている可能性があるためリトライしない）
+                    if attempt < self.max_retries and self._is_connect_failure(e):
+                        print(f"⚠️  Slack接続エラー: {e}")
+                        self._wait_retry(attempt + 1, min(2 ** attempt, 10))
+                        continue
+                    raise
+                
+                if response.status_code == 200:
+                    print("✅ Slackにメッセージを送信しました")
+                    metrics.SLACK_POSTS.inc(result='success')
+                    return True
+                
+                # 429はRetry-Afterが指定された場合だけ、その秒数待ってからリトライする
+                retry_after = self._retry_after(response)
+                if response.status_code == 429 and retry_after is not None and attempt < self.max_retries:
+                    print(f"⚠️  Slackの送信上限に達しました（{retry_after:g}秒後にリトライ）")
+                    self._wait_retry(attempt + 1, retry_after)
+                    continue
+                
                 print(f"❌ Slack送信に失敗しました: {response.status_code}")
                 print(f"   レスポンス: {response.text}")
+                metrics.SLACK_POSTS.inc(result='failure')
                 return False
                 
         except Exception as e:
             print(f"❌ Slack送信エラー: {e}")
+            metrics.SLACK_POSTS.inc(result='error')
             return False
+        finally:
+            metrics.SLACK_POST_SECONDS.observe(time.perf_counter() - post_started)
+    
+    @staticmethod
+    def _is_connect_failure(error):
+        """接続を確立できなかった（リクエストを送っていない）エラーか"""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+    
+    def _retry_after(self, response):
+        """429のRetry-Afterの秒数（指定がない・読めない場合はNone）"""
+        try:
+            return min(float(response.headers.get('Retry-After')), self.MAX_RETRY_AFTER)
+        except (TypeError, ValueError):
+            return None
+    
+    def _wait_retry(self, attempt, delay):
+        """リトライまで待つ"""
+        metrics.SLACK_RETRIES.inc()
+        print(f"🔁 Slack送信をリトライします（{attempt}/{self.max_retries}）")
+        time.sleep(delay)
 
 def main():
     """テスト用のメイン関数"""
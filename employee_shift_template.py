@@ -7,40 +7,192 @@ Google Sheets APIを使用してテンプレートを作成
 
 import os
 import json
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+import statistics
+import threading
+import time
+from collections import deque
 from googleapiclient.errors import HttpError
+from google_api_client import get_client_factory
+
+# テンプレートの作成方法
+MODE_BUILD = 'build'  # 一から作成（create + batchUpdate）
+MODE_CLONE = 'clone'  # 原本をDriveでコピー（files.copy + values.update）
+MODE_AUTO = 'auto'    # 両方の所要時間を計測して速い方を選ぶ
+TEMPLATE_MODES = (MODE_BUILD, MODE_CLONE, MODE_AUTO)
+
+GOLDEN_TEMPLATE_TITLE = 'シフト希望入力 - テンプレート原本'
+
+
+class TemplateModeSelector:
+    """テンプレートの作成方法を選ぶクラス（複数の作成器・ワーカーで共有できる）"""
+    
+    def __init__(self, mode=MODE_BUILD, samples=3, history=20, golden_template_id=None):
+        """
+        初期化
+        
+        Args:
+            mode (str): 'build' / 'clone' / 'auto'
+            samples (int): autoの場合に、選ぶ前にそれぞれの方法で計測する回数
+            history (int): 比較に使う直近の計測数
+            golden_template_id (str, optional): 作成済みの原本のスプレッドシートID
+        """
+        if mode not in TEMPLATE_MODES:
+            raise ValueError(f"未対応の作成方法です: {mode}")
+        self.mode = mode
+        self.samples = samples
+        self.golden_template_id = golden_template_id
+        self.latencies = {MODE_BUILD: deque(maxlen=history), MODE_CLONE: deque(maxlen=history)}
+        self._assigned = {MODE_BUILD: 0, MODE_CLONE: 0}
+        self._lock = threading.Lock()
+        self._golden_lock = threading.Lock()
+    
+    def choose(self):
+        """
+        次のテンプレートの作成方法を選ぶ
+        
+        Returns:
+            str: 'build' / 'clone'
+        """
+        if self.mode != MODE_AUTO:
+            return self.mode
+        with self._lock:
+            # まだ計測が足りない方法を先に試す（並列実行中でも割り当て済みの数で判断する）
+            for mode in (MODE_BUILD, MODE_CLONE):
+                if self._assigned[mode] < self.samples:
+                    self._assigned[mode] += 1
+                    return mode
+            medians = self._medians()
+            if len(medians) < 2:
+                return MODE_BUILD
+            return min(medians, key=medians.get)
+    
+    def record(self, mode, seconds):
+        """
+        作成にかかった時間を記録
+        
+        Args:
+            mode (str): 'build' / 'clone'
+            seconds (float): 所要時間（秒）
+        """
+        with self._lock:
+            self.latencies[mode].append(seconds)
+    
+    def _medians(self):
+        """計測済みの方法ごとの所要時間の中央値"""
+        return {mode: statistics.median(values) for mode, values in self.latencies.items() if values}
+    
+    def ensure_golden(self, creator):
+        """
+        原本を取得（まだなければ creator で1回だけ作成）
+        
+        Args:
+            creator (EmployeeShiftTemplateCreator): 原本の作成に使う作成器
+        
+        Returns:
+            str: 原本のスプレッドシートID
+        """
+        with self._golden_lock:
+            if self.golden_template_id is None:
+                golden_id = creator.create_golden_template()
+                if golden_id is None:
+                    raise RuntimeError("テンプレート原本の作成に失敗しました")
+                self.golden_template_id = golden_id
+            return self.golden_template_id
+    
+    def summary(self):
+        """
+        計測結果の要約
+        
+        Returns:
+            dict: mode（設定）, medians（方法ごとの中央値[秒]）, preferred（現在選ばれる方法）
+        """
+        with self._lock:
+            medians = self._medians()
+        if self.mode != MODE_AUTO:
+            preferred = self.mode
+        elif len(medians) == 2:
+            preferred = min(medians, key=medians.get)
+        else:
+            preferred = None
+        return {'mode': self.mode, 'medians': medians, 'preferred': preferred}
+
 
 class EmployeeShiftTemplateCreator:
     """従業員シフト希望テンプレート作成クラス"""
     
-    def __init__(self, credentials_file):
-        """初期化"""
+    def __init__(self, credentials_file, service=None, verbose=True,
+                 drive_service=None, selector=None):
+        """
+        初期化
+        
+        Args:
+            credentials_file (str): サービスアカウントの認証ファイル
+            service (optional): 構築済みのSheets APIサービス（フェイクを使う場合など）
+            verbose (bool): Falseの場合は成功時のメッセージを表示しない（エラーは表示する）
+            drive_service (optional): 構築済みのDrive APIサービス（原本のコピーに使う）
+            selector (TemplateModeSelector, optional): 作成方法の選択（既定は毎回一から作成）
+        
+        Raises:
+            ValueError: Sheets APIサービスだけを渡して、Driveでのコピー（clone / auto）を選んだ場合
+        """
         self.credentials_file = credentials_file
-        self.service = self._setup_service()
+        self.client_factory = None
+        self.service = service if service is not None else self._setup_service()
+        self._drive_service = drive_service
+        self.verbose = verbose
+        self.selector = selector if selector is not None else TemplateModeSelector(MODE_BUILD)
+        if service is not None and drive_service is None and self.selector.mode != MODE_BUILD:
+            raise ValueError(f"作成方法 {self.selector.mode} ではDrive APIサービスが必要です"
+                             f"（service と一緒に drive_service も渡してください）")
+        # 直近のテンプレート作成のAPI呼び出し回数と所要時間
+        self.api_calls = 0
+        self.last_stats = None
     
     def _setup_service(self):
-        """Google Sheets API サービスを設定"""
+        """Google Sheets API サービスを設定（認証情報・ディスカバリードキュメントは共有のファクトリーで再利用）"""
         try:
-            # 認証情報を読み込み
-            creds = Credentials.from_service_account_file(
-                self.credentials_file,
-                scopes=['https://www.googleapis.com/auth/spreadsheets',
-                        'https://www.googleapis.com/auth/drive']
-            )
-            
-            # Google Sheets API サービスを構築
-            service = build('sheets', 'v4', credentials=creds)
-            return service
+            self.client_factory = get_client_factory(self.credentials_file)
+            return self.client_factory.sheets()
             
         except Exception as e:
             print(f"❌ 認証エラー: {e}")
             return None
     
+    @property
+    def drive_service(self):
+        """Google Drive API サービス（原本のコピーに使う。初回のみ構築）"""
+        if self._drive_service is None:
+            if self.client_factory is None:
+                raise ValueError("Drive APIサービスがありません（drive_service を渡すか、認証ファイルから作成してください）")
+            self._drive_service = self.client_factory.drive()
+        return self._drive_service
+    
+    # ヘッダー行（A〜M列）
+    HEADERS = [
+        'employee_id', 'employee_name', 'store', 'role', 'date',
+        'start_time', 'end_time', 'break_min', 'shift_type', 'notes',
+        'status', 'manager', 'approved_at'
+    ]
+    
+    # requestシートのシートID（作成時に明示して後続のリクエストから参照する）
+    SHEET_ID = 0
+    ROW_COUNT = 1000
+    
+    def _execute(self, request):
+        """APIリクエストを実行して呼び出し回数を記録（上限の調整はサービスの sheets_quota が行う）"""
+        self.api_calls += 1
+        return request.execute()
+    
     def create_employee_template(self, employee_id, employee_name, store_name):
         """
         従業員用のシフト希望テンプレートを作成
         
+        作成方法は selector で選ぶ。
+        - build: ヘッダー・書式・従業員情報・条件付き書式は作成リクエストの本文に含め、
+          データ検証ルールだけを1回のbatchUpdateで設定する（API呼び出しは計2回）
+        - clone: 検証・書式を設定済みの原本をDriveでコピーし、従業員情報だけを書き込む（計2回）
+        所要時間・呼び出し回数・作成方法は self.last_stats に記録する。
+        
         Args:
             employee_id (str): 従業員ID
             employee_name (str): 従業員名
@@ -49,45 +201,28 @@ class EmployeeShiftTemplateCreator:
         Returns:
             str: 作成されたスプレッドシートのID
         """
+        self.api_calls = 0
+        self.last_stats = None
+        mode = self.selector.choose()
+        started = time.perf_counter()
         try:
-            # 新しいスプレッドシートを作成
-            spreadsheet_body = {
-                'properties': {
-                    'title': f'{employee_name} - シフト希望入力 ({store_name})'
-                },
-                'sheets': [{
-                    'properties': {
-                        'title': 'request',
-                        'gridProperties': {
-                            'rowCount': 1000,
-                            'columnCount': 13
-                        }
-                    }
-                }]
-            }
-            
-            # スプレッドシートを作成
-            spreadsheet = self.service.spreadsheets().create(
-                body=spreadsheet_body
-            ).execute()
-            
-            spreadsheet_id = spreadsheet['spreadsheetId']
-            print(f"✅ スプレッドシートを作成しました: {spreadsheet_id}")
-            
-            # ヘッダー行を設定
-            self._setup_headers(spreadsheet_id)
-            
-            # データ検証ルールを設定
-            self._setup_data_validation(spreadsheet_id)
-            
-            # 従業員情報を固定値として設定
-            self._setup_employee_info(spreadsheet_id, employee_id, employee_name, store_name)
+            if mode == MODE_CLONE:
+                # 原本の作成（初回のみ）はコピーの所要時間・呼び出し回数に含めない
+                golden_id = self.selector.ensure_golden(self)
+                self.api_calls = 0
+                started = time.perf_counter()
+                spreadsheet_id = self._clone_template(golden_id, employee_id, employee_name, store_name)
+            else:
+                spreadsheet_id = self._build_template(
+                    self._build_spreadsheet_body(employee_id, employee_name, store_name))
             
-            # 条件付き書式を設定
-            self._setup_conditional_formatting(spreadsheet_id)
-            
-            print(f"✅ テンプレートの設定が完了しました")
-            print(f"📋 スプレッドシートURL: https://docs.google.com/spreadsheets/d/{spreadsheet_id}")
+            self._record_stats(started, mode)
+            self.selector.record(mode, self.last_stats['seconds'])
+            if self.verbose:
+                print(f"✅ テンプレートの設定が完了しました")
+                print(f"⏱️ 所要時間: {self.last_stats['seconds']:.2f}秒 / API呼び出し: {self.api_calls}回"
+                      f"（作成方法: {mode}）")
+                print(f"📋 スプレッドシートURL: https://docs.google.com/spreadsheets/d/{spreadsheet_id}")
             
             return spreadsheet_id
             
@@ -97,218 +232,234 @@ class EmployeeShiftTemplateCreator:
         except Exception as e:
             print(f"❌ テンプレート作成エラー: {e}")
             return None
+        finally:
+            # 失敗した場合もそこまでの呼び出し回数と時間を残す
+            if self.last_stats is None:
+                self._record_stats(started, mode)
     
-    def _setup_headers(self, spreadsheet_id):
-        """ヘッダー行を設定"""
-        headers = [
-            'employee_id', 'employee_name', 'store', 'role', 'date',
-            'start_time', 'end_time', 'break_min', 'shift_type', 'notes',
-            'status', 'manager', 'approved_at'
-        ]
+    def create_golden_template(self):
+        """
+        コピー元となるテンプレートの原本を作成（従業員情報は空欄）
         
-        # ヘッダーを設定
-        self.service.spreadsheets().values().update(
-            spreadsheetId=spreadsheet_id,
-            range='request!A1:M1',
-            valueInputOption='RAW',
-            body={'values': [headers]}
-        ).execute()
+        Returns:
+            str: 原本のスプレッドシートID（失敗した場合None）
+        """
+        try:
+            body = self._build_spreadsheet_body('', '', '')
+            body['properties']['title'] = GOLDEN_TEMPLATE_TITLE
+            golden_id = self._build_template(body)
+            if self.verbose:
+                print(f"✅ テンプレート原本を作成しました: {golden_id}")
+            return golden_id
+        except HttpError as e:
+            print(f"❌ Google Sheets API エラー: {e}")
+            return None
+    
+    def _build_template(self, spreadsheet_body):
+        """
+        スプレッドシートを一から作成
         
-        # ヘッダー行の書式設定
-        requests = [{
-            'repeatCell': {
-                'range': {
-                    'sheetId': 0,
-                    'startRowIndex': 0,
-                    'endRowIndex': 1
-                },
-                'cell': {
-                    'userEnteredFormat': {
-                        'backgroundColor': {'red': 0.8, 'green': 0.8, 'blue': 0.8},
-                        'textFormat': {'bold': True}
-                    }
-                },
-                'fields': 'userEnteredFormat(backgroundColor,textFormat)'
-            }
-        }]
+        Args:
+            spreadsheet_body (dict): spreadsheets.create の本文
+        
+        Returns:
+            str: 作成されたスプレッドシートのID
+        """
+        # ヘッダー・従業員情報・書式・条件付き書式を含めてスプレッドシートを作成
+        spreadsheet = self._execute(self.service.spreadsheets().create(
+            body=spreadsheet_body,
+            fields='spreadsheetId'
+        ))
         
-        self.service.spreadsheets().batchUpdate(
+        spreadsheet_id = spreadsheet['spreadsheetId']
+        if self.verbose:
+            print(f"✅ スプレッドシートを作成しました: {spreadsheet_id}")
+        
+        # データ検証ルールを設定（セル単位で作成本文に含めると本文が大きくなるため範囲指定で1回にまとめる）
+        self._execute(self.service.spreadsheets().batchUpdate(
             spreadsheetId=spreadsheet_id,
-            body={'requests': requests}
-        ).execute()
+            body={'requests': self._data_validation_requests()}
+        ))
+        return spreadsheet_id
     
-    def _setup_data_validation(self, spreadsheet_id):
-        """データ検証ルールを設定"""
-        requests = []
+    def _clone_template(self, golden_id, employee_id, employee_name, store_name):
+        """
+        原本をコピーして従業員情報を書き込む
         
-        # 店舗選択（C列）
-        store_validation = {
-            'range': {
-                'sheetId': 0,
-                'startRowIndex': 1,
-                'endRowIndex': 1000,
-                'startColumnIndex': 2,
-                'endColumnIndex': 3
-            },
-            'rule': {
-                'condition': {
-                    'type': 'ONE_OF_LIST',
-                    'values': [{'userEnteredValue': '東京'}, {'userEnteredValue': '大阪'}, {'userEnteredValue': '名古屋'}]
-                },
-                'showCustomUi': True
-            }
-        }
-        requests.append({'setDataValidation': store_validation})
+        Args:
+            golden_id (str): 原本のスプレッドシートID
+            employee_id (str): 従業員ID
+            employee_name (str): 従業員名
+            store_name (str): 店舗名
         
-        # 役職選択（D列）
-        role_validation = {
-            'range': {
-                'sheetId': 0,
-                'startRowIndex': 1,
-                'endRowIndex': 1000,
-                'startColumnIndex': 3,
-                'endColumnIndex': 4
-            },
-            'rule': {
-                'condition': {
-                    'type': 'ONE_OF_LIST',
-                    'values': [{'userEnteredValue': '販売'}, {'userEnteredValue': '受付'}, {'userEnteredValue': '事務'}]
-                },
-                'showCustomUi': True
-            }
-        }
-        requests.append({'setDataValidation': role_validation})
+        Returns:
+            str: 作成されたスプレッドシートのID
+        """
+        copied = self._execute(self.drive_service.files().copy(
+            fileId=golden_id,
+            body={'name': self._template_title(employee_name, store_name)},
+            fields='id',
+            supportsAllDrives=True
+        ))
         
-        # シフトタイプ選択（I列）
-        shift_validation = {
-            'range': {
-                'sheetId': 0,
-                'startRowIndex': 1,
-                'endRowIndex': 1000,
-                'startColumnIndex': 8,
-                'endColumnIndex': 9
-            },
-            'rule': {
-                'condition': {
-                    'type': 'ONE_OF_LIST',
-                    'values': [{'userEnteredValue': '通常'}, {'userEnteredValue': '早番'}, {'userEnteredValue': '遅番'}, {'userEnteredValue': '休'}]
-                },
-                'showCustomUi': True
-            }
-        }
-        requests.append({'setDataValidation': shift_validation})
+        spreadsheet_id = copied['id']
+        if self.verbose:
+            print(f"✅ テンプレート原本をコピーしました: {spreadsheet_id}")
         
-        # ステータス選択（K列）
-        status_validation = {
-            'range': {
-                'sheetId': 0,
-                'startRowIndex': 1,
-                'endRowIndex': 1000,
-                'startColumnIndex': 10,
-                'endColumnIndex': 11
-            },
-            'rule': {
-                'condition': {
-                    'type': 'ONE_OF_LIST',
-                    'values': [{'userEnteredValue': 'Pending'}, {'userEnteredValue': 'Approved'}, {'userEnteredValue': 'Rejected'}]
-                },
-                'showCustomUi': True
-            }
+        # 従業員情報（2行目のA〜C列）だけを書き込む
+        self._execute(self.service.spreadsheets().values().update(
+            spreadsheetId=spreadsheet_id,
+            range='request!A2:C2',
+            valueInputOption='RAW',
+            body={'values': [[employee_id, employee_name, store_name]]}
+        ))
+        return spreadsheet_id
+    
+    def _record_stats(self, started, mode):
+        """直近のテンプレート作成のAPI呼び出し回数・所要時間・作成方法を記録"""
+        self.last_stats = {
+            'api_calls': self.api_calls,
+            'seconds': time.perf_counter() - started,
+            'mode': mode
         }
-        requests.append({'setDataValidation': status_validation})
+    
+    @staticmethod
+    def _string_cell(value, user_format=None):
+        """文字列のセル（valueInputOption='RAW' と同じく入力値をそのまま保持）"""
+        cell = {'userEnteredValue': {'stringValue': str(value)}}
+        if user_format:
+            cell['userEnteredFormat'] = user_format
+        return cell
+    
+    @staticmethod
+    def _template_title(employee_name, store_name):
+        """従業員用スプレッドシートのタイトル"""
+        return f'{employee_name} - シフト希望入力 ({store_name})'
+    
+    def _build_spreadsheet_body(self, employee_id, employee_name, store_name):
+        """
+        スプレッドシート作成リクエストの本文を作成
         
-        # 日付検証（E列）
-        date_validation = {
-            'range': {
-                'sheetId': 0,
-                'startRowIndex': 1,
-                'endRowIndex': 1000,
-                'startColumnIndex': 4,
-                'endColumnIndex': 5
-            },
-            'rule': {
-                'condition': {
-                    'type': 'DATE_AFTER',
-                    'values': [{'userEnteredValue': 'TODAY()'}]
-                }
-            }
+        Args:
+            employee_id (str): 従業員ID
+            employee_name (str): 従業員名
+            store_name (str): 店舗名
+        
+        Returns:
+            dict: spreadsheets.create の本文
+        """
+        # ヘッダー行の書式
+        header_format = {
+            'backgroundColor': {'red': 0.8, 'green': 0.8, 'blue': 0.8},
+            'textFormat': {'bold': True}
         }
-        requests.append({'setDataValidation': date_validation})
+        header_row = {'values': [self._string_cell(header, header_format) for header in self.HEADERS]}
         
-        # バッチ更新を実行
-        if requests:
-            self.service.spreadsheets().batchUpdate(
-                spreadsheetId=spreadsheet_id,
-                body={'requests': requests}
-            ).execute()
-    
-    def _setup_employee_info(self, spreadsheet_id, employee_id, employee_name, store_name):
-        """従業員情報を固定値として設定"""
         # 従業員情報を2行目に設定（テンプレート例）
         employee_data = [
-            [employee_id, employee_name, store_name, '販売', '2025-11-01', '10:00', '19:00', '60', '通常', '例：学校行事の都合でこの日だけ早上がり可', 'Pending', '', '']
+            employee_id, employee_name, store_name, '販売', '2025-11-01', '10:00', '19:00', '60', '通常',
+            '例：学校行事の都合でこの日だけ早上がり可', 'Pending', '', ''
         ]
+        employee_row = {'values': [self._string_cell(value) for value in employee_data]}
         
-        self.service.spreadsheets().values().update(
-            spreadsheetId=spreadsheet_id,
-            range='request!A2:M2',
-            valueInputOption='RAW',
-            body={'values': employee_data}
-        ).execute()
-    
-    def _setup_conditional_formatting(self, spreadsheet_id):
-        """条件付き書式を設定"""
-        requests = []
-        
-        # 土日の日付を薄色表示
-        weekend_format = {
-            'range': {
-                'sheetId': 0,
-                'startRowIndex': 1,
-                'endRowIndex': 1000,
-                'startColumnIndex': 4,
-                'endColumnIndex': 5
+        return {
+            'properties': {
+                'title': self._template_title(employee_name, store_name)
             },
-            'booleanRule': {
-                'condition': {
-                    'type': 'CUSTOM_FORMULA',
-                    'values': [{'userEnteredValue': '=OR(WEEKDAY(E2)=1,WEEKDAY(E2)=7)'}]
+            'sheets': [{
+                'properties': {
+                    'sheetId': self.SHEET_ID,
+                    'title': 'request',
+                    'gridProperties': {
+                        'rowCount': self.ROW_COUNT,
+                        'columnCount': len(self.HEADERS)
+                    }
                 },
-                'format': {
-                    'backgroundColor': {'red': 0.9, 'green': 0.9, 'blue': 0.9}
-                }
-            }
+                'data': [{
+                    'startRow': 0,
+                    'startColumn': 0,
+                    'rowData': [header_row, employee_row]
+                }],
+                'conditionalFormats': self._conditional_format_rules()
+            }]
         }
-        requests.append({'addConditionalFormatRule': weekend_format})
+    
+    def _column_range(self, start_column, end_column):
+        """2行目以降の列範囲"""
+        return {
+            'sheetId': self.SHEET_ID,
+            'startRowIndex': 1,
+            'endRowIndex': self.ROW_COUNT,
+            'startColumnIndex': start_column,
+            'endColumnIndex': end_column
+        }
+    
+    def _data_validation_requests(self):
+        """データ検証ルールのリクエスト一覧"""
+        def one_of_list(column, values):
+            return {'setDataValidation': {
+                'range': self._column_range(column, column + 1),
+                'rule': {
+                    'condition': {
+                        'type': 'ONE_OF_LIST',
+                        'values': [{'userEnteredValue': value} for value in values]
+                    },
+                    'showCustomUi': True
+                }
+            }}
         
-        # Rejected行をグレーアウト
-        rejected_format = {
-            'range': {
-                'sheetId': 0,
-                'startRowIndex': 1,
-                'endRowIndex': 1000,
-                'startColumnIndex': 0,
-                'endColumnIndex': 13
+        return [
+            # 店舗選択（C列）
+            one_of_list(2, ['東京', '大阪', '名古屋']),
+            # 役職選択（D列）
+            one_of_list(3, ['販売', '受付', '事務']),
+            # シフトタイプ選択（I列）
+            one_of_list(8, ['通常', '早番', '遅番', '休']),
+            # ステータス選択（K列）
+            one_of_list(10, ['Pending', 'Approved', 'Rejected']),
+            # 日付検証（E列）
+            {'setDataValidation': {
+                'range': self._column_range(4, 5),
+                'rule': {
+                    'condition': {
+                        'type': 'DATE_AFTER',
+                        'values': [{'userEnteredValue': 'TODAY()'}]
+                    }
+                }
+            }}
+        ]
+    
+    def _conditional_format_rules(self):
+        """条件付き書式のルール一覧"""
+        return [
+            # 土日の日付を薄色表示
+            {
+                'ranges': [self._column_range(4, 5)],
+                'booleanRule': {
+                    'condition': {
+                        'type': 'CUSTOM_FORMULA',
+                        'values': [{'userEnteredValue': '=OR(WEEKDAY(E2)=1,WEEKDAY(E2)=7)'}]
+                    },
+                    'format': {
+                        'backgroundColor': {'red': 0.9, 'green': 0.9, 'blue': 0.9}
+                    }
+                }
             },
-            'booleanRule': {
-                'condition': {
-                    'type': 'TEXT_EQ',
-                    'values': [{'userEnteredValue': 'Rejected'}]
-                },
-                'format': {
-                    'backgroundColor': {'red': 0.8, 'green': 0.8, 'blue': 0.8},
-                    'textFormat': {'foregroundColor': {'red': 0.5, 'green': 0.5, 'blue': 0.5}}
+            # Rejected行をグレーアウト
+            {
+                'ranges': [self._column_range(0, len(self.HEADERS))],
+                'booleanRule': {
+                    'condition': {
+                        'type': 'TEXT_EQ',
+                        'values': [{'userEnteredValue': 'Rejected'}]
+                    },
+                    'format': {
+                        'backgroundColor': {'red': 0.8, 'green': 0.8, 'blue': 0.8},
+                        'textFormat': {'foregroundColor': {'red': 0.5, 'green': 0.5, 'blue': 0.5}}
+                    }
                 }
             }
-        }
-        requests.append({'addConditionalFormatRule': rejected_format})
-        
-        # バッチ更新を実行
-        if requests:
-            self.service.spreadsheets().batchUpdate(
-                spreadsheetId=spreadsheet_id,
-                body={'requests': requests}
-            ).execute()
+        ]
 
 def main():
     """メイン実行関数"""
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cloud Storageのインメモリ代替実装
+cloud_function_mainをローカルで動かす・計測するためのフェイク
+"""
+
+import io
+import gzip
+import hashlib
+import base64
+import threading
+import time
+
+
+class FakeBlob:
+    """google.cloud.storage.Blob の必要最小限の代替"""
+
+    def __init__(self, bucket, name):
+        """
+        初期化
+
+        Args:
+            bucket (FakeBucket): 所属するバケット
+            name (str): オブジェクト名
+        """
+        self.bucket = bucket
+        self.name = name
+        self.generation = None
+        self.metageneration = None
+        self.content_encoding = None
+        self.content_type = None
+        self.size = None
+        self.md5_hash = None
+
+    def _load(self):
+        """保存済みオブジェクトのメタデータを反映"""
+        stored = self.bucket._objects.get(self.name)
+        if stored is None:
+            return False
+        self.generation = stored['generation']
+        self.metageneration = stored['metageneration']
+        self.content_encoding = stored['content_encoding']
+        self.content_type = stored['content_type']
+        self.size = len(stored['data'])
+        self.md5_hash = stored['md5_hash']
+        return True
+
+    def exists(self, client=None):
+        """オブジェクトが存在するか"""
+        return self.name in self.bucket._objects
+
+    def reload(self, client=None):
+        """メタデータを取得し直す"""
+        if not self._load():
+            raise FileNotFoundError(f"gs://{self.bucket.name}/{self.name}")
+
+    def download_as_bytes(self, client=None, start=None, end=None, raw_download=False,
+                          if_generation_match=None, **kwargs):
+        """
+        内容をバイト列で取得
+
+        Args:
+            start (int, optional): 開始バイト位置
+            end (int, optional): 終了バイト位置（この位置を含む）
+            if_generation_match (int, optional): 一致しない場合はエラー
+
+        Returns:
+            bytes: オブジェクトの内容
+        """
+        self.bucket.client._simulate_latency()
+        stored = self.bucket._get_stored(self.name, if_generation_match)
+        self.bucket.client.download_count += 1
+        data = stored['data']
+        if start is not None or end is not None:
+            data = data[start or 0:(end + 1) if end is not None else None]
+        self.bucket.client._record_download(len(data))
+        # Content-Encoding: gzip のオブジェクトは raw_download でなければ展開して返す（GCSの自動展開と同じ）
+        if stored['content_encoding'] == 'gzip' and not raw_download:
+            data = gzip.decompress(data)
+        return data
+
+    def download_as_text(self, encoding='utf-8', **kwargs):
+        """内容を文字列で取得"""
+        return self.download_as_bytes(**kwargs).decode(encoding)
+
+    def open(self, mode='rb', chunk_size=None, **kwargs):
+        """
+        内容を読み込み用に開く（範囲リクエストの代わりにメモリ上のバッファを返す）
+
+        Args:
+            mode (str): 'rb' のみ対応
+
+        Returns:
+            io.BufferedReader: 読み込み用ストリーム
+        """
+        if mode != 'rb':
+            raise ValueError("FakeBlob.open は 'rb' のみ対応しています")
+        self.bucket.client._simulate_latency()
+        stored = self.bucket._get_stored(self.name, kwargs.get('if_generation_match'))
+        self.bucket.client.download_count += 1
+        reader = _CountingReader(stored['data'], self.bucket.client)
+        if stored['content_encoding'] == 'gzip' and not kwargs.get('raw_download'):
+            return gzip.GzipFile(fileobj=reader, mode='rb')
+        return reader
+
+    def upload_from_string(self, data, content_type='text/plain', if_generation_match=None, **kwargs):
+        """
+        内容をアップロード
+
+        Args:
+            data (str|bytes): 保存する内容
+            content_type (str): Content-Type
+            if_generation_match (int, optional): 0の場合は新規作成時のみ成功
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.bucket.client._simulate_latency()
+        self.bucket._put(self.name, data, content_type, self.content_encoding, if_generation_match)
+        self._load()
+
+    def delete(self, client=None):
+        """オブジェクトを削除"""
+        self.bucket.client._simulate_latency()
+        with self.bucket._lock:
+            if self.bucket._objects.pop(self.name, None) is None:
+                raise FileNotFoundError(f"gs://{self.bucket.name}/{self.name}")
+
+
+class _CountingReader(io.BytesIO):
+    """読み出したバイト数を記録するストリーム"""
+
+    def __init__(self, data, client):
+        super().__init__(data)
+        self._client = client
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self._client._record_download(len(chunk))
+        return chunk
+
+    def read1(self, size=-1):
+        chunk = super().read1(size)
+        self._client._record_download(len(chunk))
+        return chunk
+
+    def readinto(self, buffer):
+        count = super().readinto(buffer)
+        self._client._record_download(count)
+        return count
+
+
+class PreconditionFailed(Exception):
+    """if_generation_matchの条件を満たさない場合のエラー（HTTP 412相当）"""
+
+    code = 412
+
+
+class FakeBucket:
+    """google.cloud.storage.Bucket の必要最小限の代替"""
+
+    def __init__(self, client, name):
+        """
+        初期化
+
+        Args:
+            client (FakeStorageClient): 所属するクライアント
+            name (str): バケット名
+        """
+        self.client = client
+        self.name = name
+        self._objects = {}
+        self._lock = threading.Lock()
+        self._next_generation = 1
+
+    def blob(self, name):
+        """Blobオブジェクトを作成（存在確認はしない）"""
+        blob = FakeBlob(self, name)
+        blob._load()
+        return blob
+
+    def get_blob(self, name, **kwargs):
+        """メタデータを取得（存在しない場合None）"""
+        self.client._simulate_latency()
+        self.client.metadata_count += 1
+        blob = FakeBlob(self, name)
+        return blob if blob._load() else None
+
+    def list_blobs(self, prefix=None, **kwargs):
+        """オブジェクト一覧を取得"""
+        for name in sorted(self._objects):
+            if prefix is None or name.startswith(prefix):
+                blob = FakeBlob(self, name)
+                blob._load()
+                yield blob
+
+    def _get_stored(self, name, if_generation_match=None):
+        """保存済みオブジェクトを取得"""
+        stored = self._objects.get(name)
+        if stored is None:
+            raise FileNotFoundError(f"gs://{self.name}/{name}")
+        if if_generation_match is not None and stored['generation'] != if_generation_match:
+            raise PreconditionFailed(f"gs://{self.name}/{name}: generation不一致")
+        return stored
+
+    def _put(self, name, data, content_type, content_encoding, if_generation_match=None):
+        """オブジェクトを保存"""
+        with self._lock:
+            current = self._objects.get(name)
+            if if_generation_match is not None:
+                current_generation = current['generation'] if current else 0
+                if current_generation != if_generation_match:
+                    raise PreconditionFailed(f"gs://{self.name}/{name}: generation不一致")
+            generation = self._next_generation
+            self._next_generation += 1
+            self._objects[name] = {
+                'data': data,
+                'generation': generation,
+                'metageneration': 1,
+                'content_type': content_type,
+                'content_encoding': content_encoding,
+                'md5_hash': base64.b64encode(hashlib.md5(data).digest()).decode('ascii')
+            }
+        self.client.upload_count += 1
+
+
+class FakeStorageClient:
+    """google.cloud.storage.Client の必要最小限の代替"""
+
+    def __init__(self, latency=0.0, bandwidth=None):
+        """
+        初期化
+
+        Args:
+            latency (float): API呼び出し1回あたりに追加する待ち時間（秒）
+            bandwidth (float, optional): ダウンロードの転送速度（バイト/秒）。Noneなら待ち時間なし
+        """
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._buckets = {}
+        self.metadata_count = 0
+        self.download_count = 0
+        self.upload_count = 0
+        self.bytes_downloaded = 0
+
+    def _simulate_latency(self):
+        """ネットワーク越しのAPI呼び出しの待ち時間を再現"""
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _record_download(self, size):
+        """ダウンロード量を記録し、転送速度に応じた待ち時間を再現"""
+        self.bytes_downloaded += size
+        if self.bandwidth and size:
+            time.sleep(size / self.bandwidth)
+
+    def bucket(self, name):
+        """バケットを取得（なければ作成）"""
+        if name not in self._buckets:
+            self._buckets[name] = FakeBucket(self, name)
+        return self._buckets[name]
+
+    def put_object(self, bucket_name, object_name, data, content_encoding=None,
+                   content_type='text/csv'):
+        """
+        テスト用にオブジェクトを直接配置
+
+        Args:
+            bucket_name (str): バケット名
+            object_name (str): オブジェクト名
+            data (str|bytes): 内容
+            content_encoding (str, optional): Content-Encoding（例: gzip）
+            content_type (str): Content-Type
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.bucket(bucket_name)._put(object_name, data, content_type, content_encoding)
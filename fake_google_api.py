@@ -0,0 +1,672 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Google Sheets API / Drive APIのインメモリ代替実装
+service.spreadsheets()...execute() / drive.files().copy(...).execute() と同じ呼び出し方で、
+テンプレート作成・マスターシート作成をGoogleへ接続せずに動かす・計測するためのフェイク
+
+遅延（メソッドごと・ばらつき）、1分あたりの読み込み・書き込み上限（超えると429）、
+エラーの注入（指定した回数・一定の確率）を設定でき、retry_policy / quota を渡すと
+google_api_client と同じ再試行・計測・上限の調整（sheets_quota）を通して実行する
+"""
+
+import copy
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from google_api_client import RetryPolicy, execute_with_retry, is_idempotent_request
+from sheets_quota import READ, classify_method
+
+_A1_CELL = re.compile(r'^([A-Za-z]*)(\d*)$')
+
+
+def http_error(status, message, uri=None, retry_after=None):
+    """
+    googleapiclientと同じ形式のHttpErrorを作成
+
+    Args:
+        status (int): HTTPステータスコード
+        message (str): エラーメッセージ
+        uri (str, optional): リクエストURI
+        retry_after (float, optional): Retry-After ヘッダーの秒数
+
+    Returns:
+        HttpError: エラー
+    """
+    headers = {'status': status}
+    if retry_after is not None:
+        headers['retry-after'] = str(round(retry_after, 3))
+    resp = httplib2.Response(headers)
+    resp.reason = message
+    content = json.dumps({'error': {'code': status, 'message': message}}).encode('utf-8')
+    return HttpError(resp, content, uri=uri)
+
+
+def _column_index(letters):
+    """A1形式の列名を列番号（0始まり）に変換"""
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + (ord(letter) - ord('A') + 1)
+    return index - 1
+
+
+def parse_a1_range(a1_range):
+    """
+    A1形式の範囲を解析
+
+    Args:
+        a1_range (str): 'シート名!A1:J4' / 'シート名!A:J' / 'シート名' など
+
+    Returns:
+        tuple: (シート名, 開始行, 開始列, 終了行, 終了列)。行・列は0始まりで終了は含まない（Noneは端まで）
+    """
+    title, _, cells = a1_range.partition('!')
+    title = title.strip()
+    if len(title) >= 2 and title[0] == title[-1] == "'":
+        title = title[1:-1].replace("''", "'")
+    if not cells:
+        return title, 0, 0, None, None
+
+    start, _, end = cells.partition(':')
+    start_match = _A1_CELL.match(start)
+    end_match = _A1_CELL.match(end or start)
+    if start_match is None or end_match is None:
+        raise ValueError(f"範囲を解析できません: {a1_range}")
+
+    start_col, start_row = start_match.groups()
+    end_col, end_row = end_match.groups()
+    return (
+        title,
+        int(start_row) - 1 if start_row else 0,
+        _column_index(start_col) if start_col else 0,
+        int(end_row) if end_row else None,
+        _column_index(end_col) + 1 if end_col else None
+    )
+
+
+class FakeRequest:
+    """googleapiclient.http.HttpRequest の代替（execute() で処理を実行する）"""
+
+    def __init__(self, service, method, handler, body=None):
+        """
+        初期化
+
+        Args:
+            service (FakeSheetsService | FakeDriveService): 呼び出し元のサービス
+            method (str): メソッド名（'spreadsheets.create' など）
+            handler (callable): 実行する処理
+            body (dict, optional): リクエストの本文（冪等かどうかの判定に使う）
+        """
+        self.service = service
+        self.method = method
+        self.handler = handler
+        self.body = body
+
+    def execute(self, num_retries=0, idempotent=None):
+        """リクエストを実行（サービスに retry_policy があれば429・5xxを再試行する。非冪等なリクエストは429だけ）"""
+        if idempotent is None:
+            idempotent = is_idempotent_request(FakeSheetsService._method_id(self.method), self.body)
+        return self.service._execute(self.method, self.handler, idempotent=idempotent)
+
+
+class _FakeSheet:
+    """1枚のシート（値は行のリストで保持）"""
+
+    def __init__(self, sheet_id, title, row_count=1000, column_count=26):
+        self.sheet_id = sheet_id
+        self.title = title
+        self.row_count = row_count
+        self.column_count = column_count
+        self.rows = []
+        self.conditional_formats = []
+        self.requests = []
+
+    def write(self, start_row, start_col, values):
+        """指定位置から値を書き込む（APIと同じくシートの行数・列数を超える場合はエラー）"""
+        if start_row + len(values) > self.row_count or \
+                start_col + max((len(row) for row in values), default=0) > self.column_count:
+            raise http_error(400, f"Range ('{self.title}'!R{start_row + len(values)}) exceeds grid limits. "
+                                  f"Max rows: {self.row_count}, max columns: {self.column_count}")
+        for r, row in enumerate(values):
+            index = start_row + r
+            while len(self.rows) <= index:
+                self.rows.append([])
+            target = self.rows[index]
+            for c, value in enumerate(row):
+                column = start_col + c
+                while len(target) <= column:
+                    target.append('')
+                if value is not None:
+                    target[column] = value
+
+    def read(self, start_row, start_col, end_row, end_col):
+        """指定範囲の値を読み込む（APIと同じく末尾の空の行・セルは省く）"""
+        rows = self.rows[start_row:end_row]
+        values = []
+        for row in rows:
+            cells = row[start_col:end_col]
+            while cells and cells[-1] in ('', None):
+                cells = cells[:-1]
+            values.append(list(cells))
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def properties(self):
+        """シートのプロパティ"""
+        return {
+            'sheetId': self.sheet_id,
+            'title': self.title,
+            'gridProperties': {'rowCount': self.row_count, 'columnCount': self.column_count}
+        }
+
+
+class _FakeSpreadsheet:
+    """1つのスプレッドシート"""
+
+    def __init__(self, spreadsheet_id, title):
+        self.spreadsheet_id = spreadsheet_id
+        self.title = title
+        self.sheets = []
+
+    def add_sheet(self, properties):
+        """シートを追加（sheetIdの指定がなければ割り当てる）"""
+        sheet_id = properties.get('sheetId')
+        if sheet_id is None:
+            sheet_id = 0 if not self.sheets else max(s.sheet_id for s in self.sheets) + 1
+        if any(s.sheet_id == sheet_id for s in self.sheets):
+            raise http_error(400, f"Invalid requests: sheetId {sheet_id} は既に使われています")
+        grid = properties.get('gridProperties', {})
+        sheet = _FakeSheet(sheet_id, properties.get('title') or f'Sheet{len(self.sheets) + 1}',
+                           grid.get('rowCount', 1000), grid.get('columnCount', 26))
+        self.sheets.append(sheet)
+        return sheet
+
+    def sheet_by_title(self, title):
+        """シート名でシートを取得"""
+        for sheet in self.sheets:
+            if sheet.title == title:
+                return sheet
+        raise http_error(400, f"Unable to parse range: {title}")
+
+    def sheet_by_id(self, sheet_id):
+        """シートIDでシートを取得"""
+        for sheet in self.sheets:
+            if sheet.sheet_id == sheet_id:
+                return sheet
+        raise http_error(400, f"Invalid requests: No grid with id: {sheet_id}")
+
+    def resource(self):
+        """spreadsheets.get が返す形式"""
+        return {
+            'spreadsheetId': self.spreadsheet_id,
+            'properties': {'title': self.title},
+            'sheets': [{'properties': sheet.properties()} for sheet in self.sheets]
+        }
+
+
+def _cell_value(cell):
+    """CellDataの入力値（stringValue / numberValue など）を取り出す"""
+    entered = cell.get('userEnteredValue') or {}
+    for value in entered.values():
+        return value
+    return ''
+
+
+def _referenced_sheet_ids(value):
+    """リクエスト内で参照しているsheetIdをすべて求める"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == 'sheetId' and isinstance(item, int):
+                yield item
+            else:
+                yield from _referenced_sheet_ids(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _referenced_sheet_ids(item)
+
+
+class FakeSheetsService:
+    """Google Sheets APIサービス（build('sheets', 'v4')）のインメモリ代替"""
+
+    def __init__(self, latency=0.0, method_latency=None, jitter=0.0,
+                 read_quota_per_minute=None, write_quota_per_minute=None, quota_window=60.0,
+                 error_rate=0.0, error_status=503, retry_policy=None, metrics=None,
+                 quota=None, quota_user='fake-service-account', seed=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        """
+        初期化
+
+        Args:
+            latency (float): API呼び出し1回あたりの遅延（秒）
+            method_latency (dict, optional): メソッド名（'spreadsheets.create' など）ごとの遅延（秒）
+            jitter (float): 遅延のばらつき（0.2 なら ±20% の範囲で一様に散らす）
+            read_quota_per_minute (int, optional): quota_window 秒あたりの読み込み上限（超えると429）
+            write_quota_per_minute (int, optional): quota_window 秒あたりの書き込み上限（超えると429）
+            quota_window (float): 上限を数える期間（秒。ベンチマークでは短くして1分を縮めて再現する）
+            error_rate (float): 呼び出しが error_status で失敗する確率
+            error_status (int): error_rate で発生させるHTTPステータス
+            retry_policy (google_api_client.RetryPolicy, optional): 指定すると429・5xxを再試行する
+            metrics (google_api_client.ApiMetrics, optional): 呼び出し・再試行を記録する集計
+            quota (sheets_quota.SheetsQuotaTracker, optional): 呼び出し元の上限の集計（送信前に枠を確保する）
+            quota_user (str): quota で数えるユーザー
+            seed (int, optional): 遅延のばらつき・エラーの発生に使う乱数のシード
+            clock (callable): 単調増加する現在時刻（秒）を返す関数
+            sleep (callable): 遅延を入れる関数
+        """
+        self.latency = latency
+        self.method_latency = dict(method_latency or {})
+        self.jitter = jitter
+        self.quota_limits = {'read': read_quota_per_minute, 'write': write_quota_per_minute}
+        self.quota_window = quota_window
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_policy = retry_policy
+        self.metrics = metrics
+        self.quota = quota
+        self.quota_user = quota_user
+        self.clock = clock
+        self.sleep = sleep
+        self.calls = {}
+        self.errors = {}
+        self._quota_usage = {'read': deque(), 'write': deque()}
+        self._failures = {}
+        self._random = random.Random(seed)
+        self._spreadsheets = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    @property
+    def call_count(self):
+        """API呼び出しの合計回数（失敗した呼び出し・再試行を含む）"""
+        with self._lock:
+            return sum(self.calls.values())
+
+    @property
+    def error_count(self):
+        """エラーを返した呼び出しの合計回数"""
+        with self._lock:
+            return sum(self.errors.values())
+
+    def reset_counts(self):
+        """呼び出し回数・エラー回数をリセット"""
+        with self._lock:
+            self.calls = {}
+            self.errors = {}
+
+    def fail_next(self, method, status=503, count=1, retry_after=None):
+        """
+        指定したメソッドの次の呼び出しを失敗させる
+
+        Args:
+            method (str): メソッド名（'spreadsheets.create' / 'drive.files.copy' など）
+            status (int): 返すHTTPステータス
+            count (int): 失敗させる回数
+            retry_after (float, optional): エラーに付ける Retry-After の秒数
+        """
+        with self._lock:
+            self._failures.setdefault(method, deque()).extend([(status, retry_after)] * count)
+
+    def quota_usage(self):
+        """
+        直近 quota_window 秒の読み込み・書き込みの回数
+
+        Returns:
+            dict: read, write
+        """
+        with self._lock:
+            now = self.clock()
+            for kind in self._quota_usage:
+                self._expire(kind, now)
+            return {kind: len(usage) for kind, usage in self._quota_usage.items()}
+
+    def _expire(self, kind, now):
+        """上限を数える期間を過ぎた呼び出しを除く（呼び出し元でロック済み）"""
+        usage = self._quota_usage[kind]
+        while usage and now - usage[0] >= self.quota_window:
+            usage.popleft()
+
+    def _injected_error(self, method):
+        """この呼び出しで返すエラー（注入されたエラー・上限超過・確率的なエラー。呼び出し元でロック済み）"""
+        failures = self._failures.get(method)
+        if failures:
+            status, retry_after = failures.popleft()
+            return http_error(status, f"Injected error for {method}", retry_after=retry_after)
+
+        kind = classify_method(self._method_id(method))
+        if kind is not None:
+            limit = self.quota_limits[kind]
+            if limit is not None:
+                now = self.clock()
+                self._expire(kind, now)
+                usage = self._quota_usage[kind]
+                if len(usage) >= limit:
+                    metric = 'Read requests' if kind == READ else 'Write requests'
+                    return http_error(429, f"Quota exceeded for quota metric '{metric}' and limit "
+                                           f"'{metric} per minute per user' of service 'sheets.googleapis.com'",
+                                      retry_after=max(0.0, usage[0] + self.quota_window - now))
+                usage.append(now)
+
+        if self.error_rate > 0 and self._random.random() < self.error_rate:
+            return http_error(self.error_status, f"Injected error for {method}")
+        return None
+
+    def _delay(self, method, latency=None):
+        """この呼び出しの遅延（秒）"""
+        if latency is None:
+            latency = self.method_latency.get(method, self.latency)
+        if latency > 0 and self.jitter > 0:
+            with self._lock:
+                latency *= 1 + self.jitter * (2 * self._random.random() - 1)
+        return latency
+
+    def _call(self, method, handler, latency=None):
+        """
+        呼び出しを1回実行（記録し、遅延を入れてから注入したエラーを返すか処理を実行）
+
+        Args:
+            method (str): メソッド名
+            handler (callable): 実行する処理
+            latency (float, optional): 遅延（秒、既定は method_latency / latency）
+
+        Returns:
+            dict: レスポンス
+        """
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        delay = self._delay(method, latency)
+        if delay > 0:
+            self.sleep(delay)
+        with self._lock:
+            error = self._injected_error(method)
+            if error is None:
+                try:
+                    return handler()
+                except HttpError as e:
+                    error = e
+            self.errors[method] = self.errors.get(method, 0) + 1
+        raise error
+
+    @staticmethod
+    def _method_id(method):
+        """googleapiclientと同じ形式のメソッドID（'sheets.spreadsheets.create' / 'drive.files.copy'）"""
+        return method if method.startswith('drive.') else f'sheets.{method}'
+
+    def _execute(self, method, handler, latency=None, idempotent=None):
+        """リクエストを実行（retry_policy / quota があれば google_api_client と同じく再試行・計測・上限の調整をする）"""
+        def send():
+            return self._call(method, handler, latency)
+        if self.retry_policy is None and self.quota is None:
+            return send()
+        return execute_with_retry(self._method_id(method), send, self.retry_policy or RetryPolicy(max_retries=0),
+                                  self.metrics, self.quota, self.quota_user, idempotent)
+
+    def _spreadsheet(self, spreadsheet_id):
+        """スプレッドシートを取得（なければ404）"""
+        spreadsheet = self._spreadsheets.get(spreadsheet_id)
+        if spreadsheet is None:
+            raise http_error(404, f"Requested entity was not found: {spreadsheet_id}")
+        return spreadsheet
+
+    def _create_spreadsheet(self, body):
+        """スプレッドシートを作成（呼び出し元でロック済み）"""
+        spreadsheet_id = f'fake-sheet-{self._next_id:06d}'
+        self._next_id += 1
+        spreadsheet = _FakeSpreadsheet(spreadsheet_id, body.get('properties', {}).get('title', ''))
+        for sheet_body in body.get('sheets') or [{'properties': {}}]:
+            sheet = spreadsheet.add_sheet(sheet_body.get('properties', {}))
+            for grid in sheet_body.get('data', []):
+                values = [[_cell_value(cell) for cell in row.get('values', [])]
+                          for row in grid.get('rowData', [])]
+                sheet.write(grid.get('startRow', 0), grid.get('startColumn', 0), values)
+            sheet.conditional_formats.extend(sheet_body.get('conditionalFormats', []))
+        self._spreadsheets[spreadsheet_id] = spreadsheet
+        return spreadsheet
+
+    def _copy_spreadsheet(self, source_id, name=None):
+        """スプレッドシートを複製（呼び出し元でロック済み）"""
+        spreadsheet = copy.deepcopy(self._spreadsheet(source_id))
+        spreadsheet.spreadsheet_id = f'fake-sheet-{self._next_id:06d}'
+        self._next_id += 1
+        if name is not None:
+            spreadsheet.title = name
+        self._spreadsheets[spreadsheet.spreadsheet_id] = spreadsheet
+        return spreadsheet
+
+    def get_values(self, spreadsheet_id, a1_range):
+        """
+        保存されている値を取得（API呼び出しとして数えない確認用）
+
+        Args:
+            spreadsheet_id (str): スプレッドシートID
+            a1_range (str): A1形式の範囲
+
+        Returns:
+            list: 行のリスト
+        """
+        with self._lock:
+            title, start_row, start_col, end_row, end_col = parse_a1_range(a1_range)
+            sheet = self._spreadsheet(spreadsheet_id).sheet_by_title(title)
+            return sheet.read(start_row, start_col, end_row, end_col)
+
+    def get_title(self, spreadsheet_id):
+        """スプレッドシートのタイトルを取得（API呼び出しとして数えない確認用）"""
+        with self._lock:
+            return self._spreadsheet(spreadsheet_id).title
+
+    def spreadsheet_count(self):
+        """作成されたスプレッドシートの数"""
+        with self._lock:
+            return len(self._spreadsheets)
+
+    def spreadsheets(self):
+        """spreadsheets リソース"""
+        return _SpreadsheetsResource(self)
+
+
+class _SpreadsheetsResource:
+    """service.spreadsheets() の代替"""
+
+    def __init__(self, service):
+        self.service = service
+
+    def create(self, body=None, fields=None, **kwargs):
+        """spreadsheets.create"""
+        def handler():
+            spreadsheet = self.service._create_spreadsheet(body or {})
+            if fields == 'spreadsheetId':
+                return {'spreadsheetId': spreadsheet.spreadsheet_id}
+            return spreadsheet.resource()
+        return FakeRequest(self.service, 'spreadsheets.create', handler)
+
+    def get(self, spreadsheetId=None, ranges=None, includeGridData=False, fields=None, **kwargs):
+        """spreadsheets.get（includeGridData の場合は ranges のセルの値を formattedValue として返す）"""
+        def handler():
+            spreadsheet = self.service._spreadsheet(spreadsheetId)
+            resource = spreadsheet.resource()
+            if not includeGridData:
+                return resource
+            requested = {}
+            for a1_range in ranges or [sheet.title for sheet in spreadsheet.sheets]:
+                title, start_row, start_col, end_row, end_col = parse_a1_range(a1_range)
+                spreadsheet.sheet_by_title(title)
+                requested.setdefault(title, []).append((start_row, start_col, end_row, end_col))
+            sheets = []
+            for sheet_resource, sheet in zip(resource['sheets'], spreadsheet.sheets):
+                if sheet.title not in requested:
+                    continue
+                sheet_resource['data'] = [
+                    {
+                        'startRow': start_row,
+                        'startColumn': start_col,
+                        'rowData': [{'values': [{'formattedValue': str(value)} if value not in ('', None) else {}
+                                                for value in row]}
+                                    for row in sheet.read(start_row, start_col, end_row, end_col)]
+                    }
+                    for start_row, start_col, end_row, end_col in requested[sheet.title]
+                ]
+                sheets.append(sheet_resource)
+            resource['sheets'] = sheets
+            return resource
+        return FakeRequest(self.service, 'spreadsheets.get', handler)
+
+    def batchUpdate(self, spreadsheetId=None, body=None, **kwargs):
+        """spreadsheets.batchUpdate（addSheet / appendDimension / updateSheetProperties の行数・列数 / updateCells を反映し、
+        その他は参照先を検証して記録）"""
+        def handler():
+            spreadsheet = self.service._spreadsheet(spreadsheetId)
+            replies = []
+            for request in (body or {}).get('requests', []):
+                if 'addSheet' in request:
+                    sheet = spreadsheet.add_sheet(request['addSheet'].get('properties', {}))
+                    replies.append({'addSheet': {'properties': sheet.properties()}})
+                    continue
+                if 'appendDimension' in request:
+                    append = request['appendDimension']
+                    sheet = spreadsheet.sheet_by_id(append['sheetId'])
+                    if append.get('dimension') == 'COLUMNS':
+                        sheet.column_count += append['length']
+                    else:
+                        sheet.row_count += append['length']
+                    replies.append({})
+                    continue
+                if 'updateSheetProperties' in request:
+                    update = request['updateSheetProperties']
+                    properties = update.get('properties', {})
+                    sheet = spreadsheet.sheet_by_id(properties['sheetId'])
+                    grid = properties.get('gridProperties', {})
+                    fields = update.get('fields', '')
+                    if 'rowCount' in grid and ('gridProperties.rowCount' in fields or fields == '*'):
+                        sheet.row_count = grid['rowCount']
+                    if 'columnCount' in grid and ('gridProperties.columnCount' in fields or fields == '*'):
+                        sheet.column_count = grid['columnCount']
+                    sheet.requests.append(request)
+                    replies.append({})
+                    continue
+                if 'updateCells' in request:
+                    update = request['updateCells']
+                    start = update['start']
+                    spreadsheet.sheet_by_id(start['sheetId']).write(
+                        start.get('rowIndex', 0), start.get('columnIndex', 0),
+                        [[_cell_value(cell) for cell in row.get('values', [])] for row in update.get('rows', [])])
+                    replies.append({})
+                    continue
+                for sheet_id in set(_referenced_sheet_ids(request)):
+                    spreadsheet.sheet_by_id(sheet_id).requests.append(request)
+                replies.append({})
+            return {'spreadsheetId': spreadsheetId, 'replies': replies}
+        return FakeRequest(self.service, 'spreadsheets.batchUpdate', handler, body=body)
+
+    def values(self):
+        """spreadsheets.values リソース"""
+        return _ValuesResource(self.service)
+
+
+class _ValuesResource:
+    """service.spreadsheets().values() の代替"""
+
+    def __init__(self, service):
+        self.service = service
+
+    def _write(self, spreadsheet_id, a1_range, values):
+        """範囲に値を書き込み、更新結果を返す"""
+        title, start_row, start_col, _, _ = parse_a1_range(a1_range)
+        sheet = self.service._spreadsheet(spreadsheet_id).sheet_by_title(title)
+        sheet.write(start_row, start_col, values)
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'updatedRange': a1_range,
+            'updatedRows': len(values),
+            'updatedCells': sum(len(row) for row in values)
+        }
+
+    def get(self, spreadsheetId=None, range=None, **kwargs):
+        """spreadsheets.values.get"""
+        def handler():
+            title, start_row, start_col, end_row, end_col = parse_a1_range(range)
+            sheet = self.service._spreadsheet(spreadsheetId).sheet_by_title(title)
+            result = {'range': range, 'majorDimension': 'ROWS'}
+            values = sheet.read(start_row, start_col, end_row, end_col)
+            if values:
+                result['values'] = values
+            return result
+        return FakeRequest(self.service, 'spreadsheets.values.get', handler)
+
+    def update(self, spreadsheetId=None, range=None, valueInputOption=None, body=None, **kwargs):
+        """spreadsheets.values.update"""
+        def handler():
+            return self._write(spreadsheetId, range, (body or {}).get('values', []))
+        return FakeRequest(self.service, 'spreadsheets.values.update', handler)
+
+    def batchUpdate(self, spreadsheetId=None, body=None, **kwargs):
+        """spreadsheets.values.batchUpdate"""
+        def handler():
+            responses = [self._write(spreadsheetId, data['range'], data.get('values', []))
+                         for data in (body or {}).get('data', [])]
+            return {
+                'spreadsheetId': spreadsheetId,
+                'totalUpdatedCells': sum(r['updatedCells'] for r in responses),
+                'responses': responses
+            }
+        return FakeRequest(self.service, 'spreadsheets.values.batchUpdate', handler)
+
+    def append(self, spreadsheetId=None, range=None, valueInputOption=None, body=None, **kwargs):
+        """spreadsheets.values.append（範囲内の最後の行の次に追加）"""
+        def handler():
+            title, _, start_col, _, _ = parse_a1_range(range)
+            sheet = self.service._spreadsheet(spreadsheetId).sheet_by_title(title)
+            values = (body or {}).get('values', [])
+            start_row = len(sheet.read(0, 0, None, None))
+            # appendは行数が足りなければシートを広げる
+            sheet.row_count = max(sheet.row_count, start_row + len(values))
+            sheet.write(start_row, start_col, values)
+            return {'spreadsheetId': spreadsheetId,
+                    'updates': {'updatedRows': len(values),
+                                'updatedCells': sum(len(row) for row in values)}}
+        return FakeRequest(self.service, 'spreadsheets.values.append', handler)
+
+
+class FakeDriveService:
+    """Google Drive APIサービス（build('drive', 'v3')）のうちスプレッドシートのコピーだけの代替"""
+
+    def __init__(self, sheets_service, latency=None):
+        """
+        初期化
+
+        Args:
+            sheets_service (FakeSheetsService): コピー対象のスプレッドシートを保持するフェイク
+            latency (float, optional): API呼び出し1回あたりの遅延（秒、既定はSheetsと同じ）
+        """
+        self.sheets_service = sheets_service
+        self.latency = latency
+
+    def _execute(self, method, handler, idempotent=None):
+        """リクエストを実行（遅延・エラーの注入・再試行はSheetsのフェイクの設定に従う）"""
+        return self.sheets_service._execute(method, handler, self.latency, idempotent)
+
+    def files(self):
+        """files リソース"""
+        return _FilesResource(self)
+
+
+class _FilesResource:
+    """drive.files() の代替"""
+
+    def __init__(self, drive):
+        self.drive = drive
+
+    def copy(self, fileId=None, body=None, fields=None, **kwargs):
+        """files.copy（コピーの呼び出し回数はSheetsのフェイクに 'drive.files.copy' として記録する）"""
+        sheets = self.drive.sheets_service
+
+        def handler():
+            spreadsheet = sheets._copy_spreadsheet(fileId, (body or {}).get('name'))
+            return {'id': spreadsheet.spreadsheet_id, 'name': spreadsheet.title}
+        return FakeRequest(self.drive, 'drive.files.copy', handler)
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Google API（Sheets / Drive）クライアントの共通生成処理
+認証情報とディスカバリードキュメントを1回だけ読み込んで共有し、
+429・5xxの応答はジッター付きの指数バックオフで再試行する
+（作成・コピー・行の追加を含む batchUpdate など、再送すると結果が変わるリクエストは
+処理されていないことが確実な429だけを再試行する）
+メソッドごとの呼び出し回数・再試行回数・所要時間の分布は ApiMetrics に記録する
+Sheets APIの呼び出しは送信前に sheets_quota の共有の集計で1分あたりの上限を確認する
+
+使い方:
+    factory = get_client_factory('service-account.json')
+    sheets = factory.sheets()
+    ...
+    factory.metrics.print_report()
+"""
+
+import functools
+import json
+import random
+import threading
+import time
+
+import httplib2
+from google.oauth2.service_account import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from sheets_quota import classify_method, get_quota_tracker
+
+DEFAULT_SCOPES = ('https://www.googleapis.com/auth/spreadsheets',
+                  'https://www.googleapis.com/auth/drive')
+
+# 再試行するHTTPステータス（429: 上限超過 / 5xx: 一時的なサーバーエラー）
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# 再送すると重複して作成されるメソッド（5xx・接続エラーでは処理済みの可能性があるため再試行しない）
+NON_IDEMPOTENT_METHODS = frozenset({'sheets.spreadsheets.create', 'sheets.spreadsheets.values.append',
+                                    'drive.files.copy'})
+# batchUpdate のうち、再送すると結果が変わるリクエストの種類（追加・挿入や位置を指定した削除・移動）
+NON_IDEMPOTENT_BATCH_PREFIXES = ('add', 'append', 'insert', 'duplicate')
+NON_IDEMPOTENT_BATCH_REQUESTS = frozenset({'deleteDimension', 'deleteRange', 'moveDimension', 'cutPaste'})
+# 非冪等なメソッドでも再試行するHTTPステータス（429: 上限超過で処理されていない）
+NON_IDEMPOTENT_RETRYABLE_STATUSES = frozenset({429})
+
+# 所要時間の分布の区切り（ミリ秒）
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_credentials_cache = {}
+_document_cache = {}
+_factories = {}
+_cache_lock = threading.Lock()
+
+
+def is_idempotent_request(method, body=None):
+    """
+    再送しても結果が変わらないリクエストか
+
+    Args:
+        method (str): メソッドID（'sheets.spreadsheets.batchUpdate' など）
+        body (dict, optional): リクエストの本文（batchUpdate は含まれるリクエストの種類で判定する）
+
+    Returns:
+        bool: 冪等な場合True
+    """
+    if method in NON_IDEMPOTENT_METHODS:
+        return False
+    if method == 'sheets.spreadsheets.batchUpdate' and body:
+        for request in body.get('requests') or []:
+            for kind in request:
+                if kind.startswith(NON_IDEMPOTENT_BATCH_PREFIXES) or kind in NON_IDEMPOTENT_BATCH_REQUESTS:
+                    return False
+    return True
+
+
+class RetryPolicy:
+    """再試行の設定（ジッター付き指数バックオフ）"""
+
+    def __init__(self, max_retries=5, base_delay=1.0, max_delay=32.0,
+                 retryable_statuses=RETRYABLE_STATUSES, sleep=time.sleep, rand=random.random,
+                 non_idempotent_methods=NON_IDEMPOTENT_METHODS):
+        """
+        初期化
+
+        Args:
+            max_retries (int): 最大再試行回数
+            base_delay (float): 1回目の再試行の待ち時間の上限（秒）
+            max_delay (float): 待ち時間の上限（秒）
+            retryable_statuses (frozenset): 再試行するHTTPステータス
+            sleep (callable): 待機する関数
+            rand (callable): 0以上1未満の乱数を返す関数
+            non_idempotent_methods (frozenset): 429だけを再試行するメソッドID
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable_statuses = retryable_statuses
+        self.sleep = sleep
+        self.rand = rand
+        self.non_idempotent_methods = non_idempotent_methods
+
+    def delay(self, attempt, retry_after=None):
+        """
+        再試行までの待ち時間
+
+        Args:
+            attempt (int): 何回目の再試行か（0始まり）
+            retry_after (float, optional): サーバーが指定した待ち時間（Retry-After）
+
+        Returns:
+            float: 待ち時間（秒）。上限までの範囲で一様に散らす（full jitter）
+        """
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return self.rand() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def is_retryable(self, error, method=None, idempotent=None):
+        """
+        再試行すべきエラーか
+
+        Args:
+            error (Exception): 発生したエラー
+            method (str, optional): メソッドID（非冪等なメソッドは429だけを再試行する）
+            idempotent (bool, optional): リクエストごとの指定（Noneの場合はメソッドIDで判定）
+
+        Returns:
+            bool: 再試行する場合True
+        """
+        if idempotent is None:
+            idempotent = method not in self.non_idempotent_methods
+        if not idempotent:
+            return (isinstance(error, HttpError)
+                    and error.resp.status in self.retryable_statuses & NON_IDEMPOTENT_RETRYABLE_STATUSES)
+        if isinstance(error, HttpError):
+            return error.resp.status in self.retryable_statuses
+        # 接続の切断・タイムアウト
+        return isinstance(error, (ConnectionError, TimeoutError, httplib2.HttpLib2Error))
+
+
+class ApiMetrics:
+    """メソッドごとの呼び出し回数・エラー・再試行・所要時間の分布（スレッドセーフ）"""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        """
+        初期化
+
+        Args:
+            buckets_ms (tuple): 所要時間の分布の区切り（ミリ秒、昇順）
+        """
+        self.buckets_ms = tuple(buckets_ms)
+        self._methods = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, method):
+        """メソッドの集計（なければ作成。呼び出し元でロック済み）"""
+        entry = self._methods.get(method)
+        if entry is None:
+            entry = {
+                'calls': 0,
+                'errors': 0,
+                'retries': 0,
+                'statuses': {},
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'histogram': [0] * (len(self.buckets_ms) + 1)
+            }
+            self._methods[method] = entry
+        return entry
+
+    def record_retry(self, method, status):
+        """
+        再試行を記録
+
+        Args:
+            method (str): メソッドID（'sheets.spreadsheets.create' など）
+            status (int): 再試行の原因になったHTTPステータス（接続エラーの場合None）
+        """
+        with self._lock:
+            entry = self._entry(method)
+            entry['retries'] += 1
+            key = str(status) if status is not None else 'connection'
+            entry['statuses'][key] = entry['statuses'].get(key, 0) + 1
+
+    def record_call(self, method, seconds, error=None):
+        """
+        1回の呼び出し（再試行を含む）を記録
+
+        Args:
+            method (str): メソッドID
+            seconds (float): 所要時間（秒、再試行の待ち時間を含む）
+            error (Exception, optional): 最終的に失敗した場合のエラー
+        """
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            entry = self._entry(method)
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            index = next((i for i, bound in enumerate(self.buckets_ms) if elapsed_ms <= bound),
+                         len(self.buckets_ms))
+            entry['histogram'][index] += 1
+            if error is not None:
+                entry['errors'] += 1
+                status = getattr(getattr(error, 'resp', None), 'status', None)
+                key = str(status) if status is not None else type(error).__name__
+                entry['statuses'][key] = entry['statuses'].get(key, 0) + 1
+
+    def snapshot(self):
+        """
+        集計結果を取得
+
+        Returns:
+            dict: メソッドIDをキーとした calls, errors, retries, statuses, avg_ms, max_ms,
+                histogram（区切りのラベルをキーとした件数）
+        """
+        labels = [f'<={bound}ms' for bound in self.buckets_ms] + [f'>{self.buckets_ms[-1]}ms']
+        with self._lock:
+            return {
+                method: {
+                    'calls': entry['calls'],
+                    'errors': entry['errors'],
+                    'retries': entry['retries'],
+                    'statuses': dict(entry['statuses']),
+                    'avg_ms': round(entry['total_ms'] / entry['calls'], 2) if entry['calls'] else 0.0,
+                    'max_ms': round(entry['max_ms'], 2),
+                    'histogram': dict(zip(labels, entry['histogram']))
+                }
+                for method, entry in sorted(self._methods.items())
+            }
+
+    def total_calls(self):
+        """全メソッドの呼び出し回数の合計"""
+        with self._lock:
+            return sum(entry['calls'] for entry in self._methods.values())
+
+    def reset(self):
+        """集計をリセット"""
+        with self._lock:
+            self._methods = {}
+
+    def print_report(self):
+        """集計結果を表示"""
+        snapshot = self.snapshot()
+        if not snapshot:
+            print("📊 Google API呼び出し: なし")
+            return
+        print("📊 Google API呼び出し（メソッド別）")
+        for method, stats in snapshot.items():
+            histogram = ' '.join(f"{label}:{count}" for label, count in stats['histogram'].items() if count)
+            print(f"   - {method}: {stats['calls']}回（エラー{stats['errors']}回・再試行{stats['retries']}回）"
+                  f" 平均{stats['avg_ms']:.0f}ms / 最大{stats['max_ms']:.0f}ms [{histogram}]")
+
+
+def _retry_after_seconds(error):
+    """Retry-After ヘッダーの秒数（なければNone）"""
+    if not isinstance(error, HttpError):
+        return None
+    value = error.resp.get('retry-after')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def execute_with_retry(method, send, retry_policy, metrics=None, quota=None, quota_user=None, idempotent=None):
+    """
+    リクエストを送信（429・5xx・接続エラーは retry_policy に従って再試行し、metrics に記録する。
+    作成・コピーなど非冪等なメソッドは429だけを再試行する）
+
+    quota を指定すると、Sheets APIのメソッドは送信（再試行を含む）のたびに上限の枠を確保し、
+    429が返った場合は quota に記録して上限を下げる
+
+    Args:
+        method (str): メソッドID（'sheets.spreadsheets.create' など）
+        send (callable): 1回分のリクエストを送信してレスポンスを返す関数
+        retry_policy (RetryPolicy): 再試行の設定
+        metrics (ApiMetrics, optional): 呼び出しを記録する集計
+        quota (sheets_quota.SheetsQuotaTracker, optional): 1分あたりの上限の集計
+        quota_user (str, optional): 上限を数えるユーザー（サービスアカウントのメールアドレスなど）
+        idempotent (bool, optional): 再送しても結果が変わらないか（Noneの場合はメソッドIDで判定。
+            Falseの場合は429だけを再試行する）
+
+    Returns:
+        dict: レスポンス
+    """
+    kind = classify_method(method) if quota is not None else None
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        if kind is not None:
+            quota.acquire(kind, quota_user)
+        try:
+            response = send()
+        except Exception as e:
+            if kind is not None and getattr(getattr(e, 'resp', None), 'status', None) == 429:
+                quota.record_throttled(kind, _retry_after_seconds(e))
+            if attempt < retry_policy.max_retries and retry_policy.is_retryable(e, method, idempotent):
+                if metrics is not None:
+                    metrics.record_retry(method, getattr(getattr(e, 'resp', None), 'status', None))
+                retry_policy.sleep(retry_policy.delay(attempt, _retry_after_seconds(e)))
+                attempt += 1
+                continue
+            if metrics is not None:
+                metrics.record_call(method, time.perf_counter() - started, error=e)
+            raise
+        if kind is not None:
+            quota.record_success(kind)
+        if metrics is not None:
+            metrics.record_call(method, time.perf_counter() - started)
+        return response
+
+
+class InstrumentedHttpRequest(HttpRequest):
+    """再試行と計測を行う HttpRequest（build の requestBuilder として使う）"""
+
+    def __init__(self, *args, metrics=None, retry_policy=None, quota=None, quota_user=None, **kwargs):
+        """
+        初期化
+
+        Args:
+            metrics (ApiMetrics, optional): 呼び出しを記録する集計
+            retry_policy (RetryPolicy, optional): 再試行の設定
+            quota (sheets_quota.SheetsQuotaTracker, optional): 1分あたりの上限の集計
+            quota_user (str, optional): 上限を数えるユーザー
+            その他の引数は HttpRequest と同じ
+        """
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.quota = quota
+        self.quota_user = quota_user
+
+    def execute(self, http=None, num_retries=0, idempotent=None):
+        """
+        リクエストを実行（429・5xx・接続エラーは再試行する。非冪等なリクエストは429だけ）
+
+        Args:
+            http (optional): 使用するhttplib2.Http
+            num_retries (int): 互換性のための引数（再試行回数は retry_policy に従う）
+            idempotent (bool, optional): 再送しても結果が変わらないか（Noneの場合はメソッドIDと本文で判定）
+
+        Returns:
+            dict: レスポンス
+        """
+        method = self.methodId or f'{self.method} {self.uri}'
+        if idempotent is None:
+            idempotent = is_idempotent_request(method, self._json_body())
+        return execute_with_retry(method, lambda: super(InstrumentedHttpRequest, self).execute(http=http, num_retries=0),
+                                  self.retry_policy, self.metrics, self.quota, self.quota_user, idempotent)
+
+    def _json_body(self):
+        """リクエストの本文（JSONでない・空の場合はNone）"""
+        if not self.body:
+            return None
+        try:
+            body = json.loads(self.body)
+        except (TypeError, ValueError):
+            return None
+        return body if isinstance(body, dict) else None
+
+
+def load_credentials(credentials_file, scopes=DEFAULT_SCOPES):
+    """
+    サービスアカウントの認証情報を読み込む（同じファイル・スコープは1回だけ読み込む）
+
+    Args:
+        credentials_file (str): サービスアカウントの認証ファイル
+        scopes (tuple): スコープ
+
+    Returns:
+        google.oauth2.service_account.Credentials: 認証情報
+    """
+    key = (credentials_file, tuple(scopes))
+    with _cache_lock:
+        credentials = _credentials_cache.get(key)
+        if credentials is None:
+            credentials = Credentials.from_service_account_file(credentials_file, scopes=list(scopes))
+            _credentials_cache[key] = credentials
+        return credentials
+
+
+def load_discovery_document(api, version):
+    """
+    ディスカバリードキュメントを取得（ライブラリ同梱のものを1回だけ読み込む）
+
+    Args:
+        api (str): 'sheets' / 'drive'
+        version (str): 'v4' / 'v3'
+
+    Returns:
+        str: ディスカバリードキュメント（JSON）
+    """
+    key = (api, version)
+    with _cache_lock:
+        document = _document_cache.get(key)
+        if document is None:
+            document = discovery_cache.get_static_doc(api, version)
+            if document is None:
+                raise ValueError(f"ディスカバリードキュメントが見つかりません: {api} {version}")
+            _document_cache[key] = document
+        return document
+
+
+class GoogleApiClientFactory:
+    """認証情報・ディスカバリードキュメント・集計を共有してAPIサービスを作成するクラス"""
+
+    def __init__(self, credentials_file=None, credentials=None, scopes=DEFAULT_SCOPES,
+                 retry_policy=None, metrics=None, timeout=60, quota=None):
+        """
+        初期化
+
+        Args:
+            credentials_file (str, optional): サービスアカウントの認証ファイル
+            credentials (optional): 読み込み済みの認証情報（指定した場合は credentials_file より優先）
+            scopes (tuple): スコープ
+            retry_policy (RetryPolicy, optional): 再試行の設定
+            metrics (ApiMetrics, optional): 呼び出しの集計（省略時は新規作成）
+            timeout (int): 1回のHTTPリクエストのタイムアウト（秒）
+            quota (sheets_quota.SheetsQuotaTracker, optional): 上限の集計（省略時はプロセス全体で共有のもの）
+        """
+        self.credentials_file = credentials_file
+        self.scopes = tuple(scopes)
+        self._credentials = credentials
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.metrics = metrics if metrics is not None else ApiMetrics()
+        self.timeout = timeout
+        self.quota = quota if quota is not None else get_quota_tracker()
+
+    @property
+    def credentials(self):
+        """認証情報（初回のみ読み込む）"""
+        if self._credentials is None:
+            self._credentials = load_credentials(self.credentials_file, self.scopes)
+        return self._credentials
+
+    @property
+    def quota_user(self):
+        """上限を数えるユーザー（サービスアカウントのメールアドレス、なければ認証ファイル）"""
+        return getattr(self.credentials, 'service_account_email', None) or self.credentials_file
+
+    def build(self, api, version):
+        """
+        APIサービスを作成
+
+        httplib2.Http はスレッドセーフではないため、サービスごとに別のHTTP接続を使う
+        （認証情報・ディスカバリードキュメントは共有する）
+
+        Args:
+            api (str): 'sheets' / 'drive'
+            version (str): 'v4' / 'v3'
+
+        Returns:
+            googleapiclient.discovery.Resource: APIサービス
+        """
+        http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.timeout))
+        request_builder = functools.partial(InstrumentedHttpRequest, metrics=self.metrics,
+                                            retry_policy=self.retry_policy, quota=self.quota,
+                                            quota_user=self.quota_user)
+        return build_from_document(load_discovery_document(api, version), http=http,
+                                   requestBuilder=request_builder)
+
+    def sheets(self):
+        """Google Sheets API（v4）サービスを作成"""
+        return self.build('sheets', 'v4')
+
+    def drive(self):
+        """Google Drive API（v3）サービスを作成"""
+        return self.build('drive', 'v3')
+
+
+def get_client_factory(credentials_file, scopes=DEFAULT_SCOPES):
+    """
+    認証ファイルごとに共有のファクトリーを取得
+
+    Args:
+        credentials_file (str): サービスアカウントの認証ファイル
+        scopes (tuple): スコープ
+
+    Returns:
+        GoogleApiClientFactory: ファクトリー（同じ認証ファイルでは同じインスタンス）
+    """
+    key = (credentials_file, tuple(scopes))
+    with _cache_lock:
+        factory = _factories.get(key)
+        if factory is None:
+            factory = GoogleApiClientFactory(credentials_file, scopes=scopes)
+            _factories[key] = factory
+        return factory
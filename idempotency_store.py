@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cloud Storage上の小さな状態オブジェクトで送信の重複を防ぐ冪等性ストア
+Cloud Schedulerのリトライで同じ予定が二重にSlackへ送られるのを防ぐ
+
+状態オブジェクト: gs://BUCKET/PREFIX/YYYY-MM-DD/<キー>.json
+（古い状態オブジェクトはバケットのライフサイクルルールで削除する想定）
+"""
+
+import hashlib
+import json
+import time
+
+STATUS_PENDING = 'pending'
+STATUS_SUCCESS = 'success'
+STATUS_FAILED = 'failed'
+
+
+def _is_precondition_failed(error):
+    """if_generation_matchの条件を満たさなかったエラー（HTTP 412）か"""
+    return getattr(error, 'code', None) == 412
+
+
+def content_hash(blob):
+    """
+    オブジェクトの内容を表すハッシュをメタデータだけで求める
+
+    Args:
+        blob: メタデータ取得済みのBlob（存在しない場合None）
+
+    Returns:
+        str: MD5（なければCRC32C、generation）。オブジェクトがない場合は 'none'
+    """
+    if blob is None:
+        return 'none'
+    return blob.md5_hash or getattr(blob, 'crc32c', None) or f"generation:{blob.generation}"
+
+
+class IdempotencyClaim:
+    """送信権の取得結果"""
+
+    def __init__(self, status, key, object_name, generation=None, record=None):
+        """
+        初期化
+
+        Args:
+            status (str): 'claimed'（送信してよい） / 'done'（送信済み） / 'in_progress'（他の実行が送信中）
+            key (str): 冪等性キー
+            object_name (str): 状態オブジェクト名
+            generation (int, optional): 取得した状態オブジェクトのgeneration
+            record (dict, optional): 保存されている状態
+        """
+        self.status = status
+        self.key = key
+        self.object_name = object_name
+        self.generation = generation
+        self.record = record or {}
+
+
+class IdempotencyStore:
+    """バケット内の状態オブジェクトで送信済みかどうかを管理するクラス"""
+
+    def __init__(self, bucket, prefix='idempotency', lease_seconds=300, clock=time.time):
+        """
+        初期化
+
+        Args:
+            bucket: Cloud Storageのバケット（google.cloud.storage.Bucket または fake_gcs.FakeBucket）
+            prefix (str): 状態オブジェクトのプレフィックス
+            lease_seconds (int): 送信中の状態を他の実行が引き継げるようになるまでの秒数
+            clock (callable): 現在時刻（UNIX秒）を返す関数
+        """
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+
+    @staticmethod
+    def make_key(date, channel, content_digest):
+        """
+        冪等性キーを作成
+
+        Args:
+            date (str): 対象日付
+            channel (str): 送信先チャンネル
+            content_digest (str): 読み込み元オブジェクトの内容ハッシュ
+
+        Returns:
+            str: キー（SHA-256の16進文字列）
+        """
+        return hashlib.sha256(f"{date}\n{channel}\n{content_digest}".encode('utf-8')).hexdigest()
+
+    def object_name(self, key, date):
+        """状態オブジェクト名を求める"""
+        return f"{self.prefix}/{date}/{key}.json"
+
+    def _read(self, object_name):
+        """状態オブジェクトを読み込む（ない場合は (None, 0)）"""
+        blob = self.bucket.get_blob(object_name)
+        if blob is None:
+            return None, 0
+        return json.loads(blob.download_as_bytes(if_generation_match=blob.generation)), blob.generation
+
+    def _write(self, object_name, record, if_generation_match):
+        """状態オブジェクトを条件付きで書き込み、新しいgenerationを返す"""
+        blob = self.bucket.blob(object_name)
+        blob.upload_from_string(json.dumps(record, ensure_ascii=False),
+                                content_type='application/json',
+                                if_generation_match=if_generation_match)
+        return blob.generation
+
+    def claim(self, date, channel, content_digest, details=None):
+        """
+        送信権を取得
+
+        状態オブジェクトを新規作成のみ（if_generation_match=0）で書き込み、
+        成功した実行だけが送信する。既に存在する場合は保存済みの状態を返す。
+        送信中のまま lease_seconds を過ぎた状態や失敗した状態は引き継ぐ。
+
+        Args:
+            date (str): 対象日付
+            channel (str): 送信先チャンネル
+            content_digest (str): 読み込み元オブジェクトの内容ハッシュ
+            details (dict, optional): 状態に一緒に記録する情報
+
+        Returns:
+            IdempotencyClaim: 取得結果
+        """
+        key = self.make_key(date, channel, content_digest)
+        object_name = self.object_name(key, date)
+        now = self.clock()
+        record = dict(details or {}, key=key, date=date, channel=channel,
+                      content_hash=content_digest, status=STATUS_PENDING,
+                      started_at=now, updated_at=now)
+
+        try:
+            generation = self._write(object_name, record, if_generation_match=0)
+            return IdempotencyClaim('claimed', key, object_name, generation, record)
+        except Exception as e:
+            if not _is_precondition_failed(e):
+                raise
+
+        existing, generation = self._read(object_name)
+        if existing is None:
+            # 読み込む前に削除された場合は改めて作成を試みる
+            return self.claim(date, channel, content_digest, details)
+        if existing.get('status') == STATUS_SUCCESS:
+            return IdempotencyClaim('done', key, object_name, generation, existing)
+        lease_expired = now - existing.get('updated_at', 0) >= self.lease_seconds
+        if existing.get('status') == STATUS_PENDING and not lease_expired:
+            return IdempotencyClaim('in_progress', key, object_name, generation, existing)
+
+        # 失敗・期限切れの状態を引き継ぐ（同時に引き継ごうとした他の実行とは1つだけが成功する）
+        # 途中まで送信済みの場合は送信済みの件数も引き継ぎ、続きから送る
+        if existing.get('parts_sent'):
+            record['parts_sent'] = existing['parts_sent']
+        try:
+            generation = self._write(object_name, record, if_generation_match=generation)
+            return IdempotencyClaim('claimed', key, object_name, generation, record)
+        except Exception as e:
+            if not _is_precondition_failed(e):
+                raise
+            return IdempotencyClaim('in_progress', key, object_name, generation, existing)
+
+    def _finish(self, claim, status, **fields):
+        """
+        取得した送信権の状態を更新
+
+        Returns:
+            bool: 更新できた場合True（他の実行に引き継がれていた場合False）
+        """
+        record = dict(claim.record, status=status, updated_at=self.clock(), **fields)
+        try:
+            claim.generation = self._write(claim.object_name, record, if_generation_match=claim.generation)
+            claim.record = record
+            return True
+        except Exception as e:
+            if not _is_precondition_failed(e):
+                raise
+            print(f"⚠️ 送信状態が他の実行に引き継がれていたため更新しませんでした: {claim.object_name}")
+            return False
+
+    def record_progress(self, claim, parts_sent):
+        """
+        分割したメッセージの送信済みの件数を記録（リトライはこの続きから送る。リースも延長される）
+
+        Args:
+            claim (IdempotencyClaim): claimで取得した送信権
+            parts_sent (int): 送信済みのメッセージの件数
+
+        Returns:
+            bool: 記録できた場合True（他の実行に引き継がれていた場合False）
+        """
+        return self._finish(claim, STATUS_PENDING, parts_sent=parts_sent)
+
+    def complete(self, claim, result):
+        """
+        送信成功を記録（以降の同じキーの呼び出しはこの結果を返す）
+
+        Args:
+            claim (IdempotencyClaim): claimで取得した送信権
+            result (dict): 呼び出し元に返した結果
+        """
+        self._finish(claim, STATUS_SUCCESS, result=result)
+
+    def fail(self, claim, error):
+        """
+        送信失敗を記録（次のリトライがすぐに送信権を引き継げる）
+
+        Args:
+            claim (IdempotencyClaim): claimで取得した送信権
+            error (str): エラー内容
+        """
+        self._finish(claim, STATUS_FAILED, error=error)
@@ -7,43 +7,104 @@
 
 import os
 import json
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+import time
 from googleapiclient.errors import HttpError
+from google_api_client import get_client_factory
 
 class MasterAggregationSheetCreator:
     """マスター集約シート作成クラス"""
     
-    def __init__(self, credentials_file):
-        """初期化"""
+    def __init__(self, credentials_file, service=None):
+        """
+        初期化
+        
+        Args:
+            credentials_file (str): サービスアカウントの認証ファイル
+            service (optional): 構築済みのSheets APIサービス（フェイクを使う場合など）
+        """
         self.credentials_file = credentials_file
-        self.service = self._setup_service()
+        self.client_factory = None
+        self.service = service if service is not None else self._setup_service()
+        # 直近のマスターシート作成のAPI呼び出し回数と所要時間
+        self.api_calls = 0
+        self.last_stats = None
     
     def _setup_service(self):
-        """Google Sheets API サービスを設定"""
+        """Google Sheets API サービスを設定（認証情報・ディスカバリードキュメントは共有のファクトリーで再利用）"""
         try:
-            # 認証情報を読み込み
-            creds = Credentials.from_service_account_file(
-                self.credentials_file,
-                scopes=['https://www.googleapis.com/auth/spreadsheets',
-                        'https://www.googleapis.com/auth/drive']
-            )
-            
-            # Google Sheets API サービスを構築
-            service = build('sheets', 'v4', credentials=creds)
-            return service
+            self.client_factory = get_client_factory(self.credentials_file)
+            return self.client_factory.sheets()
             
         except Exception as e:
             print(f"❌ 認証エラー: {e}")
             return None
     
-    def create_master_sheet(self):
+    # シートの構成（シートIDは作成時に明示し、書式設定のリクエストから参照する）
+    SHEETS = [
+        {
+            'sheet_id': 0,
+            'title': 'config',
+            'row_count': 100,
+            'headers': [
+                'employee_id', 'employee_name', 'spreadsheet_id', 'store', 'role',
+                'slack_webhook_url', 'notification_time', 'status', 'last_updated', 'notes'
+            ],
+            # サンプルデータ
+            'rows': [
+                ['EID-001', '山田太郎', '', '東京', '販売', '', '10:00', 'Active', '', ''],
+                ['EID-002', '佐藤花子', '', '大阪', '受付', '', '10:00', 'Active', '', ''],
+                ['EID-003', '田中一郎', '', '名古屋', '事務', '', '10:00', 'Active', '', '']
+            ],
+            'header_color': {'red': 0.2, 'green': 0.6, 'blue': 0.8}
+        },
+        {
+            'sheet_id': 1,
+            'title': 'aggregated_shifts',
+            'row_count': 1000,
+            'headers': [
+                'date', 'store', 'employee_id', 'employee_name', 'role',
+                'start_time', 'end_time', 'break_min', 'shift_type', 'notes',
+                'manager', 'approved_at', 'source_spreadsheet_id', 'created_at', 'updated_at'
+            ],
+            'rows': [],
+            'header_color': {'red': 0.8, 'green': 0.4, 'blue': 0.2}
+        },
+        {
+            'sheet_id': 2,
+            'title': 'logs',
+            'row_count': 1000,
+            'headers': [
+                'timestamp', 'action', 'employee_id', 'status', 'message',
+                'spreadsheet_id', 'records_processed', 'error_details', 'execution_time', 'notes'
+            ],
+            'rows': [],
+            'header_color': {'red': 0.2, 'green': 0.2, 'blue': 0.2}
+        }
+    ]
+    
+    def _execute(self, request):
+        """APIリクエストを実行して呼び出し回数を記録"""
+        self.api_calls += 1
+        return request.execute()
+    
+    def create_master_sheet(self, include_sample_rows=True):
         """
         マスター集約用スプレッドシートを作成
         
+        全シートのヘッダー・サンプルデータは1回の values().batchUpdate、
+        ヘッダー行の書式は1回の batchUpdate にまとめる（API呼び出しは計3回）。
+        所要時間と呼び出し回数は self.last_stats に記録する。
+        
+        Args:
+            include_sample_rows (bool): configシートにサンプルの従業員を書き込むか
+                （従業員を config_sheet_registrar で登録する場合はFalse）
+        
         Returns:
             str: 作成されたスプレッドシートのID
         """
+        self.api_calls = 0
+        self.last_stats = None
+        started = time.perf_counter()
         try:
             # 新しいスプレッドシートを作成
             spreadsheet_body = {
@@ -53,48 +114,45 @@ class MasterAggregationSheetCreator:
                 'sheets': [
                     {
                         'properties': {
-                            'title': 'config',
-                            'gridProperties': {
-                                'rowCount': 100,
-                                'columnCount': 10
-                            }
-                        }
-                    },
-                    {
-                        'properties': {
-                            'title': 'aggregated_shifts',
+                            'sheetId': sheet['sheet_id'],
+                            'title': sheet['title'],
                             'gridProperties': {
-                                'rowCount': 1000,
-                                'columnCount': 15
-                            }
-                        }
-                    },
-                    {
-                        'properties': {
-                            'title': 'logs',
-                            'gridProperties': {
-                                'rowCount': 1000,
-                                'columnCount': 10
+                                'rowCount': sheet['row_count'],
+                                'columnCount': len(sheet['headers'])
                             }
                         }
                     }
+                    for sheet in self.SHEETS
                 ]
             }
             
             # スプレッドシートを作成
-            spreadsheet = self.service.spreadsheets().create(
-                body=spreadsheet_body
-            ).execute()
+            spreadsheet = self._execute(self.service.spreadsheets().create(
+                body=spreadsheet_body,
+                fields='spreadsheetId'
+            ))
             
             spreadsheet_id = spreadsheet['spreadsheetId']
             print(f"✅ マスタースプレッドシートを作成しました: {spreadsheet_id}")
             
-            # 各シートの設定
-            self._setup_config_sheet(spreadsheet_id)
-            self._setup_aggregated_shifts_sheet(spreadsheet_id)
-            self._setup_logs_sheet(spreadsheet_id)
+            # 各シートのヘッダー・サンプルデータを一括で書き込み
+            self._execute(self.service.spreadsheets().values().batchUpdate(
+                spreadsheetId=spreadsheet_id,
+                body={
+                    'valueInputOption': 'RAW',
+                    'data': self._build_value_ranges(include_sample_rows)
+                }
+            ))
+            
+            # 各シートのヘッダー行の書式を一括で設定
+            self._execute(self.service.spreadsheets().batchUpdate(
+                spreadsheetId=spreadsheet_id,
+                body={'requests': self._build_format_requests()}
+            ))
             
+            self._record_stats(started)
             print(f"✅ マスターシートの設定が完了しました")
+            print(f"⏱️ 所要時間: {self.last_stats['seconds']:.2f}秒 / API呼び出し: {self.api_calls}回")
             print(f"📋 スプレッドシートURL: https://docs.google.com/spreadsheets/d/{spreadsheet_id}")
             
             return spreadsheet_id
@@ -105,138 +163,74 @@ class MasterAggregationSheetCreator:
         except Exception as e:
             print(f"❌ マスターシート作成エラー: {e}")
             return None
+        finally:
+            # 失敗した場合もそこまでの呼び出し回数と時間を残す
+            if self.last_stats is None:
+                self._record_stats(started)
     
-    def _setup_config_sheet(self, spreadsheet_id):
-        """設定シートをセットアップ"""
-        # ヘッダー行
-        headers = [
-            'employee_id', 'employee_name', 'spreadsheet_id', 'store', 'role',
-            'slack_webhook_url', 'notification_time', 'status', 'last_updated', 'notes'
-        ]
-        
-        # ヘッダーを設定
-        self.service.spreadsheets().values().update(
-            spreadsheetId=spreadsheet_id,
-            range='config!A1:J1',
-            valueInputOption='RAW',
-            body={'values': [headers]}
-        ).execute()
-        
-        # サンプルデータ
-        sample_data = [
-            ['EID-001', '山田太郎', '', '東京', '販売', '', '10:00', 'Active', '', ''],
-            ['EID-002', '佐藤花子', '', '大阪', '受付', '', '10:00', 'Active', '', ''],
-            ['EID-003', '田中一郎', '', '名古屋', '事務', '', '10:00', 'Active', '', '']
-        ]
-        
-        self.service.spreadsheets().values().update(
-            spreadsheetId=spreadsheet_id,
-            range='config!A2:J4',
-            valueInputOption='RAW',
-            body={'values': sample_data}
-        ).execute()
-        
-        # ヘッダー行の書式設定
-        requests = [{
-            'repeatCell': {
-                'range': {
-                    'sheetId': 0,
-                    'startRowIndex': 0,
-                    'endRowIndex': 1
-                },
-                'cell': {
-                    'userEnteredFormat': {
-                        'backgroundColor': {'red': 0.2, 'green': 0.6, 'blue': 0.8},
-                        'textFormat': {'bold': True, 'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}}
-                    }
-                },
-                'fields': 'userEnteredFormat(backgroundColor,textFormat)'
-            }
-        }]
-        
-        self.service.spreadsheets().batchUpdate(
-            spreadsheetId=spreadsheet_id,
-            body={'requests': requests}
-        ).execute()
+    def _record_stats(self, started):
+        """直近のマスターシート作成のAPI呼び出し回数と所要時間を記録"""
+        self.last_stats = {
+            'api_calls': self.api_calls,
+            'seconds': time.perf_counter() - started
+        }
     
-    def _setup_aggregated_shifts_sheet(self, spreadsheet_id):
-        """集約シフトシートをセットアップ"""
-        # ヘッダー行
-        headers = [
-            'date', 'store', 'employee_id', 'employee_name', 'role',
-            'start_time', 'end_time', 'break_min', 'shift_type', 'notes',
-            'manager', 'approved_at', 'source_spreadsheet_id', 'created_at', 'updated_at'
-        ]
-        
-        # ヘッダーを設定
-        self.service.spreadsheets().values().update(
-            spreadsheetId=spreadsheet_id,
-            range='aggregated_shifts!A1:O1',
-            valueInputOption='RAW',
-            body={'values': [headers]}
-        ).execute()
+    @staticmethod
+    def _column_letter(index):
+        """列番号（0始まり）をA1形式の列名に変換"""
+        letters = ''
+        index += 1
+        while index:
+            index, remainder = divmod(index - 1, 26)
+            letters = chr(ord('A') + remainder) + letters
+        return letters
+    
+    def _build_value_ranges(self, include_sample_rows=True):
+        """
+        全シートのヘッダー・サンプルデータの書き込み範囲を作成
         
-        # ヘッダー行の書式設定
-        requests = [{
-            'repeatCell': {
-                'range': {
-                    'sheetId': 1,
-                    'startRowIndex': 0,
-                    'endRowIndex': 1
-                },
-                'cell': {
-                    'userEnteredFormat': {
-                        'backgroundColor': {'red': 0.8, 'green': 0.4, 'blue': 0.2},
-                        'textFormat': {'bold': True, 'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}}
-                    }
-                },
-                'fields': 'userEnteredFormat(backgroundColor,textFormat)'
-            }
-        }]
+        Args:
+            include_sample_rows (bool): サンプルデータを含めるか
         
-        self.service.spreadsheets().batchUpdate(
-            spreadsheetId=spreadsheet_id,
-            body={'requests': requests}
-        ).execute()
+        Returns:
+            list: values().batchUpdate の data
+        """
+        value_ranges = []
+        for sheet in self.SHEETS:
+            values = [sheet['headers']] + (sheet['rows'] if include_sample_rows else [])
+            last_column = self._column_letter(len(sheet['headers']) - 1)
+            value_ranges.append({
+                'range': f"{sheet['title']}!A1:{last_column}{len(values)}",
+                'values': values
+            })
+        return value_ranges
     
-    def _setup_logs_sheet(self, spreadsheet_id):
-        """ログシートをセットアップ"""
-        # ヘッダー行
-        headers = [
-            'timestamp', 'action', 'employee_id', 'status', 'message',
-            'spreadsheet_id', 'records_processed', 'error_details', 'execution_time', 'notes'
-        ]
-        
-        # ヘッダーを設定
-        self.service.spreadsheets().values().update(
-            spreadsheetId=spreadsheet_id,
-            range='logs!A1:J1',
-            valueInputOption='RAW',
-            body={'values': [headers]}
-        ).execute()
+    def _build_format_requests(self):
+        """
+        全シートのヘッダー行の書式設定リクエストを作成
         
-        # ヘッダー行の書式設定
-        requests = [{
-            'repeatCell': {
-                'range': {
-                    'sheetId': 2,
-                    'startRowIndex': 0,
-                    'endRowIndex': 1
-                },
-                'cell': {
-                    'userEnteredFormat': {
-                        'backgroundColor': {'red': 0.2, 'green': 0.2, 'blue': 0.2},
-                        'textFormat': {'bold': True, 'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}}
-                    }
-                },
-                'fields': 'userEnteredFormat(backgroundColor,textFormat)'
+        Returns:
+            list: batchUpdate の requests
+        """
+        return [
+            {
+                'repeatCell': {
+                    'range': {
+                        'sheetId': sheet['sheet_id'],
+                        'startRowIndex': 0,
+                        'endRowIndex': 1
+                    },
+                    'cell': {
+                        'userEnteredFormat': {
+                            'backgroundColor': sheet['header_color'],
+                            'textFormat': {'bold': True, 'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}}
+                        }
+                    },
+                    'fields': 'userEnteredFormat(backgroundColor,textFormat)'
+                }
             }
-        }]
-        
-        self.service.spreadsheets().batchUpdate(
-            spreadsheetId=spreadsheet_id,
-            body={'requests': requests}
-        ).execute()
+            for sheet in self.SHEETS
+        ]
 
 def main():
     """メイン実行関数"""
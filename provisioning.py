@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+従業員テンプレートの並列作成エンジン
+複数のワーカーでテンプレートを同時に作成する
+（Sheets APIの上限を超えないための調整は、各ワーカーのAPI呼び出しが sheets_quota の共有の集計で行う）
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_WORKERS = 4
+
+
+class ProvisioningResult:
+    """1人分のテンプレート作成結果"""
+
+    def __init__(self, employee, sheet_id, api_calls=0, seconds=0.0):
+        """
+        初期化
+
+        Args:
+            employee (dict): 従業員情報（id, name, store）
+            sheet_id (str): 作成されたスプレッドシートID（失敗した場合None）
+            api_calls (int): API呼び出し回数
+            seconds (float): 所要時間（秒）
+        """
+        self.employee = employee
+        self.sheet_id = sheet_id
+        self.api_calls = api_calls
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        """作成に成功したか"""
+        return self.sheet_id is not None
+
+
+class ParallelProvisioner:
+    """従業員テンプレートを複数ワーカーで並列に作成するクラス"""
+
+    def __init__(self, creator_factory, workers=DEFAULT_WORKERS, quota=None,
+                 progress_interval=5.0, progress_every=None):
+        """
+        初期化
+
+        Args:
+            creator_factory (callable): EmployeeShiftTemplateCreator を作成する関数（verbose を受け取る）。
+                googleapiclientのサービスはスレッドセーフではないため、ワーカーごとに1つ作成する
+            workers (int): 同時に作成する数
+            quota (sheets_quota.SheetsQuotaTracker, optional): API呼び出しが使う上限の集計（進捗に待ち時間を表示する）
+            progress_interval (float): 進捗を表示する間隔（秒）
+            progress_every (int, optional): この件数ごとにも進捗を表示（既定は全体の10%ごと）
+        """
+        self.creator_factory = creator_factory
+        self.workers = max(1, workers)
+        self.quota = quota
+        self.progress_interval = progress_interval
+        self.progress_every = progress_every
+        self._local = threading.local()
+
+    def _creator(self):
+        """このワーカーのテンプレート作成器を取得（初回のみ作成）"""
+        creator = getattr(self._local, 'creator', None)
+        if creator is None:
+            creator = self.creator_factory(verbose=False)
+            self._local.creator = creator
+        return creator
+
+    def _provision_one(self, employee):
+        """1人分のテンプレートを作成"""
+        creator = self._creator()
+        sheet_id = creator.create_employee_template(employee['id'], employee['name'], employee['store'])
+        stats = creator.last_stats or {}
+        return ProvisioningResult(employee, sheet_id, stats.get('api_calls', 0), stats.get('seconds', 0.0))
+
+    def provision(self, employees, on_result=None, total=None, collect_results=True):
+        """
+        従業員全員のテンプレートを作成
+
+        employees はジェネレーターでもよい。同時に読み進めるのはワーカー数の2倍までなので、
+        名簿を少しずつ読み込みながら作成できる
+
+        Args:
+            employees (iterable): 従業員情報（id, name, store）
+            on_result (callable, optional): 1人分が終わるたびに ProvisioningResult を渡して呼ぶ関数
+                （呼び出し元のスレッドで順番に呼ばれる）
+            total (int, optional): 全体の人数（進捗表示用。employees がリストなら省略可）
+            collect_results (bool): Falseの場合は結果を保持せず件数だけを返す
+                （on_result で1人ずつ処理する場合に、人数に比例してメモリを使わないようにする）
+
+        Returns:
+            list: ProvisioningResult のリスト（employees と同じ順序）。
+                collect_results=False の場合は dict: succeeded, failed, api_calls
+        """
+        if total is None and hasattr(employees, '__len__'):
+            total = len(employees)
+        results = []
+        submitted = api_calls = 0
+        every = self.progress_every or (max(1, total // 10) if total else 100)
+        started = time.perf_counter()
+        last_report = started
+        done = failed = 0
+        source = iter(employees)
+        max_pending = self.workers * 2
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='provision') as executor:
+            pending = {}
+
+            def submit_more():
+                """処理待ちがmax_pendingになるまで次の従業員を投入"""
+                nonlocal submitted
+                while len(pending) < max_pending:
+                    employee = next(source, None)
+                    if employee is None:
+                        return
+                    pending[executor.submit(self._provision_one, employee)] = (submitted, employee)
+                    submitted += 1
+                    if collect_results:
+                        results.append(None)
+
+            submit_more()
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index, employee = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"❌ {employee['name']} のテンプレート作成中にエラーが発生しました: {e}")
+                        result = ProvisioningResult(employee, None)
+                    if collect_results:
+                        results[index] = result
+                    if on_result is not None:
+                        on_result(result)
+                    done += 1
+                    api_calls += result.api_calls
+                    if not result.ok:
+                        failed += 1
+                        print(f"❌ {result.employee['name']} のテンプレート作成に失敗しました")
+
+                    now = time.perf_counter()
+                    if done % every == 0 or now - last_report >= self.progress_interval:
+                        last_report = now
+                        self._print_progress(done, failed, total, now - started)
+                submit_more()
+
+        if done and done % every != 0:
+            self._print_progress(done, failed, total, time.perf_counter() - started)
+        if not collect_results:
+            return {'succeeded': done - failed, 'failed': failed, 'api_calls': api_calls}
+        return results
+
+    def _print_progress(self, done, failed, total, elapsed):
+        """進捗を表示"""
+        rate = done / elapsed if elapsed > 0 else 0.0
+        if total:
+            remaining = (total - done) / rate if rate > 0 else 0.0
+            message = (f"📈 進捗: {done}/{total}件（{done / total * 100:.0f}%）失敗{failed}件 / "
+                       f"{rate:.1f}件/秒 / 残り約{remaining:.0f}秒")
+        else:
+            message = f"📈 進捗: {done}件 失敗{failed}件 / {rate:.1f}件/秒"
+        if self.quota is not None:
+            message += f" / 上限のための待ち: {self.quota.waited_seconds:.1f}秒"
+        print(message)
+
+
+def summarize(results, elapsed):
+    """
+    作成結果を集計
+
+    Args:
+        results (list | dict): ProvisioningResult のリスト、または provision(collect_results=False) が返した件数
+        elapsed (float): 全体の所要時間（秒）
+
+    Returns:
+        dict: succeeded, failed, api_calls, seconds, per_second（1秒あたりの作成数）
+    """
+    if isinstance(results, dict):
+        counts = results
+    else:
+        succeeded = sum(1 for r in results if r.ok)
+        counts = {
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'api_calls': sum(r.api_calls for r in results)
+        }
+    return dict(counts, seconds=elapsed,
+                per_second=counts['succeeded'] / elapsed if elapsed > 0 else 0.0)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+スケジュールCSVを日付（または月）ごとのオブジェクトに分割してCloud Storageへ公開するツール
+Cloud Functionは今日の分の小さなオブジェクトだけを読めばよくなる
+
+レイアウト:
+    gs://BUCKET/PREFIX/2025-07-01.csv   （--granularity day）
+    gs://BUCKET/PREFIX/2025-07.csv      （--granularity month）
+    gs://BUCKET/PREFIX/manifest.json    （各パーティションのSHA-256・行数など）
+
+内容のハッシュがマニフェストと一致するパーティションは再アップロードしない。
+マニフェストは公開処理の差分計算と排他のためのもので、Cloud Functionは参照しない
+（読み込み側はパーティションのオブジェクト名から直接読み、オブジェクトがなければ予定なしとみなす）。
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import socket
+import sys
+from datetime import datetime, timedelta
+
+MANIFEST_NAME = 'manifest.json'
+GRANULARITIES = ('day', 'month')
+
+# 公開中の印（publishing）がこの時間より古い場合は、中断した公開処理とみなして引き継ぐ
+CLAIM_TIMEOUT = timedelta(minutes=30)
+
+
+class PublishConflictError(Exception):
+    """別の公開処理がマニフェストを更新中・更新済みのため公開を中止した場合のエラー"""
+
+
+def _is_precondition_failed(error):
+    """if_generation_match の条件を満たさなかったエラー（HTTP 412）か"""
+    return getattr(error, 'code', None) == 412
+
+
+def partition_key(date, granularity='day'):
+    """
+    日付からパーティションのキーを求める
+
+    Args:
+        date (str): 日付（YYYY-MM-DD形式）
+        granularity (str): 'day' または 'month'
+
+    Returns:
+        str: パーティションのキー（YYYY-MM-DD または YYYY-MM）
+    """
+    return date if granularity == 'day' else date[:7]
+
+
+def partition_object_name(prefix, key):
+    """
+    パーティションのオブジェクト名を求める（cloud_function_main と同じ命名規則）
+
+    Args:
+        prefix (str): オブジェクト名のプレフィックス
+        key (str): パーティションのキー
+
+    Returns:
+        str: オブジェクト名
+    """
+    return f"{prefix.strip('/')}/{key}.csv"
+
+
+class SchedulePartitionPublisher:
+    """スケジュールCSVを分割して差分アップロードするクラス"""
+
+    def __init__(self, bucket_name, prefix='schedule', granularity='day', client=None):
+        """
+        初期化
+
+        Args:
+            bucket_name (str): 公開先のバケット名
+            prefix (str): パーティションを置くプレフィックス
+            granularity (str): 'day'（日ごと）または 'month'（月ごと）
+            client: Cloud Storageクライアント（省略時は google.cloud.storage.Client）
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity は {GRANULARITIES} のいずれかを指定してください: {granularity}")
+        self.bucket_name = bucket_name
+        self.prefix = prefix.strip('/')
+        self.granularity = granularity
+        if client is None:
+            from google.cloud import storage
+            client = storage.Client()
+        self.bucket = client.bucket(bucket_name)
+
+    @property
+    def manifest_name(self):
+        """マニフェストのオブジェクト名"""
+        return f"{self.prefix}/{MANIFEST_NAME}"
+
+    def build_partitions(self, csv_file):
+        """
+        CSVをパーティションごとの内容に分割
+
+        各パーティションはヘッダー行＋元の順序のままの行で構成する。
+
+        Args:
+            csv_file (str): マスターのスケジュールCSVのパス
+
+        Returns:
+            dict: パーティションのキーをキーとした (CSVのバイト列, 行数)
+        """
+        with open(csv_file, encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            date_index = header.index('日付')
+            grouped = {}
+            for row in reader:
+                if len(row) <= date_index or not row[date_index]:
+                    continue
+                grouped.setdefault(partition_key(row[date_index], self.granularity), []).append(row)
+
+        partitions = {}
+        for key, rows in grouped.items():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            writer.writerow(header)
+            writer.writerows(rows)
+            partitions[key] = (buffer.getvalue().encode('utf-8'), len(rows))
+        return partitions
+
+    def load_manifest(self):
+        """
+        公開済みのマニフェストを取得
+
+        Returns:
+            tuple: (マニフェストの辞書, generation)。未公開の場合は ({}, 0)
+        """
+        blob = self.bucket.get_blob(self.manifest_name)
+        if blob is None:
+            return {}, 0
+        manifest = json.loads(blob.download_as_bytes(if_generation_match=blob.generation))
+        return manifest, blob.generation
+
+    def _claim_manifest(self, manifest, manifest_generation):
+        """
+        パーティションに触る前に、マニフェストに公開中の印を付けて排他する
+
+        読み込んだ時点のgenerationを条件に書き込むため、同時に別の公開処理が走った場合は
+        どちらか一方だけが成功する。印の付いたマニフェストは既存のパーティション情報をそのまま残す。
+
+        Args:
+            manifest (dict): 読み込んだマニフェスト
+            manifest_generation (int): 読み込んだ時点のgeneration（未公開は0）
+
+        Returns:
+            int: 印を付けたマニフェストのgeneration
+
+        Raises:
+            PublishConflictError: 別の公開処理が実行中、または先にマニフェストを更新した場合
+        """
+        claim = manifest.get('publishing')
+        if claim:
+            started_at = datetime.fromisoformat(claim['started_at'])
+            if datetime.now() - started_at < CLAIM_TIMEOUT:
+                raise PublishConflictError(
+                    f"別の公開処理が実行中です（{claim.get('owner')}、{claim['started_at']}開始）")
+            print(f"⚠️ {claim['started_at']}に開始された公開処理が完了していないため引き継ぎます")
+
+        claimed = dict(manifest, publishing={
+            'owner': f"{socket.gethostname()}:{os.getpid()}",
+            'started_at': datetime.now().isoformat(timespec='seconds')
+        })
+        blob = self.bucket.blob(self.manifest_name)
+        try:
+            blob.upload_from_string(json.dumps(claimed, ensure_ascii=False, indent=2, sort_keys=True),
+                                    content_type='application/json',
+                                    if_generation_match=manifest_generation)
+        except Exception as e:
+            if _is_precondition_failed(e):
+                raise PublishConflictError("マニフェストが別の公開処理によって更新されたため中止しました") from e
+            raise
+        return blob.generation
+
+    def publish(self, csv_file, dry_run=False, prune=True):
+        """
+        変更のあったパーティションだけをアップロードしてマニフェストを更新
+
+        パーティションのアップロード・削除の前に、読み込んだ時点のgenerationを条件として
+        マニフェストに公開中の印を付ける。同時に別の公開処理が走った場合は、印を付けられなかった側が
+        パーティションに触る前に PublishConflictError で中止する。最後のマニフェストの書き込みも
+        印を付けた時点のgenerationを条件にする。
+
+        Args:
+            csv_file (str): マスターのスケジュールCSVのパス
+            dry_run (bool): Trueの場合はアップロードせず差分だけを返す
+            prune (bool): CSVからなくなったパーティションを削除するか
+
+        Returns:
+            dict: uploaded / unchanged / deleted のキー一覧と転送バイト数
+
+        Raises:
+            PublishConflictError: 別の公開処理と競合した場合
+        """
+        partitions = self.build_partitions(csv_file)
+        manifest, manifest_generation = self.load_manifest()
+        previous = manifest.get('partitions', {}) if manifest.get('granularity') == self.granularity else {}
+        # 粒度を変えた場合は旧パーティションをすべて削除対象にする
+        stale_objects = {entry['object'] for entry in manifest.get('partitions', {}).values()}
+
+        entries = {}
+        uploaded, unchanged = [], []
+        uploads = []
+        uploaded_bytes = 0
+        for key in sorted(partitions):
+            data, row_count = partitions[key]
+            digest = hashlib.sha256(data).hexdigest()
+            object_name = partition_object_name(self.prefix, key)
+            stale_objects.discard(object_name)
+            entry = {
+                'object': object_name,
+                'sha256': digest,
+                'rows': row_count,
+                'bytes': len(data)
+            }
+            old = previous.get(key)
+            if old is not None and old.get('sha256') == digest:
+                entry['generation'] = old.get('generation')
+                unchanged.append(key)
+            else:
+                uploads.append((entry, data))
+                uploaded.append(key)
+                uploaded_bytes += len(data)
+            entries[key] = entry
+
+        deleted = sorted(stale_objects) if prune else []
+        if not dry_run and (uploaded or deleted or not manifest):
+            # パーティションに触る前に排他する（競合した場合はここで中止し、何も変更しない）
+            claim_generation = self._claim_manifest(manifest, manifest_generation)
+
+            for entry, data in uploads:
+                blob = self.bucket.blob(entry['object'])
+                blob.upload_from_string(data, content_type='text/csv; charset=utf-8')
+                entry['generation'] = blob.generation
+
+            for object_name in deleted:
+                try:
+                    self.bucket.blob(object_name).delete()
+                except Exception as e:
+                    print(f"⚠️ 古いパーティションを削除できませんでした ({object_name}): {e}")
+
+            new_manifest = {
+                'version': 1,
+                'granularity': self.granularity,
+                'source': os.path.basename(csv_file),
+                'published_at': datetime.now().isoformat(timespec='seconds'),
+                'partitions': entries
+            }
+            try:
+                self.bucket.blob(self.manifest_name).upload_from_string(
+                    json.dumps(new_manifest, ensure_ascii=False, indent=2, sort_keys=True),
+                    content_type='application/json',
+                    if_generation_match=claim_generation
+                )
+            except Exception as e:
+                if _is_precondition_failed(e):
+                    raise PublishConflictError(
+                        "公開中に別の公開処理がマニフェストを引き継いだため、マニフェストを更新しませんでした") from e
+                raise
+
+        return {
+            'uploaded': uploaded,
+            'unchanged': unchanged,
+            'deleted': deleted,
+            'uploaded_bytes': uploaded_bytes
+        }
+
+
+def main():
+    """メイン実行関数"""
+    parser = argparse.ArgumentParser(description='スケジュールCSVを日付別オブジェクトとしてCloud Storageに公開')
+    parser.add_argument('csv_file', help='マスターのスケジュールCSVのパス')
+    parser.add_argument('--bucket', default=os.environ.get('BUCKET_NAME'), help='公開先のバケット名（既定: 環境変数 BUCKET_NAME）')
+    parser.add_argument('--prefix', default=os.environ.get('PARTITION_PREFIX', 'schedule'), help='パーティションのプレフィックス')
+    parser.add_argument('--granularity', choices=GRANULARITIES,
+                        default=os.environ.get('PARTITION_GRANULARITY', 'day'), help='分割の単位')
+    parser.add_argument('--dry-run', action='store_true', help='アップロードせずに差分だけ表示')
+    parser.add_argument('--no-prune', action='store_true', help='CSVからなくなったパーティションを削除しない')
+    args = parser.parse_args()
+
+    if not args.bucket:
+        parser.error('--bucket または環境変数 BUCKET_NAME を指定してください')
+
+    print("=" * 60)
+    print("📦 スケジュールのパーティション公開")
+    print("=" * 60)
+    print(f"📁 CSV: {args.csv_file}")
+    print(f"🪣 公開先: gs://{args.bucket}/{args.prefix.strip('/')}/（{args.granularity}単位）")
+
+    publisher = SchedulePartitionPublisher(args.bucket, args.prefix, args.granularity)
+    try:
+        result = publisher.publish(args.csv_file, dry_run=args.dry_run, prune=not args.no_prune)
+    except PublishConflictError as e:
+        print(f"❌ {e}")
+        print("💡 別の公開処理が終わってから、もう一度実行してください")
+        sys.exit(1)
+
+    label = '（ドライラン）' if args.dry_run else ''
+    print(f"📤 アップロード{label}: {len(result['uploaded'])}件 / {result['uploaded_bytes']:,}バイト")
+    for key in result['uploaded']:
+        print(f"   - {key}")
+    print(f"✅ 変更なし: {len(result['unchanged'])}件")
+    if result['deleted']:
+        print(f"🗑️ 削除{label}: {len(result['deleted'])}件")
+    print("💡 Cloud Functionには環境変数 PARTITION_PREFIX / PARTITION_GRANULARITY を設定してください")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+従業員名簿（CSV / JSONL）の読み込み
+数万行の名簿を一定の件数ずつ読み込み、テンプレート作成に渡す
+（全行をまとめて読み込まない。.gz / .zst の圧縮ファイルもそのまま読める）
+
+CSVの列名: employee_id（または id, 従業員ID）, employee_name（または name, 名前, 従業員名）,
+           store（または 店舗, 店舗名）
+JSONLの各行: {"employee_id": "...", "employee_name": "...", "store": "..."}（列名はCSVと同じ別名も可）
+"""
+
+import csv
+import json
+import os
+
+from schedule_codec import open_schedule_file
+
+DEFAULT_CHUNK_SIZE = 500
+
+# 名簿の列名（先頭が正式名、以降は別名）
+FIELD_ALIASES = {
+    'id': ('employee_id', 'id', '従業員ID'),
+    'name': ('employee_name', 'name', '名前', '従業員名'),
+    'store': ('store', '店舗', '店舗名')
+}
+
+_JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+
+
+def _roster_format(path):
+    """ファイル名（圧縮の拡張子を除く）から 'jsonl' / 'csv' を判定"""
+    name = path.lower()
+    for extension in ('.gz', '.gzip', '.zst', '.zstd'):
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+            break
+    return 'jsonl' if name.endswith(_JSONL_EXTENSIONS) else 'csv'
+
+
+def _normalize(record):
+    """
+    名簿の1行を従業員情報に変換
+
+    Args:
+        record (dict): CSV / JSONLの1行
+
+    Returns:
+        dict: id, name, store（必須項目が欠けている場合None）
+    """
+    employee = {}
+    for field, aliases in FIELD_ALIASES.items():
+        value = next((record[alias] for alias in aliases if record.get(alias) not in (None, '')), None)
+        if value is None:
+            return None
+        employee[field] = str(value).strip()
+    return employee if all(employee.values()) else None
+
+
+def load_provisioned_ids(config_file):
+    """
+    設定ファイルに登録済みの従業員IDを取得
+
+    Args:
+        config_file (str): shift_automation_config.json のパス
+
+    Returns:
+        set: 従業員IDの集合（ファイルがない・読めない場合は空）
+    """
+    if not config_file or not os.path.exists(config_file):
+        return set()
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ 設定ファイルを読み込めないため、登録済みの従業員を除外できません: {e}")
+        return set()
+    return {employee['employee_id'] for employee in config.get('employees', []) if employee.get('employee_id')}
+
+
+class RosterImporter:
+    """従業員名簿を一定件数ずつ読み込むクラス"""
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE, exclude_ids=None):
+        """
+        初期化
+
+        Args:
+            path (str): 名簿ファイルのパス（.csv / .jsonl、.gz / .zst で圧縮も可）
+            chunk_size (int): 1回に読み込む従業員数
+            exclude_ids (set, optional): 読み飛ばす従業員ID（作成済みの従業員など）
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size は1以上を指定してください")
+        self.path = path
+        self.chunk_size = chunk_size
+        self.exclude_ids = set(exclude_ids or ())
+        self.rows_read = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.excluded = 0
+        self.imported = 0
+
+    def _records(self):
+        """名簿の行を1行ずつ読み込む"""
+        with open_schedule_file(self.path) as f:
+            if _roster_format(self.path) == 'jsonl':
+                for line_number, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"⚠️ 名簿の{line_number}行目をJSONとして読み込めないため無視します")
+                        record = None
+                    yield record if isinstance(record, dict) else {}
+            else:
+                for record in csv.DictReader(f):
+                    yield {key.strip(): value for key, value in record.items() if key is not None}
+
+    def chunks(self):
+        """
+        名簿を chunk_size 件ずつ読み込む
+
+        同じ従業員IDが名簿内で重複している場合は最初の行だけを使い、
+        exclude_ids に含まれる従業員は読み飛ばす
+
+        Yields:
+            list: 従業員情報（id, name, store）のリスト
+        """
+        seen = set()
+        chunk = []
+        for record in self._records():
+            self.rows_read += 1
+            employee = _normalize(record)
+            if employee is None:
+                self.invalid += 1
+                continue
+            if employee['id'] in self.exclude_ids:
+                self.excluded += 1
+                continue
+            if employee['id'] in seen:
+                self.duplicates += 1
+                continue
+            seen.add(employee['id'])
+            chunk.append(employee)
+            if len(chunk) >= self.chunk_size:
+                self.imported += len(chunk)
+                yield chunk
+                chunk = []
+        if chunk:
+            self.imported += len(chunk)
+            yield chunk
+
+    def summary(self):
+        """
+        読み込み結果の集計
+
+        Returns:
+            dict: rows_read, imported, excluded（登録済み）, duplicates（名簿内の重複）, invalid（必須項目の欠け）
+        """
+        return {
+            'rows_read': self.rows_read,
+            'imported': self.imported,
+            'excluded': self.excluded,
+            'duplicates': self.duplicates,
+            'invalid': self.invalid
+        }
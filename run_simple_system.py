@@ -14,6 +14,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from csv_direct_slack import CSVToSlackDirect
 from simple_auto_scheduler import SimpleAutoScheduler
+from schedule_watcher import ScheduleState
 from config import SLACK_WEBHOOK_URL, CSV_FILE, SLACK_CHANNEL, NOTIFICATION_TIME
 
 class SimpleSystemManager:
@@ -22,6 +23,9 @@ class SimpleSystemManager:
     def __init__(self):
         """初期化"""
         self.slack_sender = CSVToSlackDirect(SLACK_WEBHOOK_URL)
+        # 手動送信と自動スケジューラーで同じインメモリスケジュールを共有
+        self.schedule_state = ScheduleState(CSV_FILE)
+        self.slack_sender.attach_schedule_state(self.schedule_state)
         self.csv_file = CSV_FILE
         self.slack_channel = SLACK_CHANNEL
         self.notification_time = NOTIFICATION_TIME
@@ -107,7 +111,8 @@ class SimpleSystemManager:
             scheduler = SimpleAutoScheduler(
                 slack_webhook_url=SLACK_WEBHOOK_URL,
                 csv_file=self.csv_file,
-                channel=self.slack_channel
+                channel=self.slack_channel,
+                schedule_state=self.schedule_state
             )
             
             scheduler.start_daily_scheduler(self.notification_time)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+圧縮されたスケジュールCSV（gzip / zstd）の判定・展開
+ローカルファイルとCloud Storageの両方から、拡張子またはContent-Encodingで形式を判定し
+ストリーミングで展開しながら読み込む
+
+zstdの読み書きには zstandard パッケージが必要（pip install zstandard）。
+"""
+
+import gzip
+import io
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+
+_EXTENSIONS = {
+    '.gz': GZIP,
+    '.gzip': GZIP,
+    '.zst': ZSTD,
+    '.zstd': ZSTD
+}
+_CONTENT_ENCODINGS = {
+    'gzip': GZIP,
+    'x-gzip': GZIP,
+    'zstd': ZSTD
+}
+
+
+def detect_codec(name, content_encoding=None):
+    """
+    ファイル名・Content-Encodingから圧縮形式を判定
+
+    Args:
+        name (str): ファイル名またはオブジェクト名
+        content_encoding (str, optional): Content-Encoding
+
+    Returns:
+        str: 'gzip' / 'zstd'。圧縮されていない場合None
+    """
+    codec = _CONTENT_ENCODINGS.get((content_encoding or '').strip().lower())
+    if codec is not None:
+        return codec
+    lowered = (name or '').lower()
+    for extension, codec in _EXTENSIONS.items():
+        if lowered.endswith(extension):
+            return codec
+    return None
+
+
+def _zstandard():
+    """zstandardパッケージを読み込む（必要になった時だけ）"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd圧縮のファイルを扱うには zstandard が必要です: pip install zstandard")
+    return zstandard
+
+
+class _ClosingGzipFile(gzip.GzipFile):
+    """閉じると包んでいるストリームも閉じるGzipFile（GzipFileは fileobj を閉じないため）"""
+
+    def close(self):
+        fileobj = self.fileobj
+        try:
+            super().close()
+        finally:
+            if fileobj is not None:
+                fileobj.close()
+
+
+def open_decompressed(stream, codec):
+    """
+    バイナリストリームを展開しながら読むストリームで包む（閉じると stream も閉じる）
+
+    Args:
+        stream: 読み込み用のバイナリストリーム
+        codec (str): 'gzip' / 'zstd' / None
+
+    Returns:
+        バイナリストリーム（codecがNoneの場合は stream そのまま）
+    """
+    try:
+        if codec == GZIP:
+            return _ClosingGzipFile(fileobj=stream, mode='rb')
+        if codec == ZSTD:
+            # read_across_frames: 複数フレームを連結したファイルも最後まで読む
+            # closefd: 閉じたときに stream も閉じる
+            return _zstandard().ZstdDecompressor().stream_reader(stream, read_across_frames=True, closefd=True)
+    except BaseException:
+        stream.close()
+        raise
+    return stream
+
+
+def decompress_bytes(data, codec):
+    """
+    バイト列を展開
+
+    Args:
+        data (bytes): 圧縮されたデータ
+        codec (str): 'gzip' / 'zstd' / None
+
+    Returns:
+        bytes: 展開したデータ
+    """
+    if codec is None:
+        return data
+    with open_decompressed(io.BytesIO(data), codec) as stream:
+        return stream.read()
+
+
+def compress_bytes(data, codec, level=None):
+    """
+    バイト列を圧縮
+
+    Args:
+        data (bytes): 元のデータ
+        codec (str): 'gzip' / 'zstd'
+        level (int, optional): 圧縮レベル
+
+    Returns:
+        bytes: 圧縮したデータ
+    """
+    if codec == GZIP:
+        return gzip.compress(data, compresslevel=9 if level is None else level)
+    if codec == ZSTD:
+        return _zstandard().ZstdCompressor(level=3 if level is None else level).compress(data)
+    raise ValueError(f"未対応の圧縮形式です: {codec}")
+
+
+def open_text(stream, codec):
+    """
+    バイナリストリームを展開してテキストとして読むストリームを作成
+
+    Args:
+        stream: 読み込み用のバイナリストリーム
+        codec (str): 'gzip' / 'zstd' / None
+
+    Returns:
+        io.TextIOWrapper: UTF-8（BOM付きも可）のテキストストリーム（閉じると stream も閉じる）
+    """
+    binary = open_decompressed(stream, codec)
+    try:
+        return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+    except BaseException:
+        binary.close()
+        raise
+
+
+def open_schedule_file(path):
+    """
+    ローカルのスケジュールCSVを開く（.gz / .zst は展開しながら読む）
+
+    Args:
+        path (str): ファイルのパス
+
+    Returns:
+        io.TextIOWrapper: テキストストリーム（閉じるとファイルも閉じる）
+    """
+    return open_text(open(path, 'rb'), detect_codec(path))
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+スケジュールCSVの変更監視とインメモリ状態管理
+Linuxではinotify、それ以外ではポーリングでファイル変更を検知
+"""
+
+import os
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+import pandas as pd
+import scheduler_metrics as metrics
+from schedule_codec import open_schedule_file
+
+
+def file_signature(path):
+    """
+    ファイルの変更検知用シグネチャを取得
+
+    Args:
+        path (str): ファイルのパス
+
+    Returns:
+        tuple: (更新時刻ns, サイズ, inode)。ファイルがない場合None
+    """
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    except OSError:
+        return None
+
+
+class ScheduleState:
+    """パース済みスケジュールを日付ごとに保持するクラス"""
+
+    def __init__(self, csv_file):
+        """
+        初期化
+
+        Args:
+            csv_file (str): CSVファイルのパス
+        """
+        self.csv_file = csv_file
+        self.version = 0
+        self._by_date = {}
+        self._signature = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def set_csv_file(self, csv_file):
+        """
+        読み込み対象のCSVファイルを切り替えて読み込み直す
+
+        Args:
+            csv_file (str): 新しいCSVファイルのパス
+        """
+        with self._lock:
+            self.csv_file = csv_file
+            self._loaded = False
+        self.reload()
+
+    def add_listener(self, callback):
+        """
+        再読み込み時に呼ばれるコールバックを登録
+
+        Args:
+            callback (callable): 引数なしで呼ばれる関数
+        """
+        self._listeners.append(callback)
+
+    def reload(self):
+        """
+        CSVファイルを読み込み直して日付ごとにグループ化
+
+        Returns:
+            bool: 読み込みに成功した場合True
+        """
+        with self._lock:
+            signature = file_signature(self.csv_file)
+            if signature is None:
+                print(f"❌ CSVファイルが見つかりません: {self.csv_file}")
+                self._by_date = {}
+                self._signature = None
+                self._loaded = True
+                self.version += 1
+            else:
+                parse_started = time.perf_counter()
+                try:
+                    with open_schedule_file(self.csv_file) as f:
+                        df = pd.read_csv(f)
+                except Exception as e:
+                    # 書き込み途中などで読めない場合は直前の状態を維持
+                    print(f"❌ CSV読み込みエラー: {e}")
+                    metrics.SCHEDULE_RELOADS.inc(result='error')
+                    return False
+
+                by_date = {}
+                for row in df.to_dict('records'):
+                    date = str(row['日付'])
+                    by_date.setdefault(date, []).append({
+                        'title': f"{row['名前']}: {row['タスク内容']}",
+                        'start_time': row['開始時間'],
+                        'end_time': row['終了時間'],
+                        'name': row['名前'],
+                        'task': row['タスク内容'],
+                        'date': date
+                    })
+
+                self._by_date = by_date
+                self._signature = signature
+                self._loaded = True
+                self.version += 1
+                metrics.CSV_PARSE_SECONDS.observe(time.perf_counter() - parse_started)
+                metrics.SCHEDULE_RELOADS.inc(result='success')
+                print(f"🔄 スケジュールを読み込みました: {len(df)}行 / {len(by_date)}日分")
+
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️  スケジュール更新通知エラー: {e}")
+        return True
+
+    def refresh_if_changed(self):
+        """
+        ファイルが変更されている場合のみ再読み込み
+
+        Returns:
+            bool: 再読み込みした場合True
+        """
+        if self._loaded and file_signature(self.csv_file) == self._signature:
+            return False
+        return self.reload()
+
+    def get_schedule(self, target_date):
+        """
+        指定日の予定を取得
+
+        Args:
+            target_date (str): 対象日付（YYYY-MM-DD形式）
+
+        Returns:
+            list: 予定のリスト
+        """
+        self.refresh_if_changed()
+        return list(self._by_date.get(target_date, []))
+
+    def all_rows(self):
+        """
+        全日付の予定を取得
+
+        Returns:
+            list: 予定のリスト（各予定にdate, nameを含む）
+        """
+        self.refresh_if_changed()
+        rows = []
+        for day_rows in self._by_date.values():
+            rows.extend(day_rows)
+        return rows
+
+    @property
+    def exists(self):
+        """CSVファイルが読み込めているか"""
+        return self._signature is not None
+
+
+class _Inotify:
+    """ctypes経由の最小限のinotifyラッパー"""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+                  IN_MOVED_TO | IN_CREATE | IN_DELETE)
+
+    _EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self):
+        """初期化（inotifyが使えない場合はOSErrorを送出）"""
+        if not hasattr(os, 'O_CLOEXEC') or not os.uname().sysname == 'Linux':
+            raise OSError("inotifyはLinuxでのみ利用できます")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.watches = {}
+
+    def add_watch(self, directory):
+        """
+        ディレクトリを監視対象に追加
+
+        Args:
+            directory (str): 監視するディレクトリ
+
+        Returns:
+            int: ウォッチディスクリプタ
+        """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+        self.watches[wd] = directory
+        return wd
+
+    def read_events(self):
+        """
+        溜まっているイベントを読み出す
+
+        Returns:
+            list: 変更されたファイルのフルパスのリスト
+        """
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset + self._EVENT_HEADER.size <= len(data):
+            wd, _mask, _cookie, length = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            directory = self.watches.get(wd)
+            if directory is not None and name:
+                paths.append(os.path.join(directory, os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        """ファイルディスクリプタを閉じる"""
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class FileChangeWatcher:
+    """ファイル変更を監視してデバウンス後にコールバックを呼ぶクラス"""
+
+    def __init__(self, debounce_seconds=0.5, poll_interval=2.0, use_inotify=True):
+        """
+        初期化
+
+        Args:
+            debounce_seconds (float): 連続した書き込みをまとめる待ち時間（秒）
+            poll_interval (float): ポーリング時の確認間隔（秒）
+            use_inotify (bool): inotifyを使うかどうか（使えない場合は自動でポーリング）
+        """
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.mode = None
+        self._callbacks = {}
+        self._signatures = {}
+        self._pending = {}
+        # 監視対象・変更待ちは呼び出し元のスレッドと監視スレッドの両方から触るためロックで守る
+        self._lock = threading.Lock()
+        self._inotify = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def watch(self, path, callback):
+        """
+        監視対象のファイルを登録
+
+        Args:
+            path (str): 監視するファイルのパス
+            callback (callable): 変更時にパスを引数に呼ばれる関数
+        """
+        path = os.path.abspath(path)
+        signature = file_signature(path)
+        with self._lock:
+            self._callbacks[path] = callback
+            self._signatures[path] = signature
+        if self._inotify is not None:
+            self._add_inotify_watch(path)
+
+    def unwatch(self, path):
+        """
+        監視対象からファイルを外す
+
+        Args:
+            path (str): 監視をやめるファイルのパス
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            self._callbacks.pop(path, None)
+            self._signatures.pop(path, None)
+            self._pending.pop(path, None)
+
+    def _add_inotify_watch(self, path):
+        """ファイルの親ディレクトリをinotifyに登録（エディタの置き換え保存にも対応）"""
+        directory = os.path.dirname(path)
+        if directory not in self._inotify.watches.values():
+            self._inotify.add_watch(directory)
+
+    def start(self):
+        """監視スレッドを開始"""
+        if self._thread is not None:
+            return
+
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+                with self._lock:
+                    paths = list(self._callbacks)
+                for path in paths:
+                    self._add_inotify_watch(path)
+                self.mode = 'inotify'
+            except (OSError, AttributeError) as e:
+                print(f"⚠️  inotifyが使えないためポーリングで監視します: {e}")
+                if self._inotify is not None:
+                    self._inotify.close()
+                self._inotify = None
+
+        if self._inotify is None:
+            self.mode = 'polling'
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='file-change-watcher', daemon=True)
+        self._thread.start()
+        print(f"👀 ファイル監視を開始しました（{self.mode}）: {len(self._callbacks)}件")
+
+    def stop(self):
+        """監視スレッドを停止"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _run(self):
+        """監視ループ"""
+        next_poll = time.monotonic()
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+
+            # 待ち時間を決定（デバウンス期限・ポーリング間隔・停止確認）
+            timeout = 1.0
+            with self._lock:
+                if self._pending:
+                    timeout = min(timeout, max(min(self._pending.values()) - now, 0))
+            if self._inotify is None:
+                timeout = min(timeout, max(next_poll - now, 0))
+
+            if self._inotify is not None:
+                readable, _, _ = select.select([self._inotify.fd], [], [], timeout)
+                if readable:
+                    for path in self._inotify.read_events():
+                        with self._lock:
+                            if path in self._callbacks:
+                                self._pending[path] = time.monotonic() + self.debounce_seconds
+            else:
+                self._stop_event.wait(timeout)
+                if time.monotonic() >= next_poll:
+                    self._poll()
+                    next_poll = time.monotonic() + self.poll_interval
+
+            self._fire_due()
+
+    def _poll(self):
+        """ポーリングで変更を確認"""
+        with self._lock:
+            paths = list(self._callbacks)
+        for path in paths:
+            signature = file_signature(path)
+            with self._lock:
+                if path in self._callbacks and signature != self._signatures.get(path):
+                    self._signatures[path] = signature
+                    self._pending[path] = time.monotonic() + self.debounce_seconds
+
+    def _fire_due(self):
+        """デバウンス期限を過ぎた変更のコールバックを呼ぶ"""
+        now = time.monotonic()
+        with self._lock:
+            due = [path for path, deadline in self._pending.items() if deadline <= now]
+            for path in due:
+                del self._pending[path]
+
+        for path in due:
+            # シグネチャが変わっていない通知（読み取りのみ等）は無視
+            signature = file_signature(path)
+            with self._lock:
+                if self._inotify is not None and signature == self._signatures.get(path):
+                    continue
+                callback = self._callbacks.get(path)
+                if callback is None:
+                    continue
+                self._signatures[path] = signature
+            try:
+                callback(path)
+            except Exception as e:
+                print(f"⚠️  ファイル変更処理エラー ({path}): {e}")
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+スケジューラー用の軽量メトリクス
+Prometheusテキスト形式でカウンターとヒストグラムをHTTP公開
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 秒単位の処理時間用バケット
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 件数用バケット
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _format_labels(labels):
+    """ラベルをPrometheus形式の文字列に変換"""
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{escaped}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class Counter:
+    """単調増加カウンター"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        """
+        初期化
+
+        Args:
+            name (str): メトリクス名
+            help_text (str): 説明文
+            labelnames (tuple): ラベル名
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """
+        カウンターを増やす
+
+        Args:
+            amount (float): 増分
+            **labels: ラベル値
+        """
+        key = tuple((name, labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """現在値を取得"""
+        key = tuple((name, labels.get(name, '')) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def render(self):
+        """Prometheus形式のテキストを生成"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = list(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(key)} {value}')
+        return lines
+
+
+class Histogram:
+    """累積バケット方式のヒストグラム"""
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, labelnames=()):
+        """
+        初期化
+
+        Args:
+            name (str): メトリクス名
+            help_text (str): 説明文
+            buckets (tuple): バケットの上限値（昇順）
+            labelnames (tuple): ラベル名
+        """
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """
+        値を記録
+
+        Args:
+            value (float): 観測値
+            **labels: ラベル値
+        """
+        key = tuple((name, labels.get(name, '')) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        """観測回数を取得"""
+        key = tuple((name, labels.get(name, '')) for name in self.labelnames)
+        series = self._series.get(key)
+        return series[2] if series else 0
+
+    def render(self):
+        """Prometheus形式のテキストを生成"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._series.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = key + (('le', repr(float(bound))),)
+                lines.append(f'{self.name}_bucket{_format_labels(labels)} {cumulative}')
+            labels = key + (('le', '+Inf'),)
+            lines.append(f'{self.name}_bucket{_format_labels(labels)} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """メトリクスの登録と出力を管理するクラス"""
+
+    def __init__(self):
+        """初期化"""
+        self._metrics = {}
+
+    def counter(self, name, help_text, labelnames=()):
+        """カウンターを取得（なければ作成）"""
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, help_text, labelnames)
+        return self._metrics[name]
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, labelnames=()):
+        """ヒストグラムを取得（なければ作成）"""
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, help_text, buckets, labelnames)
+        return self._metrics[name]
+
+    def render(self):
+        """全メトリクスをPrometheus形式で出力"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# プロセス全体で共有するレジストリ
+REGISTRY = MetricsRegistry()
+
+CSV_PARSE_SECONDS = REGISTRY.histogram(
+    'schedule_csv_parse_seconds', 'CSVファイルの読み込み・パース時間')
+SCHEDULE_RELOADS = REGISTRY.counter(
+    'schedule_reloads_total', 'インメモリスケジュールの再読み込み回数', ('result',))
+ROWS_MATCHED = REGISTRY.histogram(
+    'schedule_rows_matched', '対象日に一致した予定の件数', COUNT_BUCKETS)
+RENDER_SECONDS = REGISTRY.histogram(
+    'schedule_render_seconds', 'Slackメッセージの生成時間')
+SLACK_POST_SECONDS = REGISTRY.histogram(
+    'slack_post_seconds', 'Slack Webhookへの送信時間（リトライ含む）')
+SLACK_POSTS = REGISTRY.counter(
+    'slack_posts_total', 'Slack送信の結果別回数', ('result',))
+SLACK_RETRIES = REGISTRY.counter(
+    'slack_retries_total', 'Slack送信のリトライ回数')
+JOB_LAG_SECONDS = REGISTRY.histogram(
+    'scheduler_job_lag_seconds', '予定時刻からジョブ開始までの遅れ',
+    (0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0))
+JOB_RUNS = REGISTRY.counter(
+    'scheduler_job_runs_total', 'ジョブの実行回数', ('job', 'result'))
+JOB_SECONDS = REGISTRY.histogram(
+    'scheduler_job_seconds', 'ジョブ開始から完了までの時間', labelnames=('job',))
+REMINDERS_SENT = REGISTRY.counter(
+    'shift_reminders_sent_total', 'シフトリマインダーの送信結果別回数', ('result',))
+REMINDER_LAG_SECONDS = REGISTRY.histogram(
+    'shift_reminder_lag_seconds', 'リマインダーの予定時刻からの取り出し遅れ')
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """/metricsを返すHTTPハンドラー"""
+
+    registry = REGISTRY
+
+    def do_GET(self):
+        """GETリクエストを処理"""
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """アクセスログは出力しない"""
+        pass
+
+
+class MetricsServer:
+    """メトリクス公開用のHTTPサーバー（バックグラウンドスレッド）"""
+
+    def __init__(self, port, host='0.0.0.0', registry=REGISTRY):
+        """
+        初期化
+
+        Args:
+            port (int): 待ち受けポート
+            host (str): 待ち受けアドレス
+            registry (MetricsRegistry): 公開するレジストリ
+        """
+        self.port = port
+        self.host = host
+        self.registry = registry
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """サーバーを開始"""
+        handler = type('MetricsHandler', (_MetricsHandler,), {'registry': self.registry})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name='metrics-server', daemon=True)
+        self._thread.start()
+        print(f"📈 メトリクスを公開しました: http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        """サーバーを停止"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
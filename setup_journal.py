@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+セットアップのチェックポイント記録
+作成したリソース（マスターシート・テンプレート原本・従業員ごとのスプレッドシート）を
+作成するたびに1行ずつ追記し、途中で失敗した後の再実行では作成済みのものを再利用する
+
+記録ファイル: JSON Lines（1行1件。書き込み途中で中断した最後の行は読み込み時に無視する）
+"""
+
+import json
+import os
+from datetime import datetime
+
+DEFAULT_JOURNAL_FILE = 'shift_automation_checkpoint.jsonl'
+
+KIND_MASTER = 'master'
+KIND_GOLDEN = 'golden'
+KIND_EMPLOYEE = 'employee'
+
+
+class SetupJournal:
+    """作成済みリソースを追記型のファイルに記録するクラス"""
+
+    def __init__(self, path=DEFAULT_JOURNAL_FILE):
+        """
+        初期化
+
+        Args:
+            path (str): 記録ファイルのパス
+        """
+        self.path = path
+
+    def load(self):
+        """
+        記録済みのリソースを読み込む
+
+        Returns:
+            dict: master（マスターシートの情報、なければNone）, golden_template_id,
+                employees（従業員IDをキーとしたスプレッドシートの情報）
+        """
+        state = {'master': None, 'golden_template_id': None, 'employees': {}}
+        if not os.path.exists(self.path):
+            return state
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"⚠️ チェックポイントの{line_number}行目を読み込めないため無視します: {self.path}")
+                    continue
+
+                kind = entry.get('kind')
+                if kind == KIND_MASTER:
+                    state['master'] = entry['sheet']
+                elif kind == KIND_GOLDEN:
+                    state['golden_template_id'] = entry['id']
+                elif kind == KIND_EMPLOYEE:
+                    state['employees'][entry['sheet']['employee_id']] = entry['sheet']
+        return state
+
+    def _needs_newline(self):
+        """書き込み途中で中断して最後の行が改行で終わっていないか"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b'\n'
+
+    def _append(self, entry):
+        """1件を追記し、ディスクへ書き出してから戻る"""
+        entry = dict(entry, recorded_at=datetime.now().isoformat(timespec='seconds'))
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        # 中断された最後の行の続きに書くと両方とも読めなくなるため、改行してから追記する
+        if self._needs_newline():
+            line = '\n' + line
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_master(self, sheet):
+        """
+        マスターシートの作成を記録
+
+        Args:
+            sheet (dict): created_sheets に追加したマスターシートの情報
+        """
+        self._append({'kind': KIND_MASTER, 'sheet': sheet})
+
+    def record_golden(self, golden_template_id):
+        """
+        テンプレート原本の作成を記録
+
+        Args:
+            golden_template_id (str): 原本のスプレッドシートID
+        """
+        self._append({'kind': KIND_GOLDEN, 'id': golden_template_id})
+
+    def record_employee(self, sheet):
+        """
+        従業員テンプレートの作成を記録
+
+        Args:
+            sheet (dict): created_sheets に追加した従業員スプレッドシートの情報
+        """
+        self._append({'kind': KIND_EMPLOYEE, 'sheet': sheet})
+
+    def reset(self):
+        """記録を削除（最初からやり直す場合）"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -5,88 +5,187 @@
 従業員テンプレート作成からマスターシート作成まで一括実行
 """
 
+import argparse
 import os
 import json
 import time
-from employee_shift_template import EmployeeShiftTemplateCreator
+from employee_shift_template import EmployeeShiftTemplateCreator, TemplateModeSelector, MODE_BUILD, TEMPLATE_MODES
 from master_aggregation_sheet import MasterAggregationSheetCreator
+from provisioning import DEFAULT_WORKERS, ParallelProvisioner, summarize
+from sheets_quota import SCOPE_USER, WRITE, get_quota_tracker
+from setup_journal import DEFAULT_JOURNAL_FILE, SetupJournal
+from roster_import import DEFAULT_CHUNK_SIZE, RosterImporter, load_provisioned_ids
+from config_sheet_registrar import ConfigSheetRegistrar
+
+CONFIG_FILE = 'shift_automation_config.json'
 
 class ShiftAutomationSetup:
     """シフト自動化システムセットアップクラス"""
     
-    def __init__(self, credentials_file):
-        """初期化"""
+    def __init__(self, credentials_file, workers=DEFAULT_WORKERS,
+                 writes_per_minute=None, template_mode=MODE_BUILD,
+                 journal_file=DEFAULT_JOURNAL_FILE, config_file=CONFIG_FILE,
+                 roster_file=None, roster_chunk_size=DEFAULT_CHUNK_SIZE,
+                 sheets_service=None, drive_service=None, quota=None):
+        """
+        初期化
+        
+        Args:
+            credentials_file (str): サービスアカウントの認証ファイル
+            workers (int): 従業員テンプレートを同時に作成する数
+            writes_per_minute (int, optional): Sheets APIの1ユーザーあたりの書き込み上限（回/分、0以下で制限なし。
+                Noneの場合は共有の集計の設定のまま＝既定60回/分）
+            template_mode (str): テンプレートの作成方法（'build' / 'clone' / 'auto'。
+                clone / auto はコピー元の原本のスプレッドシートをDriveに1つ追加で作成するため、既定は build）
+            journal_file (str): 作成済みリソースを記録するチェックポイントファイル
+            config_file (str): 生成する設定ファイル
+            roster_file (str, optional): 従業員名簿（CSV / JSONL）。省略時はサンプルの従業員
+            roster_chunk_size (int): 名簿を一度に読み込む従業員数
+            sheets_service (optional): 構築済みのSheets APIサービス（フェイクを使う場合。全ワーカーで共有する）
+            drive_service (optional): 構築済みのDrive APIサービス（フェイクを使う場合）
+            quota (sheets_quota.SheetsQuotaTracker, optional): 上限の集計（省略時はプロセス全体で共有のもの）
+        """
         self.credentials_file = credentials_file
-        self.employee_creator = EmployeeShiftTemplateCreator(credentials_file)
-        self.master_creator = MasterAggregationSheetCreator(credentials_file)
+        self.sheets_service = sheets_service
+        self.drive_service = drive_service
+        # 作成方法の計測結果と原本は全ワーカーで共有する
+        self.template_selector = TemplateModeSelector(template_mode)
+        self.employee_creator = self._new_employee_creator()
+        self.master_creator = MasterAggregationSheetCreator(credentials_file, service=sheets_service)
+        self.workers = workers
+        self.quota = quota if quota is not None else get_quota_tracker()
+        if writes_per_minute is not None:
+            self.quota.set_limits(user_writes_per_minute=writes_per_minute)
+        self.journal = SetupJournal(journal_file)
+        self.config_file = config_file
+        self.roster_file = roster_file
+        self.roster_chunk_size = roster_chunk_size
         self.created_sheets = []
     
-    def setup_complete_system(self):
-        """完全なシフト自動化システムをセットアップ"""
+    def _new_employee_creator(self, verbose=True):
+        """ワーカー用のテンプレート作成器を作成"""
+        return EmployeeShiftTemplateCreator(self.credentials_file, service=self.sheets_service, verbose=verbose,
+                                            drive_service=self.drive_service, selector=self.template_selector)
+    
+    def setup_complete_system(self, resume=True):
+        """
+        完全なシフト自動化システムをセットアップ
+        
+        作成したリソースはチェックポイントに記録する。途中で失敗した後に再実行すると、
+        作成済みのマスターシート・従業員テンプレートは作り直さずに再利用する。
+        
+        Args:
+            resume (bool): Falseの場合はチェックポイントを削除し、設定ファイルに登録済みの従業員も含めて最初から作成
+        
+        Returns:
+            bool: 成功した場合True
+        """
         print("=" * 80)
         print("🚀 シフト自動化システム 完全セットアップ")
         print("=" * 80)
         
         try:
+            if not resume:
+                self.journal.reset()
+            checkpoint = self.journal.load()
+            self.created_sheets = []
+            
             # 1. マスターシートを作成
             print("\n📋 ステップ1: マスター集約シートを作成中...")
-            master_sheet_id = self.master_creator.create_master_sheet()
-            
-            if not master_sheet_id:
-                print("❌ マスターシートの作成に失敗しました")
-                return False
-            
-            self.created_sheets.append({
-                'type': 'master',
-                'id': master_sheet_id,
-                'name': 'シフト集約マスター',
-                'url': f'https://docs.google.com/spreadsheets/d/{master_sheet_id}'
-            })
+            if checkpoint['master']:
+                master_sheet = checkpoint['master']
+                print(f"♻️ 前回作成したマスターシートを再利用します: {master_sheet['id']}")
+            else:
+                # configシートには後でステップ4で実際の従業員を登録するため、サンプルの従業員は書き込まない
+                master_sheet_id = self.master_creator.create_master_sheet(include_sample_rows=False)
+                
+                if not master_sheet_id:
+                    print("❌ マスターシートの作成に失敗しました")
+                    return False
+                
+                master_sheet = {
+                    'type': 'master',
+                    'id': master_sheet_id,
+                    'name': 'シフト集約マスター',
+                    'url': f'https://docs.google.com/spreadsheets/d/{master_sheet_id}'
+                }
+                self.journal.record_master(master_sheet)
+                print(f"✅ マスターシートを作成しました: {master_sheet_id}")
             
-            print(f"✅ マスターシートを作成しました: {master_sheet_id}")
+            self.created_sheets.append(master_sheet)
             
             # 2. 従業員テンプレートを作成
             print("\n👥 ステップ2: 従業員テンプレートを作成中...")
-            employees = self._get_employee_list()
+            done = checkpoint['employees']
+            reused = []
             
-            for employee in employees:
-                print(f"\n📝 {employee['name']} のテンプレートを作成中...")
-                sheet_id = self.employee_creator.create_employee_template(
-                    employee['id'],
-                    employee['name'],
-                    employee['store']
-                )
-                
-                if sheet_id:
-                    self.created_sheets.append({
-                        'type': 'employee',
-                        'id': sheet_id,
-                        'name': f"{employee['name']} - シフト希望",
-                        'url': f'https://docs.google.com/spreadsheets/d/{sheet_id}',
-                        'employee_id': employee['id'],
-                        'employee_name': employee['name'],
-                        'store': employee['store']
-                    })
-                    print(f"✅ {employee['name']} のテンプレートを作成しました")
-                else:
-                    print(f"❌ {employee['name']} のテンプレート作成に失敗しました")
+            def remaining_employees():
+                """名簿を少しずつ読み込み、作成済み（チェックポイントに記録済み）の従業員は再利用する"""
+                for chunk in self._iter_employee_chunks(exclude_provisioned=resume):
+                    for employee in chunk:
+                        if employee['id'] in done:
+                            reused.append(done[employee['id']])
+                        else:
+                            yield employee
+            
+            if checkpoint['golden_template_id'] and not self.template_selector.golden_template_id:
+                self.template_selector.golden_template_id = checkpoint['golden_template_id']
+            recorded_golden = checkpoint['golden_template_id']
+            # 作成結果は1人ずつ記録し、ParallelProvisioner には結果を保持させない（件数だけを受け取る）
+            created = []
+            
+            def on_result(result):
+                """作成できた従業員を1人ずつチェックポイントに記録"""
+                nonlocal recorded_golden
+                golden_id = self.template_selector.golden_template_id
+                if golden_id and golden_id != recorded_golden:
+                    self.journal.record_golden(golden_id)
+                    recorded_golden = golden_id
+                if result.ok:
+                    sheet = self._employee_sheet(result.employee, result.sheet_id)
+                    self.journal.record_employee(sheet)
+                    created.append(sheet)
+            
+            write_limit = self.quota.limit(SCOPE_USER, WRITE)
+            print(f"🔀 {self.workers}並列で作成します"
+                  + (f"（書き込み上限: {write_limit}回/分）" if write_limit else ""))
+            provisioner = ParallelProvisioner(self._new_employee_creator, workers=self.workers, quota=self.quota)
+            started = time.perf_counter()
+            counts = provisioner.provision(remaining_employees(), on_result=on_result, collect_results=False)
+            summary = summarize(counts, time.perf_counter() - started)
+            if reused:
+                print(f"♻️ {len(reused)}名は作成済みのためスキップしました")
+            self.created_sheets.extend(reused)
+            self.created_sheets.extend(created)
+            
+            print(f"✅ 従業員テンプレート: 成功{summary['succeeded']}件 / 失敗{summary['failed']}件"
+                  f"（{summary['seconds']:.1f}秒・{summary['per_second']:.2f}件/秒・API呼び出し{summary['api_calls']}回）")
+            self._print_template_mode_summary()
+            if summary['failed']:
+                print(f"💡 失敗した{summary['failed']}名は、もう一度実行すると作成済みの分を除いて再作成します")
             
             # 3. 設定ファイルを生成
             print("\n⚙️ ステップ3: 設定ファイルを生成中...")
-            self._generate_config_file()
+            config = self._generate_config_file()
+            
+            # 4. マスターシートのconfigシートに登録
+            print("\n🗂️ ステップ4: configシートに従業員のスプレッドシートIDを登録中...")
+            self._register_config_sheet(config['master_sheet_id'], config['employees'])
             
-            # 4. セットアップ完了レポート
+            # 5. セットアップ完了レポート
             print("\n📊 セットアップ完了レポート")
             print("=" * 80)
             self._print_setup_report()
+            if self.master_creator.client_factory is not None:
+                self.master_creator.client_factory.metrics.print_report()
+            self.quota.print_report()
             
             print("\n🎉 シフト自動化システムのセットアップが完了しました！")
             print("\n📋 次のステップ:")
-            print("1. マスターシートのconfigシートに従業員のスプレッドシートIDを登録")
-            print("2. マスターシートにGASスクリプトを追加")
-            print("3. プロパティを設定（Slack Webhook URL等）")
-            print("4. 自動化のトリガーを設定")
-            print("5. 従業員にシフト希望入力の依頼")
+            print("1. マスターシートにGASスクリプトを追加")
+            print("2. プロパティを設定（Slack Webhook URL等）")
+            print("3. 自動化のトリガーを設定")
+            print("4. 従業員にシフト希望入力の依頼")
             
             return True
             
@@ -94,6 +193,61 @@ class ShiftAutomationSetup:
             print(f"❌ セットアップ中にエラーが発生しました: {e}")
             return False
     
+    @staticmethod
+    def _employee_sheet(employee, sheet_id):
+        """created_sheets に追加する従業員スプレッドシートの情報"""
+        return {
+            'type': 'employee',
+            'id': sheet_id,
+            'name': f"{employee['name']} - シフト希望",
+            'url': f'https://docs.google.com/spreadsheets/d/{sheet_id}',
+            'employee_id': employee['id'],
+            'employee_name': employee['name'],
+            'store': employee['store']
+        }
+    
+    def _print_template_mode_summary(self):
+        """テンプレートの作成方法ごとの所要時間を表示"""
+        summary = self.template_selector.summary()
+        medians = ' / '.join(f"{mode}: {seconds:.2f}秒" for mode, seconds in sorted(summary['medians'].items()))
+        if medians:
+            print(f"🧬 作成方法（{summary['mode']}）の所要時間の中央値: {medians}"
+                  + (f" → {summary['preferred']}" if summary['preferred'] else ""))
+        if self.template_selector.golden_template_id:
+            print(f"📄 テンプレート原本: {self.template_selector.golden_template_id}")
+    
+    def _iter_employee_chunks(self, exclude_provisioned=True):
+        """
+        作成対象の従業員を一定件数ずつ取得
+        
+        名簿ファイルが指定されていれば roster_chunk_size 件ずつ読み込み、なければサンプルの従業員を使う。
+        
+        Args:
+            exclude_provisioned (bool): 設定ファイルに登録済みの従業員を除くか（最初から作り直す場合False）
+        
+        Yields:
+            list: 従業員情報（id, name, store）のリスト
+        """
+        provisioned = load_provisioned_ids(self.config_file) if exclude_provisioned else set()
+        if not self.roster_file:
+            employees = self._get_employee_list()
+            remaining = [employee for employee in employees if employee['id'] not in provisioned]
+            if len(remaining) < len(employees):
+                print(f"♻️ {len(employees) - len(remaining)}名は設定ファイルに登録済みのため除外します")
+            print(f"📋 {len(remaining)}名の従業員テンプレートを作成します")
+            yield remaining
+            return
+        
+        print(f"📂 従業員名簿を読み込みます: {self.roster_file}（{self.roster_chunk_size}名ずつ）")
+        importer = RosterImporter(self.roster_file, self.roster_chunk_size, exclude_ids=provisioned)
+        for number, chunk in enumerate(importer.chunks(), 1):
+            print(f"📦 名簿チャンク{number}: {len(chunk)}名（累計{importer.imported}名）")
+            yield chunk
+        
+        summary = importer.summary()
+        print(f"📋 名簿: {summary['rows_read']}行 / 作成対象{summary['imported']}名 / "
+              f"登録済み{summary['excluded']}名 / 重複{summary['duplicates']}件 / 不備{summary['invalid']}件")
+    
     def _get_employee_list(self):
         """従業員リストを取得（実際の運用では外部ファイルやDBから取得）"""
         # サンプル従業員データ
@@ -104,23 +258,21 @@ class ShiftAutomationSetup:
             {'id': 'EID-004', 'name': '鈴木次郎', 'store': '東京'},
             {'id': 'EID-005', 'name': '高橋三郎', 'store': '大阪'}
         ]
-        
-        print(f"📋 {len(employees)}名の従業員テンプレートを作成します")
         return employees
     
     def _generate_config_file(self):
-        """設定ファイルを生成"""
-        config = {
-            'master_sheet_id': self.created_sheets[0]['id'],
-            'employees': [
-                {
-                    'employee_id': sheet['employee_id'],
-                    'employee_name': sheet['employee_name'],
-                    'spreadsheet_id': sheet['id'],
-                    'store': sheet['store']
-                }
-                for sheet in self.created_sheets[1:]  # マスターシート以外
-            ],
+        """
+        設定ファイルを生成
+        
+        既存の設定ファイルがあれば読み込み、今回の従業員を従業員IDで上書き・追加する
+        （Slack設定など手で編集した項目と、今回対象外の従業員はそのまま残す）
+        
+        Returns:
+            dict: 保存した設定
+        """
+        default_config = {
+            'master_sheet_id': None,
+            'employees': [],
             'slack_settings': {
                 'webhook_url': 'https://hooks.slack.com/services/YOUR_WEBHOOK_URL',
                 'channel': '#リモートチーム勤怠報告'
@@ -134,11 +286,60 @@ class ShiftAutomationSetup:
             }
         }
         
-        # 設定ファイルを保存
-        with open('shift_automation_config.json', 'w', encoding='utf-8') as f:
+        config = default_config
+        if os.path.exists(self.config_file):
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    config = dict(default_config, **json.load(f))
+            except (json.JSONDecodeError, TypeError) as e:
+                print(f"⚠️ 既存の設定ファイルを読み込めないため作り直します: {e}")
+        
+        config['master_sheet_id'] = self.created_sheets[0]['id']
+        
+        # 従業員は従業員IDで統合（既存の順序を保ち、新しい従業員は末尾に追加）
+        employees = {employee['employee_id']: employee for employee in config.get('employees', [])}
+        added = updated = 0
+        for sheet in self.created_sheets[1:]:  # マスターシート以外
+            entry = {
+                'employee_id': sheet['employee_id'],
+                'employee_name': sheet['employee_name'],
+                'spreadsheet_id': sheet['id'],
+                'store': sheet['store']
+            }
+            previous = employees.get(sheet['employee_id'])
+            if previous is None:
+                added += 1
+            elif previous != dict(previous, **entry):
+                updated += 1
+            employees[sheet['employee_id']] = dict(previous or {}, **entry)
+        config['employees'] = list(employees.values())
+        
+        # 設定ファイルを保存（書き込み途中で中断しても既存のファイルが壊れないよう置き換える）
+        temp_file = f'{self.config_file}.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
             json.dump(config, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, self.config_file)
         
-        print("✅ 設定ファイルを生成しました: shift_automation_config.json")
+        print(f"✅ 設定ファイルを生成しました: {self.config_file}"
+              f"（追加{added}名 / 更新{updated}名 / 合計{len(config['employees'])}名）")
+        return config
+    
+    def _register_config_sheet(self, master_sheet_id, employees):
+        """
+        マスターシートのconfigシートに従業員のスプレッドシートIDを登録（変更のある行だけを書き込む）
+        
+        Args:
+            master_sheet_id (str): マスタースプレッドシートのID
+            employees (list): 設定ファイルの従業員のリスト
+        """
+        try:
+            registrar = ConfigSheetRegistrar(self.master_creator.service, master_sheet_id)
+            result = registrar.register(employees)
+            print(f"✅ configシートに登録しました: 追加{result['appended']}名 / 更新{result['updated']}名 / "
+                  f"変更なし{result['unchanged']}名（API呼び出し{result['api_calls']}回）")
+        except Exception as e:
+            # 設定ファイルは生成済みなので、再実行すれば差分だけを登録し直せる（セットアップは続ける）
+            print(f"❌ configシートへの登録に失敗しました: {e}")
     
     def _print_setup_report(self):
         """セットアップレポートを表示"""
@@ -195,6 +396,14 @@ class ShiftAutomationSetup:
 
 def main():
     """メイン実行関数"""
+    parser = argparse.ArgumentParser(description='シフト自動化システム セットアップ')
+    parser.add_argument('--roster', help='従業員名簿（CSV / JSONL、.gz / .zst も可）。省略時はサンプルの5名')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='名簿を一度に読み込む従業員数')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='テンプレートを同時に作成する数')
+    parser.add_argument('--template-mode', choices=TEMPLATE_MODES, default=MODE_BUILD,
+                        help='テンプレートの作成方法（clone / auto は原本のスプレッドシートをDriveに1つ追加で作成する）')
+    args = parser.parse_args()
+    
     print("🏢 シフト自動化システム セットアップ")
     print("=" * 60)
     
@@ -207,12 +416,13 @@ def main():
         return
     
     # セットアップを初期化
-    setup = ShiftAutomationSetup(credentials_file)
+    setup = ShiftAutomationSetup(credentials_file, workers=args.workers, template_mode=args.template_mode,
+                                 roster_file=args.roster, roster_chunk_size=args.chunk_size)
     
     print("\n🚀 完全自動セットアップを開始します...")
     print("📋 以下の処理を実行します:")
     print("1. マスター集約シートの作成")
-    print("2. 従業員テンプレートの作成（5名分）")
+    print(f"2. 従業員テンプレートの作成（{args.roster or 'サンプル5名分'}）")
     print("3. 設定ファイルの生成")
     
     # 完全自動セットアップを実行
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sheets APIの上限（1分あたりの読み込み・書き込み回数）の集計と呼び出しの調整
+プロセス全体で1つの集計を共有し、プロジェクト全体とユーザー（サービスアカウント）ごとに
+直近1分間の回数を数えて、上限を超える前に呼び出しを必要な分だけ待たせる
+
+429（上限超過）が返った場合は、他のプロセスも同じプロジェクトの上限を使っているとみなして
+その種類（読み込み / 書き込み）の上限を一時的に下げ、成功が続くと元に戻す
+
+Sheets APIの上限の目安（既定値）:
+    読み込み: 1プロジェクトあたり300回/分、1ユーザーあたり60回/分
+    書き込み: 1プロジェクトあたり300回/分、1ユーザーあたり60回/分
+
+使い方:
+    tracker = get_quota_tracker()          # google_api_client で作成したサービスは自動で使う
+    tracker.set_limits(user_writes_per_minute=30)
+    tracker.print_report()
+"""
+
+import threading
+import time
+from collections import deque
+
+READ = 'read'
+WRITE = 'write'
+KINDS = (READ, WRITE)
+
+SCOPE_PROJECT = 'project'
+SCOPE_USER = 'user'
+
+DEFAULT_PROJECT_READS_PER_MINUTE = 300
+DEFAULT_PROJECT_WRITES_PER_MINUTE = 300
+DEFAULT_USER_READS_PER_MINUTE = 60
+DEFAULT_USER_WRITES_PER_MINUTE = 60
+
+# 読み込みとして数えるメソッド名（メソッドIDの最後の部分）。それ以外のSheetsのメソッドは書き込み
+_READ_METHOD_NAMES = frozenset({'get', 'batchGet', 'getByDataFilter', 'batchGetByDataFilter'})
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def classify_method(method_id):
+    """
+    メソッドIDを上限の種類に分類
+
+    Args:
+        method_id (str): メソッドID（'sheets.spreadsheets.values.get' など）
+
+    Returns:
+        str: 'read' / 'write'（Sheets API以外のメソッドはNone）
+    """
+    if not method_id or not method_id.startswith('sheets.'):
+        return None
+    return READ if method_id.rsplit('.', 1)[-1] in _READ_METHOD_NAMES else WRITE
+
+
+class SheetsQuotaTracker:
+    """プロジェクト・ユーザーごとの1分あたりの読み込み・書き込み回数を数えて呼び出しを調整するクラス（スレッドセーフ）"""
+
+    def __init__(self, project_reads_per_minute=DEFAULT_PROJECT_READS_PER_MINUTE,
+                 project_writes_per_minute=DEFAULT_PROJECT_WRITES_PER_MINUTE,
+                 user_reads_per_minute=DEFAULT_USER_READS_PER_MINUTE,
+                 user_writes_per_minute=DEFAULT_USER_WRITES_PER_MINUTE,
+                 window=60.0, backoff_factor=0.75, min_factor=0.25, recovery_per_call=0.02,
+                 clock=time.monotonic, sleep=time.sleep):
+        """
+        初期化
+
+        Args:
+            project_reads_per_minute (int): プロジェクト全体の読み込み上限（window秒あたり、0以下・Noneで制限なし）
+            project_writes_per_minute (int): プロジェクト全体の書き込み上限
+            user_reads_per_minute (int): ユーザーごとの読み込み上限
+            user_writes_per_minute (int): ユーザーごとの書き込み上限
+            window (float): 集計する期間（秒）
+            backoff_factor (float): 429が返ったときに上限に掛ける係数
+            min_factor (float): 上限を下げる最小の割合
+            recovery_per_call (float): 成功1回ごとに戻す割合
+            clock (callable): 単調増加する現在時刻（秒）を返す関数
+            sleep (callable): 待機する関数
+        """
+        self.window = window
+        self.backoff_factor = backoff_factor
+        self.min_factor = min_factor
+        self.recovery_per_call = recovery_per_call
+        self.clock = clock
+        self.sleep = sleep
+        self.limits = {}
+        self.factors = {kind: 1.0 for kind in KINDS}
+        self.requests = {kind: 0 for kind in KINDS}
+        self.throttled = {kind: 0 for kind in KINDS}
+        self.waited_seconds = 0.0
+        self.max_wait = 0.0
+        self._usage = {}
+        self._paused_until = {kind: 0.0 for kind in KINDS}
+        self._backoff_until = {kind: 0.0 for kind in KINDS}
+        self._lock = threading.Lock()
+        self.set_limits(project_reads_per_minute, project_writes_per_minute,
+                        user_reads_per_minute, user_writes_per_minute)
+
+    def set_limits(self, project_reads_per_minute=None, project_writes_per_minute=None,
+                   user_reads_per_minute=None, user_writes_per_minute=None):
+        """
+        上限を変更（Noneの項目は変更しない。0以下で制限なし）
+
+        Args:
+            project_reads_per_minute (int, optional): プロジェクト全体の読み込み上限
+            project_writes_per_minute (int, optional): プロジェクト全体の書き込み上限
+            user_reads_per_minute (int, optional): ユーザーごとの読み込み上限
+            user_writes_per_minute (int, optional): ユーザーごとの書き込み上限
+        """
+        changes = {
+            (SCOPE_PROJECT, READ): project_reads_per_minute,
+            (SCOPE_PROJECT, WRITE): project_writes_per_minute,
+            (SCOPE_USER, READ): user_reads_per_minute,
+            (SCOPE_USER, WRITE): user_writes_per_minute
+        }
+        with self._lock:
+            for key, limit in changes.items():
+                if limit is not None:
+                    self.limits[key] = limit if limit > 0 else None
+                else:
+                    self.limits.setdefault(key, None)
+
+    def limit(self, scope, kind):
+        """
+        設定されている上限
+
+        Args:
+            scope (str): 'project' / 'user'
+            kind (str): 'read' / 'write'
+
+        Returns:
+            int: window秒あたりの上限（制限なしはNone）
+        """
+        with self._lock:
+            return self.limits.get((scope, kind))
+
+    def _effective_limit(self, scope, kind):
+        """429による調整を反映した上限（制限なしはNone。呼び出し元でロック済み）"""
+        limit = self.limits.get((scope, kind))
+        if limit is None:
+            return None
+        return max(1, int(limit * self.factors[kind]))
+
+    def _windows(self, kind, user):
+        """この呼び出しで数える (範囲, 上限の種類, ユーザー) の組"""
+        yield SCOPE_PROJECT, kind, None
+        yield SCOPE_USER, kind, user
+
+    def _expire(self, usage, now):
+        """集計期間を過ぎた呼び出しを除く"""
+        while usage and now - usage[0] >= self.window:
+            usage.popleft()
+
+    def acquire(self, kind, user=None):
+        """
+        1回分の呼び出しを記録（上限に達している場合は空くまで待つ）
+
+        Args:
+            kind (str): 'read' / 'write'
+            user (str, optional): 呼び出すユーザー（サービスアカウントのメールアドレスなど）
+
+        Returns:
+            float: 待った秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                delay = self._paused_until[kind] - now
+                if delay <= 0:
+                    delay = 0.0
+                    for key in self._windows(kind, user):
+                        limit = self._effective_limit(key[0], kind)
+                        if limit is None:
+                            continue
+                        usage = self._usage.setdefault(key, deque())
+                        self._expire(usage, now)
+                        if len(usage) >= limit:
+                            # 上限を下回るまでに期間の外へ出る必要がある呼び出しの時刻まで待つ
+                            delay = max(delay, usage[len(usage) - limit] + self.window - now)
+                if delay <= 0:
+                    for key in self._windows(kind, user):
+                        self._usage.setdefault(key, deque()).append(now)
+                    self.requests[kind] += 1
+                    self.waited_seconds += waited
+                    self.max_wait = max(self.max_wait, waited)
+                    return waited
+            self.sleep(delay)
+            waited += delay
+
+    def record_success(self, kind):
+        """
+        呼び出しの成功を記録（429で下げた上限を少しずつ戻す）
+
+        Args:
+            kind (str): 'read' / 'write'
+        """
+        with self._lock:
+            if self.factors[kind] < 1.0:
+                self.factors[kind] = min(1.0, self.factors[kind] + self.recovery_per_call)
+
+    def record_throttled(self, kind, retry_after=None):
+        """
+        429（上限超過）を記録し、その種類の上限を下げる
+
+        同時に送った呼び出しがまとめて429になった場合に何度も下げないよう、
+        下げてから待ち時間（最低でも window の5%）が過ぎるまでの429は回数だけ数える
+
+        Args:
+            kind (str): 'read' / 'write'
+            retry_after (float, optional): サーバーが指定した待ち時間（秒）。指定があればその間は全員を待たせる
+        """
+        with self._lock:
+            now = self.clock()
+            self.throttled[kind] += 1
+            if now >= self._backoff_until[kind]:
+                self.factors[kind] = max(self.min_factor, self.factors[kind] * self.backoff_factor)
+                self._backoff_until[kind] = now + max(min(retry_after or 0.0, self.window), self.window * 0.05)
+            if retry_after is not None:
+                self._paused_until[kind] = max(self._paused_until[kind], now + min(retry_after, self.window))
+
+    def headroom(self):
+        """
+        今すぐ使える残りの回数
+
+        Returns:
+            dict: 'read' / 'write' をキーとした project（limit, effective_limit, used, remaining）,
+                users（ユーザーごとの同じ項目）, factor（429による調整の割合）
+        """
+        with self._lock:
+            now = self.clock()
+            report = {}
+            for kind in KINDS:
+                entries = {}
+                for (scope, usage_kind, user), usage in self._usage.items():
+                    if usage_kind != kind:
+                        continue
+                    self._expire(usage, now)
+                    entries[(scope, user)] = len(usage)
+                report[kind] = {
+                    'project': self._headroom_entry(SCOPE_PROJECT, kind, entries.get((SCOPE_PROJECT, None), 0)),
+                    'users': {user: self._headroom_entry(SCOPE_USER, kind, used)
+                              for (scope, user), used in sorted(entries.items(), key=lambda item: str(item[0][1]))
+                              if scope == SCOPE_USER},
+                    'factor': round(self.factors[kind], 3)
+                }
+            return report
+
+    def _headroom_entry(self, scope, kind, used):
+        """1つの上限の使用状況（呼び出し元でロック済み）"""
+        limit = self.limits.get((scope, kind))
+        effective = self._effective_limit(scope, kind)
+        return {
+            'limit': limit,
+            'effective_limit': effective,
+            'used': used,
+            'remaining': max(0, effective - used) if effective is not None else None
+        }
+
+    def summary(self):
+        """
+        集計結果
+
+        Returns:
+            dict: requests（種類ごとの回数）, throttled（429の回数）, waited_seconds, max_wait, headroom
+        """
+        headroom = self.headroom()
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'throttled': dict(self.throttled),
+                'waited_seconds': round(self.waited_seconds, 3),
+                'max_wait': round(self.max_wait, 3),
+                'headroom': headroom
+            }
+
+    def print_report(self):
+        """上限に対する使用状況を表示"""
+        summary = self.summary()
+        print(f"📊 Sheets APIの上限に対する使用状況（直近{self.window:g}秒）")
+        labels = {READ: '読み込み', WRITE: '書き込み'}
+        for kind in KINDS:
+            headroom = summary['headroom'][kind]
+            project = headroom['project']
+            limit = f"{project['used']}/{project['effective_limit']}回" if project['limit'] else f"{project['used']}回（制限なし）"
+            line = (f"   - {labels[kind]}: 合計{summary['requests'][kind]}回 / プロジェクト {limit}"
+                    f" / 429: {summary['throttled'][kind]}回")
+            if headroom['factor'] < 1.0:
+                line += f" / 上限を{headroom['factor']:.0%}に調整中"
+            print(line)
+            for user, entry in headroom['users'].items():
+                if entry['limit']:
+                    print(f"     👤 {user or '不明なユーザー'}: {entry['used']}/{entry['effective_limit']}回"
+                          f"（残り{entry['remaining']}回）")
+        if summary['waited_seconds'] > 0:
+            print(f"⏱️ 上限のための待ち: 合計{summary['waited_seconds']:.1f}秒（最大{summary['max_wait']:.1f}秒）")
+
+
+def get_quota_tracker():
+    """
+    プロセス全体で共有する集計を取得
+
+    Returns:
+        SheetsQuotaTracker: 集計（初回のみ既定の上限で作成）
+    """
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = SheetsQuotaTracker()
+        return _tracker
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+シフト開始前リマインダー
+CSVの開始時間のN分前に各従業員へSlack通知を送るタイマーエンジン
+
+リマインダーはすべて同じWebhookに送るため、1つの送信スレッドから順番に送り、
+送信の間隔を min_interval 秒空ける（SlackのIncoming Webhookは1秒に1件程度が上限）
+"""
+
+import heapq
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+import pytz
+import scheduler_metrics as metrics
+
+
+class ShiftReminderEngine:
+    """ヒープベースのシフト開始リマインダーエンジン"""
+
+    # 送信の最小間隔（秒）。SlackのIncoming Webhookの上限（1秒に1件程度）に合わせる
+    DEFAULT_MIN_INTERVAL = 1.0
+
+    def __init__(self, send_func, minutes_before=15, min_interval=DEFAULT_MIN_INTERVAL,
+                 timezone='Asia/Tokyo', clock=time.time):
+        """
+        初期化
+
+        Args:
+            send_func (callable): メッセージ文字列を受け取って送信する関数（1つのWebhookへ送る）
+            minutes_before (int): シフト開始の何分前に通知するか
+            min_interval (float): 送信の最小間隔（秒）
+            timezone (str): CSVの日時のタイムゾーン
+            clock (callable): 現在時刻（UNIX秒）を返す関数
+        """
+        self.send_func = send_func
+        self.minutes_before = minutes_before
+        self.min_interval = min_interval
+        self.tz = pytz.timezone(timezone)
+        self.clock = clock
+        # ヒープ要素: [通知時刻, 連番, キー]。キャンセル時はキーをNoneにする（遅延削除）
+        self._heap = []
+        self._entries = {}
+        # 送信済みキー（再読み込み時の二重送信防止）
+        self._fired = set()
+        self._seq = 0
+        self._cancelled = 0
+        self._cond = threading.Condition()
+        self._stopped = True
+        self._thread = None
+        # 期限が来たリマインダーの送信キュー（1つの送信スレッドが順番に送る）
+        self._send_queue = queue.Queue()
+        self._sender = None
+        self._sender_stop = threading.Event()
+        self.dispatched = 0
+
+    @staticmethod
+    def make_key(row):
+        """
+        予定行からリマインダーのキーを作成
+
+        Args:
+            row (dict): name, date, start_time, task を含む予定
+
+        Returns:
+            tuple: (日付, 開始時間, 名前, タスク内容)
+        """
+        return (str(row['date']), str(row['start_time']), str(row['name']), str(row['task']))
+
+    def _deadline(self, key):
+        """キーから通知時刻（UNIX秒）を求める"""
+        date, start_time = key[0], key[1]
+        start_at = datetime.strptime(f"{date} {start_time}", '%Y-%m-%d %H:%M')
+        start_at = self.tz.localize(start_at)
+        return (start_at - timedelta(minutes=self.minutes_before)).timestamp(), start_at.timestamp()
+
+    def format_message(self, key):
+        """
+        リマインダーのメッセージを作成
+
+        Args:
+            key (tuple): リマインダーのキー
+
+        Returns:
+            str: 送信するメッセージ
+        """
+        _date, start_time, name, task = key
+        return f"⏰ {name}さん、{start_time}から「{task}」のシフトが始まります（{self.minutes_before}分前のお知らせ）"
+
+    def _push(self, key, deadline):
+        """ヒープにリマインダーを追加（_condを保持して呼ぶ）"""
+        entry = [deadline, self._seq, key]
+        self._seq += 1
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _cancel(self, key):
+        """リマインダーをキャンセル（_condを保持して呼ぶ）"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry[2] = None
+            self._cancelled += 1
+
+    def _compact(self):
+        """キャンセル済み要素が増えたらヒープを作り直す（_condを保持して呼ぶ）"""
+        if self._cancelled > 1024 and self._cancelled > len(self._heap) // 2:
+            self._heap = [entry for entry in self._heap if entry[2] is not None]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def add(self, key, deadline):
+        """
+        リマインダーを1件追加
+
+        Args:
+            key (tuple): リマインダーのキー（format_messageに渡される）
+            deadline (float): 通知時刻（UNIX秒）
+        """
+        with self._cond:
+            self._cancel(key)
+            self._push(key, deadline)
+            self._cond.notify()
+
+    def sync(self, rows):
+        """
+        予定一覧とリマインダーを差分同期
+
+        既存のリマインダーはそのまま残し、追加・削除された予定だけを反映する。
+        開始時刻を過ぎた予定は登録しない。
+
+        Args:
+            rows (iterable): name, date, start_time, task を含む予定のリスト
+
+        Returns:
+            tuple: (追加件数, 削除件数)
+        """
+        now = self.clock()
+        desired = {}
+        # 同じ日時のシフトは多いので、日時のパース結果を使い回す
+        deadlines = {}
+        for row in rows:
+            try:
+                key = self.make_key(row)
+                slot = (key[0], key[1])
+                times = deadlines.get(slot)
+                if times is None:
+                    times = deadlines[slot] = self._deadline(key)
+            except (KeyError, ValueError):
+                continue
+            deadline, start_at = times
+            if start_at > now:
+                desired[key] = deadline
+
+        with self._cond:
+            removed = [key for key in self._entries if key not in desired]
+            for key in removed:
+                self._cancel(key)
+
+            # 送信済みキーは開始前の予定分だけ残す
+            self._fired.intersection_update(desired)
+
+            added = 0
+            for key, deadline in desired.items():
+                if key not in self._entries and key not in self._fired:
+                    self._push(key, deadline)
+                    added += 1
+
+            self._compact()
+            self._cond.notify()
+
+        return added, len(removed)
+
+    @property
+    def pending_count(self):
+        """未送信のリマインダー件数"""
+        return len(self._entries)
+
+    def start(self):
+        """タイマースレッドと送信スレッドを開始"""
+        if self._thread is not None:
+            return
+        self._stopped = False
+        self._sender_stop.clear()
+        self._sender = threading.Thread(target=self._send_loop, name='shift-reminder-sender', daemon=True)
+        self._sender.start()
+        self._thread = threading.Thread(target=self._run, name='shift-reminder-timer', daemon=True)
+        self._thread.start()
+        print(f"⏰ シフトリマインダーを開始しました（{self.minutes_before}分前 / {self.pending_count}件）")
+
+    def stop(self):
+        """タイマースレッドと送信スレッドを停止（送信中のリマインダーは完了を待ち、送信待ちのものは破棄する）"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._sender is not None:
+            self._sender_stop.set()
+            self._send_queue.put(None)
+            self._sender.join()
+            self._sender = None
+        dropped = 0
+        while True:
+            try:
+                key = self._send_queue.get_nowait()
+            except queue.Empty:
+                break
+            if key is not None:
+                dropped += 1
+        if dropped:
+            print(f"⚠️ 送信待ちのシフトリマインダー{dropped}件を破棄しました")
+
+    def _run(self):
+        """通知時刻まで待機して期限が来たリマインダーを送信キューに渡すループ"""
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    # キャンセル済みの先頭要素を捨てる
+                    while self._heap and self._heap[0][2] is None:
+                        heapq.heappop(self._heap)
+                        self._cancelled -= 1
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - self.clock()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if self._stopped:
+                    return
+
+                # 期限が来たものをまとめて取り出す
+                now = self.clock()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    deadline, _seq, key = heapq.heappop(self._heap)
+                    if key is None:
+                        self._cancelled -= 1
+                        continue
+                    del self._entries[key]
+                    self._fired.add(key)
+                    due.append((deadline, key))
+
+            for deadline, key in due:
+                metrics.REMINDER_LAG_SECONDS.observe(max(now - deadline, 0))
+                self._send_queue.put(key)
+
+    def _send_loop(self):
+        """送信キューのリマインダーを min_interval 秒の間隔を空けて1件ずつ送信するループ"""
+        next_send_at = 0.0
+        while True:
+            key = self._send_queue.get()
+            if key is None or self._sender_stop.is_set():
+                return
+            wait = next_send_at - time.monotonic()
+            if wait > 0 and self._sender_stop.wait(wait):
+                self._send_queue.put(key)
+                return
+            self._dispatch(key)
+            next_send_at = time.monotonic() + self.min_interval
+
+    def _dispatch(self, key):
+        """リマインダーを送信"""
+        try:
+            success = self.send_func(self.format_message(key))
+            metrics.REMINDERS_SENT.inc(result='success' if success is not False else 'failure')
+        except Exception as e:
+            print(f"❌ リマインダー送信エラー ({key[2]} {key[0]} {key[1]}): {e}")
+            metrics.REMINDERS_SENT.inc(result='error')
+        finally:
+            with self._cond:
+                self.dispatched += 1
@@ -12,13 +12,30 @@ import signal
 import sys
 import os
 import psutil
-from datetime import datetime
+import runpy
+import threading
+from datetime import datetime, timedelta
 from csv_direct_slack import CSVToSlackDirect
+from schedule_watcher import ScheduleState, FileChangeWatcher, file_signature
+import scheduler_metrics as metrics
+from shift_reminders import ShiftReminderEngine
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.py')
+
+# ホットリロードの対象となる設定項目
+RELOADABLE_CONFIG_KEYS = (
+    'SLACK_WEBHOOK_URL', 'SLACK_CHANNEL', 'CSV_FILE', 'NOTIFICATION_TIME',
+    'SHIFT_REMINDER_MINUTES', 'METRICS_PORT'
+)
 
 class SimpleAutoScheduler:
     """シンプル自動スケジューリングクラス"""
     
-    def __init__(self, slack_webhook_url, csv_file, channel=None):
+    # Slackのtextフィールドの上限文字数
+    SLACK_TEXT_LIMIT = 40000
+    
+    def __init__(self, slack_webhook_url, csv_file, channel=None, prewarm_minutes=5,
+                 schedule_state=None, metrics_port=None, reminder_minutes=None):
         """
         初期化
         
@@ -26,11 +43,32 @@ class SimpleAutoScheduler:
             slack_webhook_url (str): SlackのWebhook URL
             csv_file (str): CSVファイルのパス
             channel (str, optional): 送信先チャンネル
+            prewarm_minutes (int, optional): 通知時間の何分前にメッセージを事前生成するか
+            schedule_state (ScheduleState, optional): 共有するインメモリスケジュール
+            metrics_port (int, optional): メトリクスを公開するポート（Noneの場合は公開しない）
+            reminder_minutes (int, optional): シフト開始の何分前に個別通知するか（Noneの場合は通知しない）
         """
         self.slack_sender = CSVToSlackDirect(slack_webhook_url)
+        self.schedule_state = schedule_state or ScheduleState(csv_file)
+        self.schedule_state.add_listener(self._on_schedule_changed)
+        self.slack_sender.attach_schedule_state(self.schedule_state)
+        self.watcher = None
+        self.metrics_port = metrics_port
+        self.metrics_server = None
+        self.reminder_engine = None
+        if reminder_minutes:
+            self.reminder_engine = self._create_reminder_engine(reminder_minutes)
         self.csv_file = csv_file
         self.channel = channel
         self.pid_file = "scheduler.pid"
+        self.notification_time = None
+        self.prewarm_minutes = prewarm_minutes
+        # 事前生成済みメッセージ（target_date, message, csv_signature）
+        self.prepared_message = None
+        self._prepare_lock = threading.RLock()
+        # 設定のホットリロード用
+        self._wakeup = threading.Event()
+        self._reload_requested = False
         print("✅ シンプル自動スケジューラーが準備完了しました")
     
     def check_existing_processes(self):
@@ -105,16 +143,335 @@ class SimpleAutoScheduler:
         except Exception as e:
             print(f"⚠️  PIDファイル削除エラー: {e}")
     
+    def _csv_signature(self):
+        """
+        CSVファイルの変更検知用シグネチャを取得
+        
+        Returns:
+            tuple: (更新時刻ns, サイズ, inode)。ファイルがない場合None
+        """
+        return file_signature(self.csv_file)
+    
+    def _create_reminder_engine(self, reminder_minutes):
+        """シフトリマインダーエンジンを作成"""
+        return ShiftReminderEngine(
+            send_func=lambda message: self.slack_sender.send_message(message, self.channel),
+            minutes_before=reminder_minutes
+        )
+    
+    def sync_reminders(self):
+        """インメモリスケジュールとシフトリマインダーを差分同期"""
+        if self.reminder_engine is None:
+            return
+        added, removed = self.reminder_engine.sync(self.schedule_state.all_rows())
+        if added or removed:
+            print(f"⏰ シフトリマインダーを更新しました: +{added} / -{removed}（待機中 {self.reminder_engine.pending_count}件）")
+    
+    def _on_schedule_changed(self):
+        """インメモリスケジュール更新時にリマインダーと事前生成メッセージを更新"""
+        self.sync_reminders()
+        with self._prepare_lock:
+            if self.prepared_message is None:
+                return
+            print("🔄 スケジュールが更新されたため事前生成メッセージを作り直します")
+            self.prepared_message = None
+        self.prewarm_next_message()
+    
+    def _on_csv_file_changed(self, path):
+        """CSVファイルの変更を検知したときの処理"""
+        print(f"📝 CSVファイルの変更を検知しました: {path}")
+        self.schedule_state.refresh_if_changed()
+    
+    def _on_config_file_changed(self, path):
+        """config.pyの変更を検知したときの処理"""
+        print(f"⚙️  設定ファイルの変更を検知しました: {path}")
+        self.request_reload()
+    
+    def request_reload(self):
+        """
+        設定の再読み込みを要求（SIGHUPハンドラー・監視スレッドから呼ばれる）
+        
+        実際の再読み込みはメインループで行う
+        """
+        self._reload_requested = True
+        self._wakeup.set()
+    
+    def current_config(self):
+        """
+        現在適用中の設定を取得
+        
+        Returns:
+            dict: 設定項目名と値
+        """
+        return {
+            'SLACK_WEBHOOK_URL': self.slack_sender.webhook_url,
+            'SLACK_CHANNEL': self.channel,
+            'CSV_FILE': self.csv_file,
+            'NOTIFICATION_TIME': self.notification_time,
+            'SHIFT_REMINDER_MINUTES': self.reminder_engine.minutes_before if self.reminder_engine else None,
+            'METRICS_PORT': self.metrics_port
+        }
+    
+    def load_config_values(self, config_file=CONFIG_FILE):
+        """
+        config.pyを読み込み直して設定値を取得（モジュールキャッシュは使わない）
+        
+        Args:
+            config_file (str): 設定ファイルのパス
+        
+        Returns:
+            dict: 設定項目名と値
+        """
+        values = runpy.run_path(config_file)
+        return {key: values.get(key) for key in RELOADABLE_CONFIG_KEYS}
+    
+    def reload_config(self):
+        """
+        config.pyを再読み込みし、変更された項目だけを反映
+        
+        プロセスは再起動せず、CSVのインメモリ状態やSlackの接続は維持する
+        
+        Returns:
+            dict: 変更された項目（項目名: (旧値, 新値)）
+        """
+        self._reload_requested = False
+        try:
+            new_config = self.load_config_values()
+        except Exception as e:
+            print(f"❌ 設定ファイルの読み込みに失敗しました（現在の設定を維持します）: {e}")
+            return {}
+        
+        old_config = self.current_config()
+        changes = {
+            key: (old_config[key], new_config[key])
+            for key in RELOADABLE_CONFIG_KEYS
+            if new_config[key] != old_config[key]
+        }
+        if not changes:
+            print("⚙️  設定に変更はありません")
+            return {}
+        
+        for key, (old, new) in changes.items():
+            shown_old, shown_new = old, new
+            if key == 'SLACK_WEBHOOK_URL':
+                shown_old, shown_new = str(old)[:30] + '...', str(new)[:30] + '...'
+            print(f"⚙️  {key}: {shown_old} → {shown_new}")
+        
+        try:
+            if 'SLACK_WEBHOOK_URL' in changes:
+                # セッション（接続プール）はそのまま使い回す
+                self.slack_sender.webhook_url = new_config['SLACK_WEBHOOK_URL']
+            
+            if 'SLACK_CHANNEL' in changes:
+                self.channel = new_config['SLACK_CHANNEL']
+            
+            if 'CSV_FILE' in changes:
+                self._switch_csv_file(new_config['CSV_FILE'])
+            
+            if 'NOTIFICATION_TIME' in changes:
+                self._schedule_daily_jobs(new_config['NOTIFICATION_TIME'])
+            
+            if 'SHIFT_REMINDER_MINUTES' in changes:
+                self._restart_reminders(new_config['SHIFT_REMINDER_MINUTES'])
+            
+            if 'METRICS_PORT' in changes:
+                self._restart_metrics_server(new_config['METRICS_PORT'])
+            
+            print(f"✅ 設定を再読み込みしました（{len(changes)}項目）")
+        except Exception as e:
+            print(f"❌ 設定の反映中にエラーが発生しました: {e}")
+        
+        return changes
+    
+    def _switch_csv_file(self, csv_file):
+        """監視・読み込み対象のCSVファイルを切り替える"""
+        old_csv_file = self.csv_file
+        self.csv_file = csv_file
+        if self.watcher is not None:
+            self.watcher.unwatch(old_csv_file)
+            self.watcher.watch(csv_file, self._on_csv_file_changed)
+        # 再読み込み時にリマインダー・事前生成メッセージも更新される
+        self.schedule_state.set_csv_file(csv_file)
+        if self.prepared_message is None and self.notification_time and self.prewarm_minutes:
+            self.prewarm_next_message()
+    
+    def _restart_reminders(self, reminder_minutes):
+        """シフトリマインダーを新しい設定で作り直す"""
+        if self.reminder_engine is not None:
+            self.reminder_engine.stop()
+            self.reminder_engine = None
+        if reminder_minutes:
+            self.reminder_engine = self._create_reminder_engine(reminder_minutes)
+            self.sync_reminders()
+            self.reminder_engine.start()
+        else:
+            print("⏰ シフトリマインダーを停止しました")
+    
+    def _restart_metrics_server(self, metrics_port):
+        """
+        メトリクス公開サーバーを新しいポートで起動し直す
+        
+        新しいサーバーを起動できてから古いサーバーを止めて入れ替える
+        （起動できない場合は例外を送出し、古いサーバーとポートの設定はそのまま残す）
+        
+        Args:
+            metrics_port (int): 新しいポート（Noneの場合は公開を止める）
+        """
+        new_server = None
+        if metrics_port is not None:
+            new_server = metrics.MetricsServer(metrics_port)
+            new_server.start()
+        old_server = self.metrics_server
+        self.metrics_server = new_server
+        self.metrics_port = metrics_port
+        if old_server is not None:
+            old_server.stop()
+    
+    def start_watching(self):
+        """CSVファイルとconfig.pyの監視を開始"""
+        if self.watcher is not None:
+            return
+        self.watcher = FileChangeWatcher()
+        self.watcher.watch(self.csv_file, self._on_csv_file_changed)
+        self.watcher.watch(CONFIG_FILE, self._on_config_file_changed)
+        self.watcher.start()
+    
+    def stop_watching(self):
+        """ファイル監視を停止"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+    
+    def _next_target_date(self):
+        """
+        次回の通知で送信する対象日付（日本時間）を求める
+        
+        Returns:
+            str: 対象日付（YYYY-MM-DD形式）
+        """
+        now = datetime.now()
+        fire_at = now
+        if self.notification_time:
+            hour, minute = map(int, self.notification_time.split(':'))
+            fire_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if fire_at <= now:
+                fire_at += timedelta(days=1)
+        return fire_at.astimezone(self.slack_sender.jst).strftime('%Y-%m-%d')
+    
+    def prewarm_next_message(self):
+        """
+        次回通知のメッセージを事前に生成・検証しておく
+        
+        通知時刻にはHTTP送信だけを行えばよい状態にする。
+        CSVが変更された場合は送信時に破棄され、通常の処理にフォールバックする。
+        
+        Returns:
+            bool: 事前生成に成功した場合True
+        """
+        with self._prepare_lock:
+            return self._prewarm_next_message()
+    
+    def _prewarm_next_message(self):
+        """事前生成の本体（_prepare_lockを保持して呼ぶ）"""
+        try:
+            signature = self._csv_signature()
+            if signature is None:
+                print(f"⚠️  事前生成をスキップします（CSVファイルが見つかりません: {self.csv_file}）")
+                self.prepared_message = None
+                return False
+            
+            target_date = self._next_target_date()
+            schedule_list = self.slack_sender.read_csv_schedule(self.csv_file, target_date)
+            message = self.slack_sender.format_schedule_message(schedule_list, target_date)
+            
+            # 生成したメッセージを検証
+            if not message or len(message) > self.SLACK_TEXT_LIMIT:
+                print(f"⚠️  事前生成したメッセージが不正です（{len(message)}文字）")
+                self.prepared_message = None
+                return False
+            
+            # 読み込み中にCSVが書き換えられた場合は採用しない
+            if self._csv_signature() != signature:
+                print("⚠️  事前生成中にCSVファイルが更新されたため破棄しました")
+                self.prepared_message = None
+                return False
+            
+            self.prepared_message = {
+                'target_date': target_date,
+                'message': message,
+                'csv_signature': signature
+            }
+            print(f"🔥 {target_date}の通知メッセージを事前生成しました（{len(schedule_list)}件）")
+            return True
+            
+        except Exception as e:
+            print(f"⚠️  事前生成エラー: {e}")
+            self.prepared_message = None
+            return False
+    
+    def _take_prepared_message(self):
+        """
+        事前生成済みメッセージを取り出す（無効な場合はNone）
+        
+        Returns:
+            str: 送信可能なメッセージ。使えない場合None
+        """
+        with self._prepare_lock:
+            prepared = self.prepared_message
+            self.prepared_message = None
+        
+        if prepared is None:
+            return None
+        
+        today = datetime.now(self.slack_sender.jst).strftime('%Y-%m-%d')
+        if prepared['target_date'] != today:
+            print(f"⚠️  事前生成メッセージの日付が異なるため破棄しました: {prepared['target_date']}")
+            return None
+        
+        if self._csv_signature() != prepared['csv_signature']:
+            print("⚠️  CSVファイルが更新されたため事前生成メッセージを破棄しました")
+            return None
+        
+        return prepared['message']
+    
+    def _record_job_lag(self, job_time):
+        """
+        予定時刻からの遅れをメトリクスに記録
+        
+        Args:
+            job_time (str): ジョブの予定時刻（HH:MM形式）
+        """
+        if not job_time:
+            return
+        now = datetime.now()
+        hour, minute = map(int, job_time.split(':'))
+        scheduled_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if scheduled_at > now:
+            scheduled_at -= timedelta(days=1)
+        metrics.JOB_LAG_SECONDS.observe((now - scheduled_at).total_seconds())
+    
     def daily_schedule_job(self):
         """毎朝10時に実行されるジョブ"""
+        success = False
+        fired_at = time.perf_counter()
+        self._record_job_lag(self.notification_time)
         try:
             print(f"🕙 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - 朝10時の自動投稿を開始")
             
-            # CSVファイルから今日の予定を取得してSlackに送信
-            success = self.slack_sender.send_daily_schedule(
-                csv_file=self.csv_file,
-                channel=self.channel
-            )
+            message = self._take_prepared_message()
+            if message is not None:
+                # 事前生成済みのメッセージをそのまま送信
+                success = self.slack_sender.send_message(message, self.channel)
+            else:
+                # CSVファイルから今日の予定を取得してSlackに送信
+                success = self.slack_sender.send_daily_schedule(
+                    csv_file=self.csv_file,
+                    channel=self.channel
+                )
+            
+            elapsed_ms = (time.perf_counter() - fired_at) * 1000
+            mode = "事前生成" if message is not None else "通常処理"
+            print(f"⏱️  投稿所要時間: {elapsed_ms:.1f}ms（{mode}）")
             
             if success:
                 print("✅ 朝10時の自動投稿が完了しました")
@@ -123,6 +480,58 @@ class SimpleAutoScheduler:
                 
         except Exception as e:
             print(f"❌ 自動投稿エラー: {e}")
+        finally:
+            metrics.JOB_RUNS.inc(job='daily', result='success' if success else 'failure')
+            metrics.JOB_SECONDS.observe(time.perf_counter() - fired_at, job='daily')
+    
+    def _prewarm_time(self, notification_time):
+        """
+        事前生成ジョブの実行時刻を求める
+        
+        Args:
+            notification_time (str): 通知時間（HH:MM形式）
+        
+        Returns:
+            str: 事前生成時刻（HH:MM形式）
+        """
+        hour, minute = map(int, notification_time.split(':'))
+        fire_at = datetime(2000, 1, 2, hour, minute)
+        return (fire_at - timedelta(minutes=self.prewarm_minutes)).strftime('%H:%M')
+    
+    def _schedule_daily_jobs(self, notification_time):
+        """
+        毎日の投稿ジョブと事前生成ジョブを（再）登録
+        
+        新しいジョブを先に作成して時刻を検証し、不正な時刻の場合は既存のジョブと
+        通知時間をそのまま残す（次の再読み込みでも変更として扱われる）
+        
+        Args:
+            notification_time (str): 通知時間（HH:MM形式）
+        
+        Raises:
+            schedule.ScheduleValueError / ValueError: 通知時間がHH:MM形式でない場合
+        """
+        # 登録前のジョブで時刻を検証（.do() を呼ぶまではスケジューラーに追加されない）
+        daily_job = schedule.every().day.at(notification_time)
+        prewarm_job = prewarm_time = None
+        if self.prewarm_minutes:
+            prewarm_time = self._prewarm_time(notification_time)
+            prewarm_job = schedule.every().day.at(prewarm_time)
+        
+        schedule.clear('daily')
+        schedule.clear('prewarm')
+        
+        # 毎日のスケジュールを設定
+        self.notification_time = notification_time
+        daily_job.do(self.daily_schedule_job).tag('daily')
+        
+        print(f"⏰ 毎日{notification_time}に自動投稿するようにスケジュールを設定しました")
+        
+        # 通知時間の少し前にメッセージを事前生成
+        if prewarm_job is not None:
+            prewarm_job.do(self.prewarm_next_message).tag('prewarm')
+            print(f"🔥 毎日{prewarm_time}にメッセージを事前生成します")
+            self.prewarm_next_message()
     
     def start_daily_scheduler(self, notification_time="10:00"):
         """
@@ -139,26 +548,60 @@ class SimpleAutoScheduler:
             # PIDファイルを作成
             self.create_pid_file()
             
-            # 既存のスケジュールをクリア
+            # スケジュールを読み込んでファイル監視を開始
+            self.schedule_state.refresh_if_changed()
+            self.start_watching()
+            
+            # シフトリマインダーを開始
+            if self.reminder_engine is not None:
+                self.sync_reminders()
+                self.reminder_engine.start()
+            
+            # メトリクスを公開
+            if self.metrics_port is not None and self.metrics_server is None:
+                self.metrics_server = metrics.MetricsServer(self.metrics_port)
+                self.metrics_server.start()
+            
+            # 既存のスケジュールをクリアして毎日のジョブを登録
             schedule.clear()
+            self._schedule_daily_jobs(notification_time)
             
-            # 毎日のスケジュールを設定
-            schedule.every().day.at(notification_time).do(self.daily_schedule_job)
+            # SIGHUPで設定を再読み込み
+            if hasattr(signal, 'SIGHUP'):
+                try:
+                    signal.signal(signal.SIGHUP, lambda sig, frame: self.request_reload())
+                    print(f"💡 設定の再読み込み: kill -HUP {os.getpid()}（config.pyの保存でも自動反映）")
+                except ValueError:
+                    # メインスレッド以外からはシグナルハンドラーを設定できない
+                    pass
             
-            print(f"⏰ 毎日{notification_time}に自動投稿するようにスケジュールを設定しました")
             print("🔄 スケジューラーを開始します...")
             
             # スケジューラーを実行
             while True:
                 schedule.run_pending()
-                time.sleep(60)  # 1分ごとにチェック
+                if self._reload_requested:
+                    self.reload_config()
+                    continue
+                # 次のジョブ時刻まで待機（最大1分）して発火の遅れをなくす
+                idle_seconds = schedule.idle_seconds()
+                if idle_seconds is None:
+                    idle_seconds = 60
+                self._wakeup.wait(min(max(idle_seconds, 0), 60))
+                self._wakeup.clear()
                 
         except KeyboardInterrupt:
             print("\n🛑 スケジューラーを停止します...")
         except Exception as e:
             print(f"❌ スケジューラーエラー: {e}")
         finally:
-            # PIDファイルを削除
+            # ファイル監視・メトリクス公開を停止してPIDファイルを削除
+            self.stop_watching()
+            if self.reminder_engine is not None:
+                self.reminder_engine.stop()
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
+                self.metrics_server = None
             self.remove_pid_file()
 
 def signal_handler(sig, frame):
@@ -168,7 +611,10 @@ def signal_handler(sig, frame):
 
 def main():
     """メイン実行関数"""
+    import config
     from config import SLACK_WEBHOOK_URL, CSV_FILE, SLACK_CHANNEL, NOTIFICATION_TIME
+    metrics_port = getattr(config, 'METRICS_PORT', None)
+    reminder_minutes = getattr(config, 'SHIFT_REMINDER_MINUTES', None)
     
     print("=" * 60)
     print("🚀 シンプル自動スケジューラー起動")
@@ -181,6 +627,8 @@ def main():
         print(f"   - CSVファイル: {CSV_FILE}")
         print(f"   - Slack チャンネル: {SLACK_CHANNEL}")
         print(f"   - 通知時間: {NOTIFICATION_TIME}")
+        print(f"   - メトリクスポート: {metrics_port or '無効'}")
+        print(f"   - シフト開始リマインダー: {f'{reminder_minutes}分前' if reminder_minutes else '無効'}")
         
         # シグナルハンドラーを設定
         signal.signal(signal.SIGINT, signal_handler)
@@ -191,7 +639,9 @@ def main():
         scheduler = SimpleAutoScheduler(
             slack_webhook_url=SLACK_WEBHOOK_URL,
             csv_file=CSV_FILE,
-            channel=SLACK_CHANNEL
+            channel=SLACK_CHANNEL,
+            metrics_port=metrics_port,
+            reminder_minutes=reminder_minutes
         )
         
         print("✅ シンプル自動スケジューラーが起動しました")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+処理段階ごとの所要時間を計測する軽量タイマー
+with StageTimer() の中で呼ばれた stage() の時間・count() の件数を段階名ごとに集計する
+profiled() で1回分の実行をcProfileで記録できる
+"""
+
+import io
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class StageTimer:
+    """段階ごとの所要時間を集計するタイマー"""
+
+    def __init__(self):
+        """初期化"""
+        self.seconds = {}
+        self.counts = {}
+        self._previous = None
+        self._started = None
+        self.total_seconds = 0.0
+
+    def __enter__(self):
+        """このスレッドで計測中のタイマーとして有効にする"""
+        self._previous = getattr(_local, 'timer', None)
+        _local.timer = self
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """計測を終了して以前のタイマーに戻す"""
+        self.total_seconds = time.perf_counter() - self._started
+        _local.timer = self._previous
+        return False
+
+    def add(self, name, seconds):
+        """
+        段階の所要時間を加算
+
+        Args:
+            name (str): 段階名
+            seconds (float): 所要時間（秒）
+        """
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        """
+        件数を加算
+
+        Args:
+            name (str): 件数の名前（rows_scanned など）
+            amount (int): 増分
+        """
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    @contextmanager
+    def stage(self, name):
+        """
+        ブロックの実行時間を段階名で記録
+
+        Args:
+            name (str): 段階名
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def as_dict(self):
+        """
+        ミリ秒単位の集計結果を取得
+
+        Returns:
+            dict: 段階名をキーとした所要時間（ミリ秒）。total は全体の時間
+        """
+        timings = {name: round(seconds * 1000, 2) for name, seconds in self.seconds.items()}
+        timings['total'] = round(self.total_seconds * 1000, 2)
+        return timings
+
+    def report(self):
+        """
+        所要時間と件数をまとめて取得
+
+        Returns:
+            dict: timings（ミリ秒）と counts
+        """
+        return {'timings': self.as_dict(), 'counts': dict(self.counts)}
+
+
+def current():
+    """このスレッドで計測中のタイマーを取得（なければNone）"""
+    return getattr(_local, 'timer', None)
+
+
+@contextmanager
+def stage(name):
+    """
+    計測中のタイマーがあればブロックの実行時間を記録（なければ何もしない）
+
+    Args:
+        name (str): 段階名
+    """
+    timer = current()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def count(name, amount=1):
+    """
+    計測中のタイマーがあれば件数を加算（なければ何もしない）
+
+    Args:
+        name (str): 件数の名前
+        amount (int): 増分
+    """
+    timer = current()
+    if timer is not None:
+        timer.count(name, amount)
+
+
+class ProfileResult:
+    """profiled() の結果"""
+
+    def __init__(self):
+        """初期化"""
+        self.path = None
+        self.summary = []
+
+
+@contextmanager
+def profiled(enabled=True, path=None, top=15):
+    """
+    ブロックの実行をcProfileで記録
+
+    Args:
+        enabled (bool): Falseの場合は何もしない
+        path (str, optional): プロファイル結果（pstats形式）の保存先
+        top (int): 要約に含める関数の数（累積時間順）
+
+    Yields:
+        ProfileResult: 終了後に path と summary（要約の行のリスト）が設定される
+    """
+    result = ProfileResult()
+    if not enabled:
+        yield result
+        return
+
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+            result.path = path
+        buffer = io.StringIO()
+        pstats.Stats(profiler, stream=buffer).sort_stats('cumulative').print_stats(top)
+        result.summary = [line for line in buffer.getvalue().splitlines() if line.strip()]
@@ -14,6 +14,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from simple_auto_scheduler import SimpleAutoScheduler
+import config
 from config import SLACK_WEBHOOK_URL, CSV_FILE, SLACK_CHANNEL, NOTIFICATION_TIME
 
 def signal_handler(sig, frame):
@@ -34,6 +35,10 @@ def main():
         print(f"   - CSVファイル: {CSV_FILE}")
         print(f"   - Slack チャンネル: {SLACK_CHANNEL}")
         print(f"   - 通知時間: {NOTIFICATION_TIME}")
+        metrics_port = getattr(config, 'METRICS_PORT', None)
+        print(f"   - メトリクスポート: {metrics_port or '無効'}")
+        reminder_minutes = getattr(config, 'SHIFT_REMINDER_MINUTES', None)
+        print(f"   - シフト開始リマインダー: {f'{reminder_minutes}分前' if reminder_minutes else '無効'}")
         
         # シグナルハンドラーを設定
         signal.signal(signal.SIGINT, signal_handler)
@@ -44,7 +49,9 @@ def main():
         scheduler = SimpleAutoScheduler(
             slack_webhook_url=SLACK_WEBHOOK_URL,
             csv_file=CSV_FILE,
-            channel=SLACK_CHANNEL
+            channel=SLACK_CHANNEL,
+            metrics_port=metrics_port,
+            reminder_minutes=reminder_minutes
         )
         
         print("✅ 自動スケジューラーが起動しました")
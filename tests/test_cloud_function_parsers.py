@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cloud_function_main の解析方法のテスト
+軽量パス（標準ライブラリ）とpandasパスが同じCSVから同じメッセージを作ることを確認する
+"""
+
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+pytest.importorskip('pandas')
+import cloud_function_main as cf
+
+SAMPLE_CSV = os.path.join(BASE_DIR, 'schedule test - シート2 (1).csv')
+
+# 空欄のタスク・数値に見える値・列が足りない行・BOMを含むCSV
+EDGE_CASE_CSV = (
+    '﻿名前,日付,開始時間,終了時間,タスク内容\n'
+    '田中,2025-10-01,09:00,12:00,\n'
+    '佐藤,2025-10-01,13:00,18:00,0123\n'
+    '鈴木,2025-10-01,18:00,21:00,1.50\n'
+    '高橋,2025-10-02,10:00\n'
+    '\n'
+    '伊藤,2025-10-02,,,NA\n'
+)
+
+
+def _sample_contents():
+    with open(SAMPLE_CSV, 'r', encoding='utf-8-sig') as f:
+        return [f.read(), EDGE_CASE_CSV]
+
+
+@pytest.mark.parametrize('csv_content', _sample_contents(), ids=['sample', 'edge_cases'])
+def test_lean_and_pandas_parsers_render_identical_messages(csv_content):
+    lean = cf._parse_schedule_lean(csv_content)
+    legacy = cf._parse_schedule_pandas(csv_content)
+
+    assert sorted(lean) == sorted(legacy)
+    for date in lean:
+        assert cf._format_message(date, lean[date]) == cf._format_message(date, legacy[date])
+    dates = sorted(lean)
+    assert cf._format_digest(dates, lean, cf.DIGEST_LAYOUTS) == cf._format_digest(dates, legacy, cf.DIGEST_LAYOUTS)
+
+
+def test_empty_task_is_rendered_as_empty_string():
+    rows = cf._parse_schedule_pandas(EDGE_CASE_CSV)['2025-10-01']
+
+    message = cf._format_message('2025-10-01', rows)
+
+    assert '田中: \n' in message
+    assert 'nan' not in message
+    assert [row['タスク内容'] for row in rows] == ['', '0123', '1.50']
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+master_aggregation_sheet のテスト
+フェイクのSheets APIでマスターシートの作成が3回のAPI呼び出しで済むことを確認する
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_google_api import FakeSheetsService
+from master_aggregation_sheet import MasterAggregationSheetCreator
+
+
+def test_create_master_sheet_uses_three_api_calls():
+    service = FakeSheetsService()
+    creator = MasterAggregationSheetCreator('unused-credentials.json', service=service)
+
+    spreadsheet_id = creator.create_master_sheet()
+
+    assert spreadsheet_id is not None
+    assert service.calls == {
+        'spreadsheets.create': 1,
+        'spreadsheets.values.batchUpdate': 1,
+        'spreadsheets.batchUpdate': 1
+    }
+    assert creator.api_calls == 3
+    assert creator.last_stats['api_calls'] == 3
+
+
+def test_create_master_sheet_writes_headers_for_every_sheet():
+    service = FakeSheetsService()
+    creator = MasterAggregationSheetCreator('unused-credentials.json', service=service)
+
+    spreadsheet_id = creator.create_master_sheet(include_sample_rows=False)
+
+    for sheet in MasterAggregationSheetCreator.SHEETS:
+        assert service.get_values(spreadsheet_id, f"{sheet['title']}!1:1") == [sheet['headers']]